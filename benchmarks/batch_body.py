@@ -0,0 +1,80 @@
+"""
+Cost of preparing a signed 100-item batch request.
+
+Compares encoding the payload twice (once for the signature and once by
+requests through `json=`) with serializing each query once and signing the
+same bytes. When the batch policy limits bytes, each query is serialized once
+by `execute` to measure it and the batch body is joined from those bytes.
+
+Run from the repository root with: python -m benchmarks.batch_body
+"""
+import json
+import timeit
+
+import requests
+from gql import gql
+
+from orionx_api_client.transports.batch import BatchItem, batch_body
+from orionx_api_client.transports.builders.headers import HeadersBuilder
+from orionx_api_client.transports.builders.payload import PayloadBuilder
+
+QUERY = gql(
+    """
+    query getOrderBook($marketCode: ID!) {
+        orderBook: marketOrderBook(marketCode: $marketCode, limit: 50) {
+            buy {
+                limitPrice
+                amount
+                __typename
+            }
+            sell {
+                limitPrice
+                amount
+                __typename
+            }
+            spread
+            __typename
+        }
+    }
+    """
+)
+
+URL = "https://api2.orionx.io/graphql"
+ITEMS = 100
+ROUNDS = 2000
+
+headers_builder = HeadersBuilder("api_key", "secret_key")
+payloads = [PayloadBuilder.build(QUERY, {"marketCode": f"M{i}"}) for i in range(ITEMS)]
+
+
+def encode_twice() -> requests.PreparedRequest:
+    headers = headers_builder.build(payloads)
+    return requests.Request("POST", URL, headers=headers, json=payloads).prepare()
+
+
+def encode_once() -> requests.PreparedRequest:
+    items = [BatchItem(payload, None) for payload in payloads]  # type: ignore
+    return prepare(batch_body(items))
+
+
+def encode_items_once() -> requests.PreparedRequest:
+    items = [
+        BatchItem(payload, None, json.dumps(payload).encode("utf-8"))  # type: ignore
+        for payload in payloads
+    ]
+    return prepare(batch_body(items))
+
+
+def prepare(body: bytes) -> requests.PreparedRequest:
+    headers = headers_builder.build_for_body(body)
+    return requests.Request("POST", URL, headers=headers, data=body).prepare()
+
+
+if __name__ == "__main__":
+    for name, fn in (
+        ("json= (before)", encode_twice),
+        ("data= (after)", encode_once),
+        ("data= with max_batch_bytes", encode_items_once),
+    ):
+        elapsed = timeit.timeit(fn, number=ROUNDS)
+        print(f"{name:<27} {elapsed / ROUNDS * 1e6:8.1f} us per {ITEMS}-item batch")
@@ -0,0 +1,55 @@
+"""
+Throughput of the batch transport against a slow local server.
+
+Run from the repository root with: python -m benchmarks.batch_workers
+"""
+import time
+
+from gql import gql
+
+from orionx_api_client import BatchPolicy
+from orionx_api_client.transports.batch import OrionxBatchTransport
+from tests.server import StandInServer
+
+QUERY = gql(
+    """
+    query getOrderBook($marketCode: ID!) {
+        marketOrderBook(marketCode: $marketCode, limit: 50) {
+            spread
+        }
+    }
+    """
+)
+
+ROUND_TRIP = 0.05
+QUERIES = 400
+
+
+def run(max_in_flight: int) -> float:
+    with StandInServer(delay=ROUND_TRIP) as server:
+        transport = OrionxBatchTransport(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            batch_policy=BatchPolicy(max_batch_size=10),
+            max_in_flight=max_in_flight,
+        )
+        transport.connect()
+
+        started_at = time.monotonic()
+        results = [
+            transport.execute(QUERY, {"marketCode": f"M{i}"}) for i in range(QUERIES)
+        ]
+        for result in results:
+            result.future.result()
+        elapsed = time.monotonic() - started_at
+
+        transport.close()
+
+    return QUERIES / elapsed
+
+
+if __name__ == "__main__":
+    print(f"{QUERIES} queries, {ROUND_TRIP * 1000:.0f} ms round-trip")
+    for workers in (1, 2, 4, 8):
+        print(f"max_in_flight={workers}: {run(workers):8.1f} queries/s")
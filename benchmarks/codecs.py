@@ -0,0 +1,42 @@
+"""
+Encode and decode throughput of the available JSON codecs on batched
+marketOrderBook responses (30 markets, 50 levels per side).
+
+Run from the repository root with: python -m benchmarks.codecs
+"""
+import json
+import timeit
+
+from orionx_api_client.codecs import JSONCodec, OrjsonCodec
+from tests.server import order_book
+
+MARKETS = 30
+ROUNDS = 200
+
+response = [
+    {"data": {"orderBook": order_book(f"M{i}", limit=50)}} for i in range(MARKETS)
+]
+
+
+def codecs() -> list:
+    available = [JSONCodec()]
+    try:
+        available.append(OrjsonCodec())
+    except ImportError:
+        print("orjson is not installed, only the stdlib codec is measured")
+    return available
+
+
+if __name__ == "__main__":
+    size = len(json.dumps(response).encode("utf-8"))
+    print(f"{MARKETS} order books, {size / 1024:.0f} KiB per response")
+
+    for codec in codecs():
+        encoded = codec.dumps(response)
+        encode = timeit.timeit(lambda: codec.dumps(response), number=ROUNDS)
+        decode = timeit.timeit(lambda: codec.loads(encoded), number=ROUNDS)
+        print(
+            f"{codec.name:<7} "
+            f"encode {size * ROUNDS / encode / 2**20:7.1f} MiB/s  "
+            f"decode {size * ROUNDS / decode / 2**20:7.1f} MiB/s"
+        )
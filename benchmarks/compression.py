@@ -0,0 +1,130 @@
+"""
+Bytes on the wire and latency of batched marketOrderBook queries (30 markets,
+50 levels per side) over a local link throttled to 10 Mbit/s, without
+compression and with gzip and zstd request bodies and gzip responses.
+
+Run from the repository root with: python -m benchmarks.compression
+"""
+import socket
+import statistics
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from gql import gql
+
+from orionx_api_client import BatchPolicy, Compression
+from orionx_api_client.transports.batch import OrionxBatchTransport
+from tests.server import StandInServer, graphql_handler
+
+QUERY = gql(
+    """
+    query getOrderBook($marketCode: ID!) {
+        marketOrderBook(marketCode: $marketCode, limit: 50) {
+            buy {
+                limitPrice
+                amount
+            }
+            sell {
+                limitPrice
+                amount
+            }
+            spread
+        }
+    }
+    """
+)
+
+MARKETS = 30
+ROUNDS = 20
+BANDWIDTH = 10_000_000 / 8  # bytes per second, each way
+
+
+class ThrottledLink:
+    """TCP proxy to `target` forwarding at most `bandwidth` bytes per second."""
+
+    def __init__(self, target: Tuple[str, int], bandwidth: float) -> None:
+        self.target = target
+        self.bandwidth = bandwidth
+        self.sent = 0
+        self.received = 0
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.listener.getsockname()[:2]
+        return f"http://{host}:{port}/graphql"
+
+    def _accept(self) -> None:
+        while True:
+            client, _ = self.listener.accept()
+            upstream = socket.create_connection(self.target)
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(
+                target=self._forward, args=(client, upstream, True), daemon=True
+            ).start()
+            threading.Thread(
+                target=self._forward, args=(upstream, client, False), daemon=True
+            ).start()
+
+    def _forward(self, source: socket.socket, sink: socket.socket, up: bool) -> None:
+        try:
+            while True:
+                data = source.recv(16384)
+                if not data:
+                    break
+                time.sleep(len(data) / self.bandwidth)
+                sink.sendall(data)
+                if up:
+                    self.sent += len(data)
+                else:
+                    self.received += len(data)
+        except OSError:
+            pass
+        finally:
+            sink.close()
+
+
+def run(name: str, compression: Optional[Compression]) -> None:
+    with StandInServer(graphql_handler) as server:
+        server.gzip_responses = compression is not None
+        link = ThrottledLink(server.address, BANDWIDTH)
+        transport = OrionxBatchTransport(
+            "api_key",
+            "secret_key",
+            url=link.url,
+            batch_policy=BatchPolicy(max_batch_size=MARKETS, adaptive=False),
+            compression=compression,
+        )
+        transport.connect()
+
+        latencies: List[float] = []
+        for _ in range(ROUNDS):
+            started_at = time.monotonic()
+            results = [
+                transport.execute(QUERY, {"marketCode": f"M{i}"})
+                for i in range(MARKETS)
+            ]
+            for result in results:
+                result.future.result()
+            latencies.append(time.monotonic() - started_at)
+
+        transport.close()
+
+    print(
+        f"{name:<6} sent {link.sent / ROUNDS / 1024:6.1f} KiB  "
+        f"received {link.received / ROUNDS / 1024:6.1f} KiB  "
+        f"latency {statistics.median(latencies) * 1000:6.1f} ms per batch"
+    )
+
+
+if __name__ == "__main__":
+    print(f"{MARKETS} order books per batch, {BANDWIDTH * 8 / 1e6:.0f} Mbit/s link")
+    run("none", None)
+    run("gzip", Compression(Compression.GZIP))
+    try:
+        run("zstd", Compression(Compression.ZSTD))
+    except ImportError:
+        print("zstandard is not installed, zstd is not measured")
@@ -0,0 +1,68 @@
+"""
+Request rate of the HTTP transport shared by many threads against a local
+server, with the requests defaults (10 connections per host) and with a pool
+sized for the threads.
+
+Run from the repository root with: python -m benchmarks.connection_pool
+"""
+import concurrent.futures
+import time
+from typing import Optional
+
+from gql import gql
+
+from orionx_api_client import ConnectionPool
+from orionx_api_client.transports.http import OrionxHTTPTransport
+from tests.server import StandInServer
+
+QUERY = gql(
+    """
+    query getOrderBook($marketCode: ID!) {
+        marketOrderBook(marketCode: $marketCode, limit: 50) {
+            spread
+        }
+    }
+    """
+)
+
+THREADS = 32
+REQUESTS = 2000
+ROUND_TRIP = 0.01
+
+
+def run(pool: ConnectionPool) -> float:
+    with StandInServer(delay=ROUND_TRIP) as server:
+        transport = OrionxHTTPTransport(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            connection_pool=pool,
+        )
+        transport.connect()
+
+        def send(i: int) -> Optional[dict]:
+            return transport.execute(QUERY, {"marketCode": f"M{i}"}).data
+
+        started_at = time.monotonic()
+        with concurrent.futures.ThreadPoolExecutor(THREADS) as executor:
+            list(executor.map(send, range(REQUESTS)))
+        elapsed = time.monotonic() - started_at
+
+        transport.close()
+
+    return REQUESTS / elapsed
+
+
+def report(name: str, pool: ConnectionPool) -> None:
+    rate = run(pool)
+    print(
+        f"{name:<24} {rate:8.1f} requests/s  "
+        f"created {pool.created:5}  reused {pool.reused:5}  "
+        f"discarded {pool.discarded:5}"
+    )
+
+
+if __name__ == "__main__":
+    print(f"{REQUESTS} requests from {THREADS} threads")
+    report("requests defaults", ConnectionPool())
+    report(f"maxsize={THREADS}", ConnectionPool(maxsize=THREADS))
@@ -0,0 +1,66 @@
+"""
+Per-call profile of session.execute with and without the document cache.
+
+Run from the repository root with: python -m benchmarks.document_cache
+"""
+import cProfile
+import pstats
+
+from graphql.language import parser
+
+from orionx_api_client import Orionx
+from tests.server import StandInServer, graphql_handler
+
+QUERY = """
+    query getOrderBook($marketCode: ID!) {
+        orderBook: marketOrderBook(marketCode: $marketCode, limit: 50) {
+            buy {
+                limitPrice
+                amount
+                __typename
+            }
+            sell {
+                limitPrice
+                amount
+                __typename
+            }
+            spread
+            __typename
+        }
+    }
+"""
+
+CALLS = 500
+
+
+def profile(url: str, document_cache_size: int) -> None:
+    client = Orionx(
+        "api_key", "secret_key", url=url, document_cache_size=document_cache_size
+    )
+    with client as session:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        for _ in range(CALLS):
+            session.execute(QUERY, variable_values={"marketCode": "BTCCLP"})
+        profiler.disable()
+
+    stats = pstats.Stats(profiler)
+    total = stats.total_tt  # type: ignore
+    entries = stats.stats.items()  # type: ignore
+    parse_time = sum(
+        cumulative
+        for (filename, _, name), (_, _, _, cumulative, _) in entries
+        if filename == parser.__file__ and name == "parse"
+    )
+    print(
+        f"document_cache_size={document_cache_size:<4} "
+        f"{total / CALLS * 1e6:8.1f} us/call, "
+        f"parse {parse_time / CALLS * 1e6:6.1f} us/call "
+        f"({parse_time / total:5.1%})"
+    )
+
+
+if __name__ == "__main__":
+    with StandInServer(graphql_handler) as server:
+        profile(server.url, document_cache_size=0)
+        profile(server.url, document_cache_size=128)
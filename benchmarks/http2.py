@@ -0,0 +1,71 @@
+"""
+Request rate of the HTTP transport shared by many threads, over HTTP/1.1 with
+a pool of 8 connections and over HTTP/2 multiplexed on a single connection,
+against local stand-in servers with the same round-trip. Requires httpx[http2].
+
+Run from the repository root with: python -m benchmarks.http2
+"""
+import concurrent.futures
+import time
+from typing import Optional
+
+from gql import gql
+
+from orionx_api_client import ConnectionPool
+from orionx_api_client.transports.http import OrionxHTTPTransport
+from tests.h2_server import H2StandInServer
+from tests.server import StandInServer
+
+QUERY = gql(
+    """
+    query getOrderBook($marketCode: ID!) {
+        marketOrderBook(marketCode: $marketCode, limit: 50) {
+            spread
+        }
+    }
+    """
+)
+
+THREADS = 32
+REQUESTS = 1000
+ROUND_TRIP = 0.05
+CONNECTIONS = 8
+
+
+def run(server: StandInServer, http2: bool) -> float:
+    pool = ConnectionPool(maxsize=CONNECTIONS, block=True)
+
+    with server:
+        transport = OrionxHTTPTransport(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            connection_pool=pool,
+            http2=http2,
+        )
+        transport.connect()
+
+        def send(i: int) -> Optional[dict]:
+            return transport.execute(QUERY, {"marketCode": f"M{i}"}).data
+
+        started_at = time.monotonic()
+        with concurrent.futures.ThreadPoolExecutor(THREADS) as executor:
+            list(executor.map(send, range(REQUESTS)))
+        elapsed = time.monotonic() - started_at
+
+        transport.close()
+
+    print(
+        f"{'HTTP/2' if http2 else 'HTTP/1.1':<9} {REQUESTS / elapsed:8.1f} requests/s  "
+        f"{pool.created} connections, {server.max_in_flight} requests in flight"
+    )
+    return REQUESTS / elapsed
+
+
+if __name__ == "__main__":
+    print(
+        f"{REQUESTS} requests from {THREADS} threads, "
+        f"{ROUND_TRIP * 1000:.0f} ms round-trip, at most {CONNECTIONS} connections"
+    )
+    run(StandInServer(delay=ROUND_TRIP), http2=False)
+    run(H2StandInServer(delay=ROUND_TRIP), http2=True)
@@ -0,0 +1,87 @@
+"""
+Memory held by 100 decoded marketOrderBook answers (50 levels per side) as
+nested dicts and as OrderBook arrays, and the time to compute the best bid and
+ask, cumulative depth, VWAP and imbalance of each one. "decode" includes
+json.loads.
+
+Run from the repository root with: python -m benchmarks.order_book
+"""
+import itertools
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from orionx_api_client.order_book import OrderBook, numpy
+from tests.server import order_book
+
+MARKETS = 100
+ROUNDS = 20
+SIZE = 10.0
+
+RESPONSE = json.dumps(
+    {f"M{i}": order_book(f"M{i}", limit=50) for i in range(MARKETS)}
+).encode()
+
+
+def dict_vwap(levels: List[Dict[str, float]], size: float) -> Optional[float]:
+    cost = 0.0
+    remaining = size
+    for level in levels:
+        filled = min(level["amount"], remaining)
+        cost += level["limitPrice"] * filled
+        remaining -= filled
+        if remaining <= 0:
+            return cost / size
+    return None
+
+
+def dict_metrics(book: Dict[str, Any]) -> None:
+    buy, sell = book["buy"], book["sell"]
+    max(level["limitPrice"] for level in buy)
+    min(level["limitPrice"] for level in sell)
+    list(itertools.accumulate(level["amount"] for level in buy))
+    dict_vwap(sell, SIZE)
+    bids = sum(level["amount"] for level in buy)
+    asks = sum(level["amount"] for level in sell)
+    (bids - asks) / (bids + asks)
+
+
+def book_metrics(book: OrderBook) -> None:
+    book.best_bid
+    book.best_ask
+    book.depth(OrderBook.BUY)
+    book.vwap(SIZE)
+    book.imbalance()
+
+
+def measure(name: str, decode: Callable[[Any], Any], metrics: Callable) -> None:
+    tracemalloc.start()
+    books = [decode(book) for book in json.loads(RESPONSE).values()]
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started_at = time.perf_counter()
+    for _ in range(ROUNDS):
+        for book in books:
+            metrics(book)
+    elapsed = (time.perf_counter() - started_at) / ROUNDS / MARKETS
+
+    started_at = time.perf_counter()
+    for _ in range(ROUNDS):
+        for book in json.loads(RESPONSE).values():
+            decode(book)
+    decoding = (time.perf_counter() - started_at) / ROUNDS / MARKETS
+
+    print(
+        f"{name:<6} {held / MARKETS / 1024:6.1f} KiB per book  "
+        f"metrics {elapsed * 1e6:6.1f} us  decode {decoding * 1e6:6.1f} us"
+    )
+
+
+if __name__ == "__main__":
+    print(f"{MARKETS} order books of 50 levels per side")
+    measure("dict", lambda book: book, dict_metrics)
+    if numpy is not None:
+        measure("numpy", lambda book: OrderBook.decode(book, True), book_metrics)
+    measure("array", lambda book: OrderBook.decode(book, False), book_metrics)
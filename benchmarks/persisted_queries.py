@@ -0,0 +1,94 @@
+"""
+Request bytes and time spent encoding and signing batched marketOrderBook
+queries (30 markets), with the query text in every payload and with Automatic
+Persisted Queries sending its hash instead.
+
+Run from the repository root with: python -m benchmarks.persisted_queries
+"""
+import statistics
+import time
+from typing import List, Optional
+
+from gql import gql
+
+from orionx_api_client import BatchPolicy, PersistedQueries
+from orionx_api_client.transports.batch import OrionxBatchTransport
+from tests.server import StandInServer
+
+QUERY = gql(
+    """
+    query getOrderBook($marketCode: ID!) {
+        marketOrderBook(marketCode: $marketCode, limit: 50) {
+            buy {
+                limitPrice
+                amount
+            }
+            sell {
+                limitPrice
+                amount
+            }
+            spread
+            mid
+        }
+    }
+    """
+)
+
+MARKETS = 30
+ROUNDS = 200
+
+
+class TimedSigning:
+    """Wraps HeadersBuilder.build_for_body, timing the signature."""
+
+    def __init__(self, build_for_body) -> None:
+        self.build_for_body = build_for_body
+        self.elapsed = 0.0
+
+    def __call__(self, body: bytes):
+        started_at = time.perf_counter()
+        try:
+            return self.build_for_body(body)
+        finally:
+            self.elapsed += time.perf_counter() - started_at
+
+
+def run(name: str, persisted_queries: Optional[PersistedQueries]) -> None:
+    with StandInServer() as server:
+        server.persisted_queries = {}
+        transport = OrionxBatchTransport(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            batch_policy=BatchPolicy(max_batch_size=MARKETS, adaptive=False),
+            persisted_queries=persisted_queries,
+        )
+        signing = TimedSigning(transport.headers_builder.build_for_body)
+        transport.headers_builder.build_for_body = signing  # type: ignore
+        transport.connect()
+
+        latencies: List[float] = []
+        for _ in range(ROUNDS):
+            started_at = time.monotonic()
+            results = [
+                transport.execute(QUERY, {"marketCode": f"M{i}"})
+                for i in range(MARKETS)
+            ]
+            for result in results:
+                result.future.result()
+            latencies.append(time.monotonic() - started_at)
+
+        transport.close()
+
+    sizes = [request["wire_size"] for request in server.requests]
+    print(
+        f"{name:<10} {statistics.median(sizes) / 1024:5.2f} KiB per batch  "
+        f"signing {signing.elapsed / len(sizes) * 1e6:6.1f} us  "
+        f"latency {statistics.median(latencies) * 1000:6.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    print(f"{MARKETS} order book queries per batch, {ROUNDS} batches")
+    run("full text", None)
+    run("persisted", PersistedQueries())
@@ -0,0 +1,64 @@
+"""
+Time per call of the same order book query built with the DSL, given as a
+string, and prepared once with session.prepare(), against a local server
+answering with a fixed response so the client side dominates.
+
+Run from the repository root with: python -m benchmarks.prepared_queries
+"""
+import time
+from typing import Callable
+
+from orionx_api_client import Orionx
+from tests.server import StandInServer, graphql_handler
+
+CALLS = 500
+
+
+def measure(name: str, call: Callable[[int], object]) -> None:
+    call(0)
+    started_at = time.perf_counter()
+    for i in range(CALLS):
+        call(i)
+    elapsed = time.perf_counter() - started_at
+    print(f"{name:<9} {elapsed / CALLS * 1e6:8.1f} us/call")
+
+
+def main(server: StandInServer) -> None:
+    with Orionx("api_key", "secret_key", url=server.url) as session:
+
+        def order_book(market_code: str):
+            ds = session.dsl()
+            return ds.Query.marketOrderBook.args(
+                marketCode=market_code, limit=50
+            ).select(
+                ds.MarketOrderBook.buy.select(
+                    ds.MarketBookOrder.limitPrice, ds.MarketBookOrder.amount
+                ),
+                ds.MarketOrderBook.spread,
+            )
+
+        query = """
+            query getOrderBook($marketCode: ID!) {
+                marketOrderBook(marketCode: $marketCode, limit: 50) {
+                    buy {
+                        limitPrice
+                        amount
+                    }
+                    spread
+                }
+            }
+        """
+        prepared = session.prepare(query)
+        server.raw_response = b'{"data": {"marketOrderBook": {"buy": [], "spread": 1}}}'
+
+        measure("dsl", lambda i: session.execute(order_book(f"M{i % 30}")))
+        measure(
+            "string",
+            lambda i: session.execute(query, {"marketCode": f"M{i % 30}"}),
+        )
+        measure("prepared", lambda i: prepared({"marketCode": f"M{i % 30}"}))
+
+
+if __name__ == "__main__":
+    with StandInServer(graphql_handler) as server:
+        main(server)
@@ -0,0 +1,68 @@
+"""
+Latency and response size of batches of 30 marketOrderBook queries sent as a
+JSON array of operations and merged into one operation with aliased fields,
+against a local server executing them with graphql-core.
+
+Run from the repository root with: python -m benchmarks.query_merging
+"""
+import statistics
+import time
+from typing import List
+
+from gql import gql
+
+from orionx_api_client import BatchPolicy
+from orionx_api_client.transports.batch import OrionxBatchTransport
+from tests.server import StandInServer, graphql_handler
+
+QUERY = gql(
+    """
+    query getOrderBook($marketCode: ID!) {
+        marketOrderBook(marketCode: $marketCode, limit: 10) {
+            spread
+            mid
+        }
+    }
+    """
+)
+
+MARKETS = 30
+ROUNDS = 100
+
+
+def run(name: str, merge_queries: bool) -> None:
+    with StandInServer(graphql_handler) as server:
+        transport = OrionxBatchTransport(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            batch_policy=BatchPolicy(max_batch_size=MARKETS, adaptive=False),
+            merge_queries=merge_queries,
+        )
+        transport.connect()
+
+        latencies: List[float] = []
+        for _ in range(ROUNDS):
+            started_at = time.monotonic()
+            results = [
+                transport.execute(QUERY, {"marketCode": f"M{i}"})
+                for i in range(MARKETS)
+            ]
+            for result in results:
+                result.future.result()
+            latencies.append(time.monotonic() - started_at)
+
+        response_size = int(transport.response_headers["Content-Length"])
+        transport.close()
+
+    print(
+        f"{name:<7} latency {statistics.median(latencies) * 1000:6.2f} ms  "
+        f"request {statistics.median(r['wire_size'] for r in server.requests):5.0f} B  "
+        f"response {response_size:5d} B"
+    )
+
+
+if __name__ == "__main__":
+    print(f"{MARKETS} order book queries per batch, {ROUNDS} batches")
+    run("array", False)
+    run("merged", True)
@@ -0,0 +1,44 @@
+"""
+Cold-start time to the first result, with and without the schema cache,
+against a local stand-in server with a 50 ms round-trip.
+
+Run from the repository root with: python -m benchmarks.schema_cache
+"""
+import os
+import tempfile
+import time
+
+from orionx_api_client import Orionx, SchemaCache
+from tests.server import StandInServer, graphql_handler
+
+QUERY = """
+    query getMarket($code: ID) {
+        market(code: $code) {
+            code
+        }
+    }
+"""
+
+ROUNDS = 10
+
+
+def first_result(url: str, schema_cache: SchemaCache = None) -> float:
+    started_at = time.monotonic()
+    client = Orionx("api_key", "secret_key", url=url, schema_cache=schema_cache)
+    with client as session:
+        session.execute(QUERY, variable_values={"code": "BTCCLP"})
+        elapsed = time.monotonic() - started_at
+    return elapsed
+
+
+if __name__ == "__main__":
+    with StandInServer(graphql_handler, delay=0.05) as server:
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SchemaCache(os.path.join(directory, "schema.json"))
+            first_result(server.url, cache)
+
+            for name, schema_cache in (("introspection", None), ("cached", cache)):
+                elapsed = sum(
+                    first_result(server.url, schema_cache) for _ in range(ROUNDS)
+                )
+                print(f"{name:<14} {elapsed / ROUNDS * 1000:7.1f} ms to first result")
@@ -0,0 +1,75 @@
+"""
+Order books for 1,000 variable sets fetched with a loop of session.execute
+and with session.map, batched and unbatched, against a local server with a
+5 ms round-trip. "submit" is the time to hand every query over, "total" the
+time until every result is read.
+
+Run from the repository root with: python -m benchmarks.session_map
+"""
+import time
+from typing import Any, Dict, Iterable, List
+
+from orionx_api_client import BatchPolicy, Orionx, as_completed
+from tests.server import StandInServer, graphql_handler
+
+QUERY = """
+    query getOrderBook($marketCode: ID!) {
+        marketOrderBook(marketCode: $marketCode, limit: 50) {
+            spread
+        }
+    }
+"""
+
+VARIABLE_SETS = [{"marketCode": f"M{i}"} for i in range(1000)]
+ROUND_TRIP = 0.005
+
+
+def loop(session: Any, batching: bool) -> Iterable[Any]:
+    if batching:
+        return as_completed(
+            [
+                session.execute(QUERY, variable_values=variables)
+                for variables in VARIABLE_SETS
+            ]
+        )
+    return [
+        session.execute(QUERY, variable_values=variables) for variables in VARIABLE_SETS
+    ]
+
+
+def run(name: str, batching: bool, use_map: bool) -> None:
+    with StandInServer(graphql_handler, delay=ROUND_TRIP) as server:
+        client = Orionx(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            batching=batching,
+            batch_policy=BatchPolicy(max_batch_size=100),
+            max_in_flight=4,
+        )
+        with client as session:
+            started_at = time.perf_counter()
+            if use_map:
+                results = session.map(QUERY, VARIABLE_SETS)
+            else:
+                results = loop(session, batching)
+            submitted_at = time.perf_counter()
+
+            answers: List[Dict[str, Any]] = []
+            for result in results:
+                answers.append(result if isinstance(result, dict) else result.data)
+            finished_at = time.perf_counter()
+
+    assert len(answers) == len(VARIABLE_SETS)
+    print(
+        f"{name:<22} submit {(submitted_at - started_at) * 1000:7.1f} ms  "
+        f"total {(finished_at - started_at) * 1000:7.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    print(f"{len(VARIABLE_SETS)} variable sets, {ROUND_TRIP * 1000:.0f} ms round-trip")
+    run("batched execute loop", batching=True, use_map=False)
+    run("batched map", batching=True, use_map=True)
+    run("unbatched execute loop", batching=False, use_map=False)
+    run("unbatched map", batching=False, use_map=True)
@@ -1,3 +1,66 @@
-from .client import Orionx, as_completed
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
-__all__ = ["Orionx", "as_completed"]
+if TYPE_CHECKING:
+    from .async_client import AsyncOrionx
+    from .client import Orionx, PreparedQuery, as_completed
+    from .order_book import OrderBook
+    from .response_cache import ResponseCache
+    from .schema_cache import SchemaCache
+    from .transports.backpressure import BatchQueue
+    from .transports.builders.persisted import PersistedQueries
+    from .transports.compression import Compression
+    from .transports.policy import BatchPolicy
+    from .transports.pool import ConnectionPool
+    from .transports.rate_limit import RateLimiter
+    from .transports.retry import RetryPolicy
+
+__all__ = [
+    "Orionx",
+    "as_completed",
+    "PreparedQuery",
+    "AsyncOrionx",
+    "BatchPolicy",
+    "BatchQueue",
+    "SchemaCache",
+    "ResponseCache",
+    "RateLimiter",
+    "RetryPolicy",
+    "ConnectionPool",
+    "Compression",
+    "PersistedQueries",
+    "OrderBook",
+]
+
+# gql, graphql and requests are only imported when these are first used
+_lazy_attributes = {
+    "Orionx": ".client",
+    "as_completed": ".client",
+    "PreparedQuery": ".client",
+    "BatchPolicy": ".transports.policy",
+    "BatchQueue": ".transports.backpressure",
+    "RateLimiter": ".transports.rate_limit",
+    "RetryPolicy": ".transports.retry",
+    "ConnectionPool": ".transports.pool",
+    "Compression": ".transports.compression",
+    "PersistedQueries": ".transports.builders.persisted",
+    "SchemaCache": ".schema_cache",
+    "ResponseCache": ".response_cache",
+    "AsyncOrionx": ".async_client",
+    "OrderBook": ".order_book",
+}
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module_name = _lazy_attributes[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_lazy_attributes))
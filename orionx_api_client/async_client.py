@@ -0,0 +1,126 @@
+import typing
+from typing import Any, Dict, Optional, Union
+
+from gql import Client
+from gql.client import AsyncClientSession
+from gql.dsl import DSLField, DSLQuery, DSLSchema, dsl_gql
+from graphql import ExecutionResult
+
+from .cache import DocumentCache
+from .codecs import JSONCodec
+from .constants import Constants
+from .transports.aiohttp import OrionxAIOHTTPTransport
+from .transports.async_batch import OrionxAsyncBatchTransport
+from .transports.compression import Compression
+from .transports.policy import BatchPolicy
+from .transports.pool import ConnectionPool
+
+
+class AsyncClientSessionDecorator:
+    def __init__(
+        self,
+        session: AsyncClientSession,
+        batching: bool = False,
+        document_cache: Optional[DocumentCache] = None,
+    ) -> None:
+        self.session = session
+        self.batching = batching
+        if document_cache is None:
+            document_cache = DocumentCache(maxsize=0)
+        self.document_cache = document_cache
+        self._dsl_schema: Optional[DSLSchema] = None
+
+    def dsl(self) -> DSLSchema:
+        schema = self.session.client.schema
+        assert schema is not None
+        if self._dsl_schema is None or self._dsl_schema._schema is not schema:
+            self._dsl_schema = DSLSchema(schema)
+        return self._dsl_schema
+
+    def validate(self, query: DSLField) -> None:
+        document = dsl_gql(DSLQuery(query))
+        return self.session.client.validate(document)
+
+    async def execute(
+        self,
+        query: Union[DSLField, str],
+        variable_values: Optional[Dict[str, Any]] = None,
+        operation_name: Optional[str] = None,
+        **kwargs: Any,
+    ) -> Union[Dict[str, Any], ExecutionResult]:
+        if isinstance(query, str):
+            document = self.document_cache.get(query)
+        else:
+            document = dsl_gql(DSLQuery(query))
+
+        if self.batching:
+            return await self.session._execute(
+                document, variable_values, operation_name, **kwargs
+            )
+        else:
+            return await self.session.execute(
+                document, variable_values, operation_name, **kwargs
+            )
+
+
+class AsyncOrionx:
+    def __init__(
+        self,
+        api_key: str,
+        secret_key: str,
+        url: Optional[str] = None,
+        batching: bool = False,
+        timeout: Optional[int] = None,
+        batch_policy: Optional[BatchPolicy] = None,
+        max_in_flight: int = 1,
+        document_cache_size: int = 128,
+        codec: Optional[JSONCodec] = None,
+        deduplicate: bool = True,
+        connection_pool: Optional[ConnectionPool] = None,
+        compression: Optional[Compression] = None,
+        **kwargs: Any,
+    ) -> None:
+        transport_kwargs: Dict[str, Any] = {
+            "codec": codec,
+            "connection_pool": connection_pool,
+            "compression": compression,
+        }
+
+        if batching:
+            TransportKlass = OrionxAsyncBatchTransport
+            transport_kwargs["batch_policy"] = batch_policy
+            transport_kwargs["max_in_flight"] = max_in_flight
+            transport_kwargs["deduplicate"] = deduplicate
+        elif batch_policy is not None or max_in_flight != 1 or not deduplicate:
+            raise ValueError(
+                "batch_policy, max_in_flight and deduplicate only apply "
+                "with batching=True"
+            )
+        else:
+            TransportKlass = OrionxAIOHTTPTransport
+
+        self.batching = batching
+        self.document_cache = DocumentCache(maxsize=document_cache_size)
+
+        transport = TransportKlass(
+            api_key,
+            secret_key,
+            url=url or Constants.API_URL_V2,
+            timeout=timeout,
+            **transport_kwargs,
+        )
+        self.client = Client(
+            transport=transport,
+            fetch_schema_from_transport=True,
+            **kwargs,
+        )
+
+    async def __aenter__(self):
+        return AsyncClientSessionDecorator(
+            typing.cast(AsyncClientSession, await self.client.connect_async()),
+            batching=self.batching,
+            document_cache=self.document_cache,
+        )
+
+    async def __aexit__(self, *args):
+        await self.client.close_async()
@@ -0,0 +1,52 @@
+import threading
+from collections import OrderedDict
+
+from gql import gql
+from graphql import DocumentNode
+
+
+class DocumentCache:
+    """
+    Bounded LRU cache of parsed GraphQL documents keyed by query text.
+
+    Cached documents are shared between callers and must not be mutated.
+    A `maxsize` of 0 disables caching.
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        assert maxsize >= 0
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._documents: "OrderedDict[str, DocumentNode]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def get(self, query: str) -> DocumentNode:
+        with self._lock:
+            document = self._documents.get(query)
+            if document is not None:
+                self._documents.move_to_end(query)
+                self.hits += 1
+                return document
+            self.misses += 1
+
+        # parse outside of the lock, a concurrent miss just parses twice
+        document = gql(query)
+
+        if self.maxsize:
+            with self._lock:
+                self._documents[query] = document
+                self._documents.move_to_end(query)
+                while len(self._documents) > self.maxsize:
+                    self._documents.popitem(last=False)
+
+        return document
+
+    def clear(self) -> None:
+        with self._lock:
+            self._documents.clear()
+            self.hits = 0
+            self.misses = 0
@@ -1,27 +1,111 @@
 import concurrent.futures
+import logging
+import threading
+import time
 import typing
-from typing import Any, Dict, Iterable, Iterator, Optional, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
 
-from gql import Client, gql
+from gql import Client
 from gql.client import SyncClientSession
 from gql.dsl import DSLField, DSLQuery, DSLSchema, dsl_gql
-from graphql import ExecutionResult
+from gql.transport.exceptions import TransportQueryError
+from gql.utilities import parse_result, serialize_variable_values
+from graphql import (
+    DocumentNode,
+    ExecutionResult,
+    GraphQLSchema,
+    get_introspection_query,
+    parse,
+)
+from requests.adapters import DEFAULT_POOLSIZE
 
+from .cache import DocumentCache
+from .codecs import JSONCodec
 from .constants import Constants
-from .transports.batch import FutureExecResult, OrionxBatchTransport
+from .response_cache import ResponseCache
+from .schema_cache import CachedSchema, SchemaCache
+from .transports.backpressure import BatchQueue
+from .transports.batch import (
+    DeadlineExceeded,
+    FutureExecResult,
+    OrionxBatchTransport,
+    resolve,
+)
+from .transports.builders.payload import PayloadBuilder
+from .transports.builders.persisted import PersistedQueries
+from .transports.compression import Compression
 from .transports.http import OrionxHTTPTransport
+from .transports.policy import BatchPolicy
+from .transports.pool import ConnectionPool
+from .transports.rate_limit import RateLimiter
+from .transports.retry import RetryPolicy
+
+log = logging.getLogger(__name__)
+
+
+class PreparedQuery:
+    """
+    A query parsed, validated against the schema and printed once by
+    `session.prepare()`. Calling it with variables only serializes them,
+    then signs and sends the request, answering like `session.execute()`.
+    """
+
+    __slots__ = ("session", "document", "operation_name", "query")
+
+    def __init__(
+        self,
+        session: "SyncClientSessionDecorator",
+        document: DocumentNode,
+        operation_name: Optional[str] = None,
+    ) -> None:
+        self.session = session
+        self.document = document
+        self.operation_name = operation_name
+        # handed to the transports, which send it as is
+        self.query = PayloadBuilder.print_query(document)
+
+    def __call__(
+        self,
+        variable_values: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None,
+        **kwargs: Any,
+    ) -> Union[Dict[str, Any], ExecutionResult]:
+        return self.session._execute_prepared(self, variable_values, deadline, **kwargs)
 
 
 class SyncClientSessionDecorator:
-    def __init__(self, session: SyncClientSession, batching: bool = False) -> None:
+    def __init__(
+        self,
+        session: SyncClientSession,
+        batching: bool = False,
+        document_cache: Optional[DocumentCache] = None,
+        schema_future: Optional[concurrent.futures.Future] = None,
+    ) -> None:
         self.session = session
         self.batching = batching
+        if document_cache is None:
+            document_cache = DocumentCache(maxsize=0)
+        self.document_cache = document_cache
+        self.schema_future = schema_future
+        self._dsl_schema: Optional[DSLSchema] = None
 
-    def dsl(self) -> DSLSchema:
+    def wait_for_schema(self, timeout: Optional[float] = None) -> GraphQLSchema:
+        """Block until the schema loaded in the background is available."""
+        if self.schema_future is not None:
+            self.schema_future.result(timeout)
         assert self.session.client.schema is not None
-        return DSLSchema(self.session.client.schema)
+        return self.session.client.schema
+
+    def dsl(self) -> DSLSchema:
+        schema = self.wait_for_schema()
+        dsl_schema = self._dsl_schema
+        # built again only when a fresher schema replaced it
+        if dsl_schema is None or dsl_schema._schema is not schema:
+            dsl_schema = self._dsl_schema = DSLSchema(schema)
+        return dsl_schema
 
     def validate(self, query: DSLField) -> None:
+        self.wait_for_schema()
         document = dsl_gql(DSLQuery(query))
         return self.session.client.validate(document)
 
@@ -30,22 +114,213 @@ class SyncClientSessionDecorator:
         query: Union[DSLField, str],
         variable_values: Optional[Dict[str, Any]] = None,
         operation_name: Optional[str] = None,
+        deadline: Optional[float] = None,
         **kwargs: Any,
     ) -> Union[Dict[str, Any], ExecutionResult]:
-        if isinstance(query, str):
-            document = gql(query)
-        else:
-            document = dsl_gql(DSLQuery(query))
+        """
+        `deadline` is a time.monotonic() value after which the result is no
+        longer wanted. Batched queries fail with DeadlineExceeded instead of
+        being sent or waited for past it; otherwise it bounds the HTTP timeout.
+        """
+        document = self._document(query)
 
         if self.batching:
             return self.session._execute(
-                document, variable_values, operation_name, **kwargs
+                document, variable_values, operation_name, deadline=deadline, **kwargs
+            )
+
+        self._set_timeout(deadline, kwargs)
+        return self.session.execute(document, variable_values, operation_name, **kwargs)
+
+    def prepare(
+        self, query: Union[DSLField, str], operation_name: Optional[str] = None
+    ) -> PreparedQuery:
+        """
+        Parse, validate and print `query` once, for queries executed over and
+        over with different variables. Waits for the schema to validate it.
+        """
+        self.wait_for_schema()
+        document = self._document(query)
+        self.session.client.validate(document)
+        return PreparedQuery(self, document, operation_name)
+
+    def map(
+        self,
+        query: Union[DSLField, str, PreparedQuery],
+        variable_sets: Iterable[Optional[Dict[str, Any]]],
+        operation_name: Optional[str] = None,
+        ordered: bool = False,
+        deadline: Optional[float] = None,
+        max_workers: Optional[int] = None,
+    ) -> Iterator[FutureExecResult]:
+        """
+        Execute `query` once per variable set, sharing one parsed, validated
+        and printed document. Batched sessions queue them all at once, others
+        send them from `max_workers` threads, as many as pooled connections
+        by default.
+
+        Yields the results as they complete, or in the order of
+        `variable_sets` when `ordered`. As with batching, their errors are
+        in `errors` instead of being raised.
+        """
+        if not isinstance(query, PreparedQuery):
+            document = self._document(query)
+            if self.session.client.schema is not None:
+                self.session.client.validate(document)
+            query = PreparedQuery(self, document, operation_name)
+
+        variable_sets = [
+            self._serialize_variables(query, variable_values)
+            for variable_values in variable_sets
+        ]
+
+        if self.batching:
+            results = self.session.transport.execute_many(  # type: ignore
+                query.document,
+                variable_sets,
+                query.operation_name,
+                deadline,
+                query_str=query.query,
+            )
+        else:
+            results = self._fan_out(query, variable_sets, deadline, max_workers)
+
+        if ordered:
+            return (done for result in results for done in as_completed([result]))
+        return as_completed(results)
+
+    def _fan_out(
+        self,
+        prepared: PreparedQuery,
+        variable_sets: List[Optional[Dict[str, Any]]],
+        deadline: Optional[float] = None,
+        max_workers: Optional[int] = None,
+    ) -> List[FutureExecResult]:
+        if max_workers is None:
+            pool = self.session.transport.connection_pool  # type: ignore
+            max_workers = pool.maxsize if pool is not None else DEFAULT_POOLSIZE
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(variable_sets))),
+            thread_name_prefix="orionx-map",
+        )
+
+        results = []
+        for variable_values in variable_sets:
+            future: concurrent.futures.Future = concurrent.futures.Future()
+            future.set_running_or_notify_cancel()
+            executor.submit(self._send, future, prepared, variable_values, deadline)
+            results.append(FutureExecResult(future, deadline))
+
+        # the threads exit once every query is sent
+        executor.shutdown(wait=False)
+        return results
+
+    def _send(
+        self,
+        future: concurrent.futures.Future,
+        prepared: PreparedQuery,
+        variable_values: Optional[Dict[str, Any]],
+        deadline: Optional[float] = None,
+    ) -> None:
+        if future.done():
+            # expired while waiting for a thread
+            return
+
+        kwargs: Dict[str, Any] = {}
+        try:
+            self._set_timeout(deadline, kwargs)
+            result = self.session.transport.execute(
+                prepared.document,
+                variable_values,
+                prepared.operation_name,
+                query_str=prepared.query,
+                **kwargs,
             )
+        except Exception as exc:
+            resolve(future, exc=exc)
         else:
-            return self.session.execute(
-                document, variable_values, operation_name, **kwargs
+            resolve(
+                future,
+                {
+                    "data": result.data,
+                    "errors": result.errors,
+                    "extensions": result.extensions,
+                },
+            )
+
+    def _serialize_variables(
+        self, prepared: PreparedQuery, variable_values: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        client = self.session.client
+        if variable_values is None or not client.serialize_variables:
+            return variable_values
+        assert client.schema is not None
+        return serialize_variable_values(
+            client.schema, prepared.document, variable_values, prepared.operation_name
+        )
+
+    def _document(self, query: Union[DSLField, str]) -> DocumentNode:
+        if isinstance(query, str):
+            return self.document_cache.get(query)
+        return dsl_gql(DSLQuery(query))
+
+    @staticmethod
+    def _set_timeout(deadline: Optional[float], kwargs: Dict[str, Any]) -> None:
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded("Request deadline exceeded")
+            kwargs.setdefault("timeout", remaining)
+
+    def _execute_prepared(
+        self,
+        prepared: PreparedQuery,
+        variable_values: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None,
+        get_execution_result: bool = False,
+        **kwargs: Any,
+    ) -> Union[Dict[str, Any], ExecutionResult]:
+        # what session.execute() does, short of validating the document again
+        client = self.session.client
+        document, operation_name = prepared.document, prepared.operation_name
+        variable_values = self._serialize_variables(prepared, variable_values)
+
+        transport = self.session.transport
+        if self.batching:
+            return transport.execute(  # type: ignore
+                document,
+                variable_values,
+                operation_name,
+                deadline=deadline,
+                query_str=prepared.query,
+                **kwargs,
+            )
+
+        self._set_timeout(deadline, kwargs)
+        result = transport.execute(
+            document,
+            variable_values,
+            operation_name,
+            query_str=prepared.query,
+            **kwargs,
+        )
+        if result.errors:
+            raise TransportQueryError(
+                str(result.errors[0]),
+                errors=result.errors,
+                data=result.data,
+                extensions=result.extensions,
+            )
+
+        if client.parse_results and client.schema is not None:
+            result.data = parse_result(
+                client.schema, document, result.data, operation_name
             )
 
+        if get_execution_result:
+            return result
+        return result.data
+
 
 class Orionx:
     def __init__(
@@ -55,34 +330,138 @@ class Orionx:
         url: Optional[str] = None,
         batching: bool = False,
         timeout: Optional[int] = None,
+        batch_policy: Optional[BatchPolicy] = None,
+        max_in_flight: int = 1,
+        document_cache_size: int = 128,
+        codec: Optional[JSONCodec] = None,
+        schema_cache: Optional[SchemaCache] = None,
+        background_schema: bool = False,
+        deduplicate: bool = True,
+        response_cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        batch_queue: Optional[BatchQueue] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        connection_pool: Optional[ConnectionPool] = None,
+        http2: bool = False,
+        compression: Optional[Compression] = None,
+        persisted_queries: Optional[PersistedQueries] = None,
+        merge_queries: bool = False,
         **kwargs: Any,
     ) -> None:
+        transport_kwargs: Dict[str, Any] = {
+            "codec": codec,
+            "response_cache": response_cache,
+            "rate_limiter": rate_limiter,
+            "connection_pool": connection_pool,
+            "http2": http2,
+            "compression": compression,
+            "persisted_queries": persisted_queries,
+        }
+
         if batching:
             TransportKlass = OrionxBatchTransport
+            transport_kwargs["batch_policy"] = batch_policy
+            transport_kwargs["max_in_flight"] = max_in_flight
+            transport_kwargs["deduplicate"] = deduplicate
+            transport_kwargs["batch_queue"] = batch_queue
+            transport_kwargs["retry_policy"] = retry_policy
+            transport_kwargs["merge_queries"] = merge_queries
         else:
             TransportKlass = OrionxHTTPTransport
 
         self.batching = batching
+        self.document_cache = DocumentCache(maxsize=document_cache_size)
+        self.url = url or Constants.API_URL_V2
+
+        self.schema_cache = schema_cache
+        self.background_schema = background_schema
+        self.cached_schema: Optional[CachedSchema] = None
+        if schema_cache is not None:
+            self.cached_schema = schema_cache.load(self.url)
 
         transport = TransportKlass(
             api_key,
             secret_key,
-            url=url or Constants.API_URL_V2,
-            use_json=True,
+            url=self.url,
             timeout=timeout,
+            **transport_kwargs,
         )
         self.client = Client(
             transport=transport,
-            fetch_schema_from_transport=True,
+            introspection=(
+                self.cached_schema.introspection if self.cached_schema else None
+            ),
+            fetch_schema_from_transport=(
+                self.cached_schema is None and not background_schema
+            ),
             **kwargs,
         )
 
     def __enter__(self):
+        session = typing.cast(SyncClientSession, self.client.connect_sync())
+        schema_future: concurrent.futures.Future = concurrent.futures.Future()
+
+        if self.client.schema is None:
+            # background_schema: queries flow while the schema is fetched
+            self._start_schema_fetch(session, schema_future)
+        else:
+            schema_future.set_result(self.client.schema)
+
+            if self.schema_cache is not None:
+                if self.cached_schema is None:
+                    self._store_schema()
+                elif not self.schema_cache.is_fresh(self.cached_schema):
+                    self._start_schema_fetch(session, schema_future)
+
         return SyncClientSessionDecorator(
-            typing.cast(SyncClientSession, self.client.connect_sync()),
+            session,
             batching=self.batching,
+            document_cache=self.document_cache,
+            schema_future=schema_future,
         )
 
+    def _start_schema_fetch(
+        self, session: SyncClientSession, schema_future: concurrent.futures.Future
+    ) -> None:
+        threading.Thread(
+            target=self._fetch_schema, args=(session, schema_future), daemon=True
+        ).start()
+
+    def _store_schema(self) -> None:
+        assert self.schema_cache is not None
+        assert self.client.introspection is not None
+
+        try:
+            self.cached_schema = self.schema_cache.store(
+                self.url, self.client.introspection
+            )
+        except OSError as e:
+            log.warning("Could not store the schema cache: %s", e)
+
+    def _fetch_schema(
+        self, session: SyncClientSession, schema_future: concurrent.futures.Future
+    ) -> None:
+        try:
+            transport = self.client.transport
+            if isinstance(transport, OrionxBatchTransport):
+                # don't hold a batch sender for the whole introspection
+                self.client._build_schema_from_introspection(
+                    transport.execute_unbatched(parse(get_introspection_query()))
+                )
+            else:
+                session.fetch_schema()
+        except Exception as e:
+            log.warning("Could not fetch the schema: %s", e)
+            if not schema_future.done():
+                schema_future.set_exception(e)
+            return
+
+        if self.schema_cache is not None:
+            self._store_schema()
+
+        if not schema_future.done():
+            schema_future.set_result(self.client.schema)
+
     def __exit__(self, *args):
         self.client.close_sync()
 
@@ -91,7 +470,34 @@ def as_completed(
     exec_results: Iterable[FutureExecResult],
     timeout: Optional[float] = None,
 ) -> Iterator[FutureExecResult]:
-    future_to_exres = {e.future: e for e in exec_results}
-    for future in concurrent.futures.as_completed(future_to_exres, timeout):
-        exec_result = future_to_exres[future]
-        yield exec_result
+    """
+    Yield results as they complete. A result still pending at its deadline is
+    expired, so it is yielded then and raises DeadlineExceeded when read.
+    """
+    pending = {e.future: e for e in exec_results}
+    end_time = time.monotonic() + timeout if timeout is not None else None
+
+    while pending:
+        now = time.monotonic()
+        for exec_result in pending.values():
+            if exec_result.deadline is not None and exec_result.deadline <= now:
+                exec_result.expire()
+
+        wait_until = min(
+            (e.deadline for e in pending.values() if e.deadline is not None),
+            default=None,
+        )
+        if end_time is not None:
+            if end_time <= now:
+                raise concurrent.futures.TimeoutError(
+                    f"{len(pending)} futures unfinished"
+                )
+            wait_until = end_time if wait_until is None else min(wait_until, end_time)
+
+        done, _ = concurrent.futures.wait(
+            pending,
+            None if wait_until is None else max(0.0, wait_until - now),
+            return_when=concurrent.futures.FIRST_COMPLETED,
+        )
+        for future in done:
+            yield pending.pop(future)
@@ -0,0 +1,49 @@
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+
+class JSONCodec:
+    """
+    Encodes request bodies and decodes responses with the stdlib json module.
+
+    The output is compact UTF-8. It can differ from orjson's for some floats
+    (`1e-05` for `0.00001`), NaN and infinities, which orjson sends as null,
+    and integers wider than 64 bits, which orjson rejects. Requests are
+    signed over the bytes actually sent, so either codec signs correctly.
+    """
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode(
+            "utf-8"
+        )
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise ImportError("OrjsonCodec requires the orjson package")
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+
+def default_codec() -> JSONCodec:
+    """orjson when it is installed, the stdlib json module otherwise."""
+    if orjson is not None:
+        return OrjsonCodec()
+    return JSONCodec()
@@ -0,0 +1,184 @@
+import array
+import itertools
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None  # type: ignore
+
+Levels = Union["numpy.ndarray", array.array]
+
+
+def _column(levels: Sequence[Dict[str, Any]], key: str, use_numpy: bool) -> Levels:
+    values = (level[key] for level in levels)
+    if use_numpy:
+        return numpy.fromiter(values, dtype=numpy.float64, count=len(levels))
+    return array.array("d", values)
+
+
+def _sort(prices: Levels, amounts: Levels, descending: bool) -> List[Levels]:
+    if isinstance(prices, array.array):
+        order = sorted(range(len(prices)), key=prices.__getitem__, reverse=descending)
+        if order == list(range(len(prices))):
+            return [prices, amounts]
+        return [
+            array.array("d", (column[i] for i in order)) for column in (prices, amounts)
+        ]
+
+    order = numpy.argsort(-prices if descending else prices, kind="stable")
+    return [prices[order], amounts[order]]
+
+
+def _total(values: Levels) -> float:
+    # summed left to right like `depth`, never pairwise or compensated, so
+    # both backends agree on whether a book is deep enough
+    if isinstance(values, array.array):
+        total = 0.0
+        for value in values:
+            total += value
+        return total
+    return float(numpy.cumsum(values)[-1]) if len(values) else 0.0
+
+
+class OrderBook:
+    """
+    A marketOrderBook answer held in contiguous float64 arrays, NumPy ones
+    when it is installed and `array.array` otherwise, instead of a dict per
+    level. Bids are sorted from the highest price and asks from the lowest.
+
+    The answer must select `limitPrice` and `amount` for both `buy` and
+    `sell`; `spread` and `mid` are kept when selected.
+    """
+
+    __slots__ = (
+        "bid_prices",
+        "bid_amounts",
+        "ask_prices",
+        "ask_amounts",
+        "spread",
+        "mid",
+    )
+
+    BUY = "buy"
+    SELL = "sell"
+
+    def __init__(
+        self,
+        bid_prices: Levels,
+        bid_amounts: Levels,
+        ask_prices: Levels,
+        ask_amounts: Levels,
+        spread: Optional[float] = None,
+        mid: Optional[float] = None,
+    ) -> None:
+        self.bid_prices, self.bid_amounts = _sort(bid_prices, bid_amounts, True)
+        self.ask_prices, self.ask_amounts = _sort(ask_prices, ask_amounts, False)
+        self.spread = spread
+        self.mid = mid
+
+    @classmethod
+    def decode(
+        cls, order_book: Dict[str, Any], use_numpy: Optional[bool] = None
+    ) -> "OrderBook":
+        """
+        Build the order book of a marketOrderBook answer, with NumPy arrays
+        unless `use_numpy` is False or NumPy is not installed.
+        """
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        elif use_numpy and numpy is None:
+            raise ImportError("use_numpy requires the numpy package")
+
+        buy = order_book.get("buy") or ()
+        sell = order_book.get("sell") or ()
+        return cls(
+            _column(buy, "limitPrice", use_numpy),
+            _column(buy, "amount", use_numpy),
+            _column(sell, "limitPrice", use_numpy),
+            _column(sell, "amount", use_numpy),
+            order_book.get("spread"),
+            order_book.get("mid"),
+        )
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return float(self.bid_prices[0]) if len(self.bid_prices) else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return float(self.ask_prices[0]) if len(self.ask_prices) else None
+
+    def _side(self, side: str) -> List[Levels]:
+        assert side in (self.BUY, self.SELL)
+        if side == self.BUY:
+            return [self.bid_prices, self.bid_amounts]
+        return [self.ask_prices, self.ask_amounts]
+
+    def depth(self, side: str) -> Levels:
+        """Cumulative amount available up to each level of `side`."""
+        _, amounts = self._side(side)
+        if isinstance(amounts, array.array):
+            return array.array("d", itertools.accumulate(amounts))
+        return numpy.cumsum(amounts)
+
+    def vwap(self, size: float, side: str = BUY) -> Optional[float]:
+        """
+        Average price paid to buy `size` (walking the asks) or received to
+        sell it (walking the bids) with a market order, or None when the
+        book is not deep enough.
+        """
+        assert size > 0
+        prices, amounts = self._side(self.SELL if side == self.BUY else self.BUY)
+        if _total(amounts) < size:
+            return None
+
+        if isinstance(prices, array.array):
+            cost = 0.0
+            remaining = size
+            for price, amount in zip(prices, amounts):
+                filled = min(amount, remaining)
+                cost += price * filled
+                remaining -= filled
+                if remaining <= 0:
+                    break
+            return cost / size
+
+        # the last level reached is only partially filled
+        depth = numpy.cumsum(amounts)
+        last = int(numpy.searchsorted(depth, size))
+        filled = size - (depth[last - 1] if last else 0.0)
+        cost = numpy.dot(prices[:last], amounts[:last]) + prices[last] * filled
+        return float(cost / size)
+
+    def imbalance(self, levels: Optional[int] = None) -> Optional[float]:
+        """
+        (bid amount - ask amount) / (bid amount + ask amount) over the top
+        `levels` of each side, all of them by default: 1 when there are only
+        bids, -1 when there are only asks, None for an empty book.
+        """
+        bids = _total(self.bid_amounts[:levels])
+        asks = _total(self.ask_amounts[:levels])
+        if bids + asks == 0:
+            return None
+        return (bids - asks) / (bids + asks)
+
+    def __repr__(self) -> str:
+        return (
+            f"OrderBook(best_bid={self.best_bid}, best_ask={self.best_ask}, "
+            f"bids={len(self.bid_prices)}, asks={len(self.ask_prices)})"
+        )
+
+
+def decode_order_books(
+    data: Dict[str, Any], use_numpy: Optional[bool] = None
+) -> Dict[str, OrderBook]:
+    """
+    Decode every order book of a result's `data`, keyed by their field name
+    or alias, such as those of a query fetching several markets at once.
+    """
+    return {
+        key: OrderBook.decode(value, use_numpy)
+        for key, value in data.items()
+        if isinstance(value, dict) and ("buy" in value or "sell" in value)
+    }
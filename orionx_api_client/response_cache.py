@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional, Tuple
+
+from graphql import DocumentNode, FieldNode, OperationType, get_operation_ast
+
+from .codecs import JSONCodec, default_codec
+
+
+class CachedResponse:
+    __slots__ = ("result", "size", "expires_at", "stale_until", "refreshing")
+
+    def __init__(
+        self,
+        result: Dict[str, Any],
+        size: int,
+        expires_at: float,
+        stale_until: float,
+    ) -> None:
+        self.result = result
+        self.size = size
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.refreshing = False
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of query results with a time to live per operation.
+
+    `ttls` maps operation names or top-level field names to a time to live in
+    seconds. The operation name wins; otherwise a query lives as long as its
+    shortest-lived field. Queries with a field that has no rule use
+    `default_ttl`, and are not cached when it is None. Mutations are never
+    cached, and neither are results with errors.
+
+    For `stale_ttl` seconds after expiring, an entry is still returned while
+    the first reader refreshes it in the background.
+
+    Cached results are shared between callers and must not be mutated. A
+    cache may be shared by several clients, whose transports key their entries
+    by URL and API key as well.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Mapping[str, float]] = None,
+        default_ttl: Optional[float] = None,
+        stale_ttl: float = 0.0,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        codec: Optional[JSONCodec] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        assert stale_ttl >= 0
+        assert max_entries > 0
+        assert max_bytes is None or max_bytes > 0
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # only used to measure entries when max_bytes is set
+        self.codec = codec or default_codec()
+        self.clock = clock
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def ttl_for(
+        self, document: DocumentNode, operation_name: Optional[str] = None
+    ) -> Optional[float]:
+        """Time to live of a request, or None when it must not be cached."""
+        operation = get_operation_ast(document, operation_name)
+        if operation is None or operation.operation != OperationType.QUERY:
+            ttl = None
+        elif operation.name is not None and operation.name.value in self.ttls:
+            ttl = self.ttls[operation.name.value]
+        else:
+            ttl = self._fields_ttl(operation.selection_set.selections)
+
+        if ttl is None or ttl <= 0:
+            with self._lock:
+                self.bypassed += 1
+            return None
+
+        return ttl
+
+    def _fields_ttl(self, selections: Any) -> Optional[float]:
+        ttls = []
+        for selection in selections:
+            if isinstance(selection, FieldNode) and selection.name.value in self.ttls:
+                ttls.append(self.ttls[selection.name.value])
+            elif self.default_ttl is None:
+                return None
+            else:
+                ttls.append(self.default_ttl)
+
+        return min(ttls) if ttls else None
+
+    def get(self, key: Hashable) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Look up a result. Also tells whether the caller must refresh the
+        entry, which happens once for a stale entry until it is stored again
+        or released.
+        """
+        now = self.clock()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and now >= entry.stale_until:
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None, False
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            if now < entry.expires_at:
+                return entry.result, False
+
+            self.stale_hits += 1
+            refresh = not entry.refreshing
+            entry.refreshing = True
+            return entry.result, refresh
+
+    def store(self, key: Hashable, ttl: float, result: Dict[str, Any]) -> None:
+        if result.get("errors"):
+            self.release(key)
+            return
+
+        size = len(self.codec.dumps(result)) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.release(key)
+            return
+
+        now = self.clock()
+        entry = CachedResponse(result, size, now + ttl, now + ttl + self.stale_ttl)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self.nbytes += size
+
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.nbytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def release(self, key: Hashable) -> None:
+        """Let another reader refresh a stale entry after a failed refresh."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.refreshing = False
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self.nbytes -= entry.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.stale_hits = 0
+            self.misses = 0
+            self.bypassed = 0
+            self.evictions = 0
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union
+
+if TYPE_CHECKING:
+    from graphql import IntrospectionQuery
+
+log = logging.getLogger(__name__)
+
+
+def introspection_hash(introspection: "IntrospectionQuery") -> str:
+    canonical = json.dumps(introspection, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CachedSchema:
+    __slots__ = ("introspection", "content_hash", "stored_at")
+
+    def __init__(
+        self,
+        introspection: "IntrospectionQuery",
+        content_hash: str,
+        stored_at: float,
+    ) -> None:
+        self.introspection = introspection
+        self.content_hash = content_hash
+        self.stored_at = stored_at
+
+
+class SchemaCache:
+    """
+    Keeps the introspection result of an endpoint in a JSON file so new
+    processes can build the schema without an introspection round-trip.
+
+    Entries older than `ttl` seconds are still used, but Orionx refreshes
+    them in the background. Entries whose content hash doesn't match, or that
+    were stored for another URL, are ignored.
+    """
+
+    def __init__(self, path: Union[str, "os.PathLike[str]"], ttl: float = 3600.0):
+        assert ttl >= 0
+        self.path = os.path.expanduser(os.fspath(path))
+        self.ttl = ttl
+
+    def load(self, url: str) -> Optional[CachedSchema]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entry: Dict[str, Any] = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            log.warning("Ignoring unreadable schema cache %s: %s", self.path, e)
+            return None
+
+        try:
+            if entry["url"] != url:
+                return None
+
+            introspection = entry["introspection"]
+            if introspection_hash(introspection) != entry["hash"]:
+                log.warning("Ignoring corrupted schema cache %s", self.path)
+                return None
+
+            return CachedSchema(introspection, entry["hash"], float(entry["stored_at"]))
+        except (KeyError, TypeError, ValueError):
+            log.warning("Ignoring malformed schema cache %s", self.path)
+            return None
+
+    def store(self, url: str, introspection: "IntrospectionQuery") -> CachedSchema:
+        cached = CachedSchema(
+            introspection, introspection_hash(introspection), time.time()
+        )
+        entry = {
+            "url": url,
+            "stored_at": cached.stored_at,
+            "hash": cached.content_hash,
+            "introspection": introspection,
+        }
+
+        # write to a temporary file first so readers never see a partial entry
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        return cached
+
+    def is_fresh(self, cached: CachedSchema) -> bool:
+        return time.time() - cached.stored_at < self.ttl
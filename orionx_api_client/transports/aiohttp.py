@@ -0,0 +1,77 @@
+from typing import Any, Dict, Optional
+
+from gql.transport.aiohttp import AIOHTTPTransport
+from graphql import DocumentNode, ExecutionResult
+
+from ..codecs import JSONCodec, default_codec
+from .builders.headers import HeadersBuilder
+from .builders.payload import PayloadBuilder
+from .compression import Compression
+from .pool import ConnectionPool
+
+
+class OrionxAIOHTTPTransport(AIOHTTPTransport):
+    def __init__(
+        self,
+        api_key: str,
+        secret_key: str,
+        *args: Any,
+        codec: Optional[JSONCodec] = None,
+        connection_pool: Optional[ConnectionPool] = None,
+        compression: Optional[Compression] = None,
+        **kwargs: Any,
+    ) -> None:
+        self.codec = codec or default_codec()
+        self.connection_pool = connection_pool
+        self.compression = compression
+        # file uploads are serialized by gql, with the codec that signs them
+        super(OrionxAIOHTTPTransport, self).__init__(
+            *args, json_serialize=self._json_serialize, **kwargs
+        )
+        self.headers_builder = HeadersBuilder(api_key, secret_key, self.codec)
+
+    async def connect(self) -> None:
+        if self.connection_pool is not None:
+            self.client_session_args = {
+                **(self.client_session_args or {}),
+                **self.connection_pool.session_args(),
+            }
+        await super().connect()
+
+    def _json_serialize(self, obj: Any) -> str:
+        return self.codec.dumps(obj).decode("utf-8")
+
+    async def execute(
+        self,
+        document: DocumentNode,
+        variable_values: Optional[Dict[str, Any]] = None,
+        operation_name: Optional[str] = None,
+        extra_args: Optional[Dict[str, Any]] = None,
+        upload_files: bool = False,
+    ) -> ExecutionResult:
+        payload = PayloadBuilder.build(document, variable_values, operation_name)
+
+        if upload_files:
+            headers = self.headers_builder.build(payload)
+            return await super().execute(
+                document,
+                variable_values,
+                operation_name,
+                {**(extra_args or {}), **{"headers": headers}},
+                upload_files,
+            )
+
+        # post the exact bytes that were signed instead of letting aiohttp
+        # serialize the payload again
+        body = self.codec.dumps(payload)
+        headers = self.headers_builder.build_for_body(body)
+        data = body
+        if self.compression is not None:
+            data = self.compression.encode(body, headers)
+
+        return await super().execute(
+            document,
+            variable_values,
+            operation_name,
+            {**(extra_args or {}), **{"headers": headers, "json": None, "data": data}},
+        )
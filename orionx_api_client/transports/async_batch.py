@@ -0,0 +1,296 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+import aiohttp
+from aiohttp.client_exceptions import ClientResponseError
+from gql.transport.aiohttp import AIOHTTPTransport
+from gql.transport.exceptions import (
+    TransportClosed,
+    TransportProtocolError,
+    TransportServerError,
+)
+from graphql import DocumentNode, ExecutionResult
+
+from ..codecs import JSONCodec, default_codec
+from .batch import BatchItem, BatchStats, batch_body, deduplicate
+from .builders.headers import HeadersBuilder
+from .builders.payload import PayloadBuilder, is_idempotent
+from .compression import Compression
+from .policy import BatchPolicy
+from .pool import ConnectionPool
+
+log = logging.getLogger(__name__)
+
+
+class OrionxAsyncBatchTransport(AIOHTTPTransport):
+    """
+    asyncio counterpart of OrionxBatchTransport: coroutines awaiting `execute`
+    in the same batch window are sent together in a single POST.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        secret_key: str,
+        *args: Any,
+        batch_policy: Optional[BatchPolicy] = None,
+        max_in_flight: int = 1,
+        codec: Optional[JSONCodec] = None,
+        deduplicate: bool = True,
+        connection_pool: Optional[ConnectionPool] = None,
+        compression: Optional[Compression] = None,
+        **kwargs: Any,
+    ) -> None:
+        AIOHTTPTransport.__init__(self, *args, **kwargs)
+        self.connection_pool = connection_pool
+        self.compression = compression
+        self.codec = codec or default_codec()
+        self.headers_builder = HeadersBuilder(api_key, secret_key, self.codec)
+        self.batch_policy = batch_policy or BatchPolicy()
+        self.deduplicate = deduplicate
+        self.stats = BatchStats()
+
+        assert max_in_flight > 0
+        self.max_in_flight = max_in_flight
+
+        self.query_batcher_queue: Optional["asyncio.Queue[BatchItem]"] = None
+        self.query_batcher: Optional[asyncio.Task] = None
+        self._carried_item: Optional[BatchItem] = None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._senders: Set[asyncio.Task] = set()
+
+    async def connect(self) -> None:
+        if self.connection_pool is not None:
+            self.client_session_args = {
+                **(self.client_session_args or {}),
+                **self.connection_pool.session_args(),
+            }
+        await super().connect()
+
+        self.query_batcher_queue = asyncio.Queue()
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        self.query_batcher = asyncio.create_task(self._batch_query())
+
+    async def close(self) -> None:
+        if self.query_batcher is not None:
+            self.query_batcher.cancel()
+            try:
+                await self.query_batcher
+            except asyncio.CancelledError:
+                pass
+            self.query_batcher = None
+
+        if self._senders:
+            await asyncio.gather(*self._senders, return_exceptions=True)
+
+        pending = [self._carried_item] if self._carried_item else []
+        self._carried_item = None
+        if self.query_batcher_queue is not None:
+            while not self.query_batcher_queue.empty():
+                pending.append(self.query_batcher_queue.get_nowait())
+        self._fail_closed(pending)
+
+        await super().close()
+
+    @staticmethod
+    def _fail_closed(items: List[BatchItem]) -> None:
+        exc = TransportClosed("Transport is not connected")
+        for item in items:
+            item.set_exception(exc)
+
+    async def _collect_batch(self) -> List[BatchItem]:
+        assert self.query_batcher_queue is not None
+
+        items: List[BatchItem] = []
+        nbytes = 0
+        loop = asyncio.get_running_loop()
+
+        if self._carried_item is not None:
+            item, self._carried_item = self._carried_item, None
+        else:
+            item = await self.query_batcher_queue.get()
+            self.batch_policy.observe_arrival(item.enqueued_at)
+        started_at = loop.time()
+
+        while True:
+            if not self.batch_policy.fits(len(items), nbytes, item.size):
+                # keep it for the next batch
+                self._carried_item = item
+                break
+
+            items.append(item)
+            nbytes += item.size
+
+            if self.batch_policy.is_full(len(items), nbytes):
+                break
+
+            try:
+                item = self.query_batcher_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                linger = self.batch_policy.linger(loop.time() - started_at)
+                if linger <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(
+                        self.query_batcher_queue.get(), linger
+                    )
+                except asyncio.TimeoutError:
+                    break
+                except asyncio.CancelledError:
+                    # closed while lingering, nobody else knows about these
+                    self._fail_closed(items)
+                    raise
+
+            self.batch_policy.observe_arrival(item.enqueued_at)
+
+        return items
+
+    async def _batch_query(self) -> None:
+        assert self._in_flight is not None
+
+        while True:
+            items = await self._collect_batch()
+
+            # coroutines cancelled while waiting don't need an answer
+            items = [item for item in items if not item.future.done()]
+
+            if not items:
+                continue
+
+            received = len(items)
+            if self.deduplicate:
+                items = deduplicate(items)
+            self.stats.record(received, received - len(items))
+
+            try:
+                await self._in_flight.acquire()
+            except asyncio.CancelledError:
+                # closed while waiting for a sender
+                self._fail_closed(items)
+                raise
+            sender = asyncio.create_task(self._dispatch_batch(items))
+            self._senders.add(sender)
+            sender.add_done_callback(self._senders.discard)
+
+    async def _dispatch_batch(self, items: List[BatchItem]) -> None:
+        assert self._in_flight is not None
+
+        try:
+            await self._send_batch(items)
+        except Exception as exc:
+            for item in items:
+                item.set_exception(exc)
+        finally:
+            self._in_flight.release()
+
+    async def _send_batch(self, items: List[BatchItem]) -> None:
+        if self.session is None:
+            raise TransportClosed("Transport is not connected")
+
+        body = batch_body(items, self.codec)
+
+        post_args: Dict[str, Any] = {
+            "data": body,
+            "headers": self.headers_builder.build_for_body(body),
+        }
+        if self.compression is not None:
+            post_args["data"] = self.compression.encode(body, post_args["headers"])
+
+        async with self.session.post(self.url, ssl=self.ssl, **post_args) as resp:
+
+            async def get_response_error(
+                resp: aiohttp.ClientResponse, reason: str
+            ) -> Exception:
+                # We raise a TransportServerError if the status code
+                # is 400 or higher.
+                # We raise a TransportProtocolError in the other cases
+
+                try:
+                    # Raise a ClientResponseError if response status is 400 or higher
+                    resp.raise_for_status()
+                except ClientResponseError as e:
+                    exc = TransportServerError(str(e), e.status)
+                    exc.__cause__ = e
+                    return exc
+
+                result_text = await resp.text()
+                return TransportProtocolError(
+                    f"Server did not return a GraphQL result: "
+                    f"{reason}: "
+                    f"{result_text}"
+                )
+
+            self.response_headers = resp.headers
+
+            try:
+                results = self.codec.loads(await resp.read())
+
+                assert isinstance(results, list)
+                assert len(results) == len(items)
+
+                for result in results:
+                    assert isinstance(result, dict)
+
+                if log.isEnabledFor(logging.INFO):
+                    log.info("<<< %s", await resp.text())
+
+            except Exception:
+                raise await get_response_error(resp, "Not a JSON answer")
+
+            for result, item in zip(results, items):
+                if "errors" not in result and "data" not in result:
+                    item.set_exception(
+                        await get_response_error(
+                            resp, 'No "data" or "errors" keys in answer'
+                        )
+                    )
+                else:
+                    item.set_result(result)
+
+    async def execute(
+        self,
+        document: DocumentNode,
+        variable_values: Optional[Dict[str, Any]] = None,
+        operation_name: Optional[str] = None,
+        extra_args: Optional[Dict[str, Any]] = None,
+        upload_files: bool = False,
+    ) -> ExecutionResult:
+        """Execute GraphQL query.
+
+        The query is queued and sent along with every other query awaited in
+        the same batch window.
+
+        :param document: GraphQL query as AST Node object.
+        :param variable_values: Dictionary of input parameters (Default: None).
+        :param operation_name: Name of the operation that shall be executed.
+            Only required in multi-operation documents (Default: None).
+        :return: The result of execution.
+        """
+
+        if self.session is None or self.query_batcher_queue is None:
+            raise TransportClosed("Transport is not connected")
+
+        payload = PayloadBuilder.build(document, variable_values, operation_name)
+
+        body = None
+        if self.batch_policy.max_batch_bytes is not None:
+            body = self.codec.dumps(payload)
+
+        # Log the payload
+        if log.isEnabledFor(logging.INFO):
+            log.info(">>> %s", json.dumps(payload))
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.query_batcher_queue.put_nowait(
+            BatchItem(payload, future, body, is_idempotent(document, operation_name))
+        )
+
+        result = await future
+
+        return ExecutionResult(
+            errors=result.get("errors"),
+            data=result.get("data"),
+            extensions=result.get("extensions"),
+        )
@@ -0,0 +1,189 @@
+import heapq
+import queue
+import time
+from typing import TYPE_CHECKING, List, Optional, Sequence
+
+from gql.transport.exceptions import TransportError
+
+if TYPE_CHECKING:
+    from .batch import BatchItem
+
+
+class BatchQueueFull(TransportError):
+    """The batcher queue had no room for a query."""
+
+
+class BatchQueue(queue.PriorityQueue):
+    """
+    Batcher queue bounded by `max_items` queued queries and `max_bytes`
+    serialized bytes (0 and None mean unbounded).
+
+    When it is full, `overflow` decides what `put` does:
+
+    - BLOCK waits for room, raising BatchQueueFull after `timeout` seconds
+      when one is given.
+    - REJECT raises BatchQueueFull right away.
+    - DROP_OLDEST fails the oldest queued query with BatchQueueFull to make
+      room. Mutations are never dropped: without queries to drop it blocks.
+
+    An empty queue always accepts one item, however large.
+    """
+
+    BLOCK = "block"
+    REJECT = "reject"
+    DROP_OLDEST = "drop_oldest"
+
+    def __init__(
+        self,
+        max_items: int = 0,
+        max_bytes: Optional[int] = None,
+        overflow: str = BLOCK,
+        timeout: Optional[float] = None,
+    ) -> None:
+        assert max_items >= 0
+        assert max_bytes is None or max_bytes > 0
+        assert overflow in (self.BLOCK, self.REJECT, self.DROP_OLDEST)
+        assert timeout is None or timeout >= 0
+        super().__init__()
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.overflow = overflow
+        self.timeout = timeout
+
+        self.nbytes = 0
+        self.max_depth = 0
+        self.rejected = 0
+        self.dropped = 0
+
+    @property
+    def depth(self) -> int:
+        return self.qsize()
+
+    def put(
+        self,
+        item: "BatchItem",
+        block: bool = True,
+        timeout: Optional[float] = None,
+    ) -> None:
+        if timeout is None:
+            timeout = self.timeout
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        dropped: List["BatchItem"] = []
+        try:
+            with self.not_full:
+                self._wait_for_room(item, block, deadline, dropped)
+                self._put(item)
+                self.unfinished_tasks += 1
+                self.not_empty.notify()
+        finally:
+            self._fail_dropped(dropped)
+
+    def put_unbounded(self, item: "BatchItem") -> None:
+        """Put `item` right away, whatever the bounds of the queue."""
+        with self.not_full:
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def put_many(
+        self,
+        items: Sequence["BatchItem"],
+        block: bool = True,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Put `items` in order, taking the lock once and making room for each
+        as `put` does. As the items before it are already queued, the first
+        one that doesn't fit and those after it fail with BatchQueueFull
+        instead of raising it.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        dropped: List["BatchItem"] = []
+        rejected: Sequence["BatchItem"] = ()
+        full: Optional[BatchQueueFull] = None
+        try:
+            with self.not_full:
+                for i, item in enumerate(items):
+                    try:
+                        self._wait_for_room(item, block, deadline, dropped)
+                    except BatchQueueFull as exc:
+                        self.rejected += len(items) - i - 1
+                        rejected, full = items[i:], exc
+                        break
+
+                    self._put(item)
+                    self.unfinished_tasks += 1
+                    # the batcher can drain it while the next item waits for room
+                    self.not_empty.notify()
+        finally:
+            self._fail_dropped(dropped)
+
+        # like dropped ones, failed outside the lock
+        if full is not None:
+            for item in rejected:
+                item.set_exception(full)
+
+    def _wait_for_room(
+        self,
+        item: "BatchItem",
+        block: bool,
+        deadline: Optional[float],
+        dropped: List["BatchItem"],
+    ) -> None:
+        while self._is_full(item):
+            if self.overflow == self.DROP_OLDEST and self._drop_oldest(dropped):
+                continue
+
+            if not block or self.overflow == self.REJECT:
+                self.rejected += 1
+                raise BatchQueueFull("The batcher queue is full")
+
+            if deadline is None:
+                self.not_full.wait()
+                continue
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.rejected += 1
+                raise BatchQueueFull("Timed out waiting for room in the queue")
+            self.not_full.wait(remaining)
+
+    def _is_full(self, item: "BatchItem") -> bool:
+        if not self.queue:
+            return False
+        if self.max_items and len(self.queue) >= self.max_items:
+            return True
+        return self.max_bytes is not None and self.nbytes + item.size > self.max_bytes
+
+    def _drop_oldest(self, dropped: List["BatchItem"]) -> bool:
+        queries = [item for item in self.queue if item.idempotent]
+        if not queries:
+            return False
+
+        oldest = min(queries, key=lambda item: item.seq)
+        self.queue.remove(oldest)
+        heapq.heapify(self.queue)
+        self.nbytes -= oldest.size
+        self.dropped += 1
+        # failed once the lock is released, their callbacks may put again
+        dropped.append(oldest)
+        return True
+
+    @staticmethod
+    def _fail_dropped(dropped: List["BatchItem"]) -> None:
+        for item in dropped:
+            item.set_exception(BatchQueueFull("Dropped from the full batcher queue"))
+
+    def _put(self, item: "BatchItem") -> None:
+        super()._put(item)
+        self.nbytes += item.size
+        self.max_depth = max(self.max_depth, len(self.queue))
+
+    def _get(self) -> "BatchItem":
+        item = super()._get()
+        self.nbytes -= item.size
+        return item
@@ -1,36 +1,82 @@
 import concurrent.futures
+import functools
+import itertools
 import json
 import logging
 import queue
 import threading
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
 
 import requests
 from gql.transport.exceptions import (
     TransportClosed,
+    TransportError,
     TransportProtocolError,
     TransportServerError,
 )
-from gql.transport.requests import RequestsHTTPTransport
 from graphql import DocumentNode, ExecutionResult
-
-from .builders.headers import HeadersBuilder
-from .builders.payload import PayloadBuilder
+from requests.adapters import DEFAULT_POOLSIZE
+
+from ..codecs import JSONCodec
+from .backpressure import BatchQueue, BatchQueueFull
+from .builders.merge import MergedQuery, mergeable, merged_query
+from .builders.payload import PayloadBuilder, is_idempotent, payload_key
+from .http import OrionxHTTPTransport
+from .policy import BatchPolicy
+from .pool import ConnectionPool
+from .rate_limit import MUTATION, QUERY
+from .retry import RetryPolicy
 
 log = logging.getLogger(__name__)
 
 
+class DeadlineExceeded(TransportError):
+    """The result of a request was not available before its deadline."""
+
+
+def resolve(
+    future: concurrent.futures.Future,
+    result: Any = None,
+    exc: Optional[BaseException] = None,
+) -> None:
+    # the caller may have expired it from another thread meanwhile
+    if future.done():
+        return
+    try:
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+    except concurrent.futures.InvalidStateError:
+        pass
+
+
 class FutureExecResult(ExecutionResult):
-    def __init__(self, future: concurrent.futures.Future):
+    def __init__(
+        self, future: concurrent.futures.Future, deadline: Optional[float] = None
+    ):
         self.future = future
+        self.deadline = deadline
         self._data = None
         self._errors = None
         self._extensions = None
         self.filled = False
 
+    def expire(self) -> None:
+        """Fail the result with DeadlineExceeded unless it is already done."""
+        resolve(self.future, exc=DeadlineExceeded("Request deadline exceeded"))
+
     def _lazy_load(self):
         if not self.filled:
+            if self.deadline is not None:
+                try:
+                    self.future.result(max(0.0, self.deadline - time.monotonic()))
+                except concurrent.futures.TimeoutError:
+                    self.expire()
+                except Exception:
+                    pass
+
             result = self.future.result()
             self._errors = result.get("errors")
             self._data = result.get("data")
@@ -53,7 +99,157 @@ class FutureExecResult(ExecutionResult):
         return self._extensions
 
 
-class OrionxBatchTransport(RequestsHTTPTransport):
+class BatchItem:
+    __slots__ = (
+        "payload",
+        "future",
+        "body",
+        "size",
+        "enqueued_at",
+        "idempotent",
+        "duplicates",
+        "priority",
+        "seq",
+        "deadline",
+        "attempts",
+        "mergeable",
+    )
+
+    _seq = itertools.count()
+
+    def __init__(
+        self,
+        payload: Dict[str, Any],
+        future: concurrent.futures.Future,
+        body: Optional[bytes] = None,
+        idempotent: bool = False,
+        deadline: Optional[float] = None,
+        mergeable: bool = False,
+    ) -> None:
+        self.payload = payload
+        self.future = future
+        # only serialized up front when the batch policy needs its size
+        self.body = body
+        self.size = len(body) if body is not None else 0
+        self.enqueued_at = time.monotonic()
+        # queries can share an answer, mutations are always sent on their own
+        self.idempotent = idempotent
+        self.duplicates: List["BatchItem"] = []
+        self.priority = QUERY if idempotent else MUTATION
+        self.seq = next(self._seq)
+        # time.monotonic() after which nobody wants the result anymore
+        self.deadline = deadline
+        self.attempts = 0
+        # may be answered by a query merged with others of its batch
+        self.mergeable = mergeable
+
+    def __lt__(self, other: "BatchItem") -> bool:
+        # the batcher queue hands out mutations first, then in arrival order
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def dedup_key(self) -> Optional[Hashable]:
+        if not self.idempotent:
+            return None
+        return payload_key(self.payload)
+
+    def set_result(self, result: Dict[str, Any]) -> None:
+        for future in self._futures():
+            resolve(future, result)
+
+    def set_exception(self, exc: BaseException) -> None:
+        for future in self._futures():
+            resolve(future, exc=exc)
+
+    def waiting(self) -> bool:
+        """Whether any caller still waits for the result."""
+        return not all(future.done() for future in self._futures())
+
+    def expire(self, now: float) -> bool:
+        """
+        Fail the callers whose deadline passed. Returns whether nobody is
+        waiting for the result anymore.
+        """
+        waiting = False
+        for item in [self] + self.duplicates:
+            if item.future.done():
+                continue
+            if item.deadline is not None and item.deadline <= now:
+                resolve(item.future, exc=DeadlineExceeded("Request deadline exceeded"))
+            else:
+                waiting = True
+        return not waiting
+
+    def _futures(self) -> List[concurrent.futures.Future]:
+        return [self.future] + [item.future for item in self.duplicates]
+
+
+def deduplicate(items: List[BatchItem]) -> List[BatchItem]:
+    """
+    Collapse identical queries of a batch into the first one, which answers
+    the others through its `duplicates`.
+    """
+    unique: List[BatchItem] = []
+    leaders: Dict[Hashable, BatchItem] = {}
+
+    for item in items:
+        key = item.dedup_key()
+        if key is None:
+            unique.append(item)
+            continue
+
+        leader = leaders.get(key)
+        if leader is None:
+            leaders[key] = item
+            unique.append(item)
+        else:
+            # a retried item may bring the duplicates of its previous batch
+            leader.duplicates.append(item)
+            leader.duplicates.extend(item.duplicates)
+            item.duplicates = []
+
+    return unique
+
+
+class BatchStats:
+    """Counters of the batches sent by a batch transport."""
+
+    __slots__ = (
+        "batches",
+        "items",
+        "deduplicated",
+        "last_batch_items",
+        "last_batch_deduplicated",
+        "splits",
+        "retried",
+        "merged",
+    )
+
+    def __init__(self) -> None:
+        self.batches = 0
+        self.items = 0
+        self.deduplicated = 0
+        self.splits = 0
+        self.retried = 0
+        self.merged = 0
+        self.last_batch_items = 0
+        self.last_batch_deduplicated = 0
+
+    def record(self, items: int, deduplicated: int) -> None:
+        self.batches += 1
+        self.items += items
+        self.deduplicated += deduplicated
+        self.last_batch_items = items
+        self.last_batch_deduplicated = deduplicated
+
+
+def batch_body(items: List[BatchItem], codec: JSONCodec) -> bytes:
+    """Serialize a batch once, reusing the bodies of pre-serialized items."""
+    if all(item.body is not None for item in items):
+        return b"[" + b",".join(item.body for item in items) + b"]"  # type: ignore
+    return codec.dumps([item.payload for item in items])
+
+
+class OrionxBatchTransport(OrionxHTTPTransport):
     """
     based on: https://dev-blog.apollodata.com/query-batching-in-apollo-63acfd859862
     """
@@ -61,112 +257,455 @@ class OrionxBatchTransport(RequestsHTTPTransport):
     class TerminateBatcher(Exception):
         pass
 
+    class PayloadTooLarge(Exception):
+        pass
+
     def __init__(
-        self, api_key: str, secret_key: str, *args: Any, **kwargs: Any
+        self,
+        api_key: str,
+        secret_key: str,
+        *args: Any,
+        batch_policy: Optional[BatchPolicy] = None,
+        max_in_flight: int = 1,
+        codec: Optional[JSONCodec] = None,
+        deduplicate: bool = True,
+        batch_queue: Optional[BatchQueue] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        merge_queries: bool = False,
+        **kwargs: Any,
     ) -> None:
-        RequestsHTTPTransport.__init__(self, *args, **kwargs)
-        self.headers_builder = HeadersBuilder(api_key, secret_key)
-
-        self.query_batcher_queue = queue.Queue()
+        if max_in_flight > DEFAULT_POOLSIZE and kwargs.get("connection_pool") is None:
+            # every sender needs its own connection from the shared session
+            kwargs["connection_pool"] = ConnectionPool(maxsize=max_in_flight)
+
+        OrionxHTTPTransport.__init__(
+            self, api_key, secret_key, *args, codec=codec, **kwargs
+        )
+        self.batch_policy = batch_policy or BatchPolicy()
+        self.deduplicate = deduplicate
+        self.retry_policy = retry_policy
+        self.merge_queries = merge_queries
+        self.stats = BatchStats()
+
+        assert max_in_flight > 0
+        self.max_in_flight = max_in_flight
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._dispatcher: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+        if batch_queue is None:
+            batch_queue = BatchQueue()
+        self.query_batcher_queue = batch_queue
+        self._carried_item: Optional[BatchItem] = None
+        self.query_batcher: Optional[threading.Thread] = None
+        # queued ahead of everything else to stop the batcher
+        self._terminator = BatchItem({}, concurrent.futures.Future())
+        self._terminator.priority = -1
+        self._closing = False
+
+    def connect(self):
+        super().connect()
+
+        self._closing = False
+        self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        self._dispatcher = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_in_flight, thread_name_prefix="orionx-batch-sender"
+        )
         self.query_batcher = threading.Thread(target=self._batch_query, daemon=True)
         self.query_batcher.start()
 
-    def _batch_query(self) -> None:
+    def close(self):
+        """
+        Stop the batcher, wait for the batches in flight and fail the queries
+        still queued with TransportClosed.
+        """
+        if self.query_batcher is not None:
+            self._closing = True
+            self.query_batcher_queue.put_unbounded(self._terminator)
+            self.query_batcher.join()
+            self.query_batcher = None
+
+        if self._dispatcher is not None:
+            # every sender holds a slot until its batch is answered
+            for _ in range(self.max_in_flight):
+                self._in_flight.acquire()
+            self._dispatcher.shutdown()
+            self._dispatcher = None
+
+        self._fail_queued()
+        super().close()
+
+    def _fail_queued(self) -> None:
+        exc = TransportClosed("Transport is not connected")
+        pending = [self._carried_item] if self._carried_item else []
+        self._carried_item = None
         while True:
-            payloads_and_futures: List[Tuple[dict, concurrent.futures.Future]] = []
-            payload_and_future: Tuple[
-                dict, concurrent.futures.Future
-            ] = self.query_batcher_queue.get()
+            try:
+                pending.append(self.query_batcher_queue.get_nowait())
+            except queue.Empty:
+                break
+        for item in pending:
+            if item is not self._terminator:
+                item.set_exception(exc)
+
+    def _collect_batch(self) -> List[BatchItem]:
+        items: List[BatchItem] = []
+        nbytes = 0
+        earliest_deadline: Optional[float] = None
+
+        if self._carried_item is not None:
+            item, self._carried_item = self._carried_item, None
+        else:
+            item = self.query_batcher_queue.get()
+            self.batch_policy.observe_arrival(item.enqueued_at)
+        started_at = time.monotonic()
 
-            payloads_and_futures.append(payload_and_future)
+        while True:
+            if item is self._terminator:
+                exc = TransportClosed("Transport is not connected")
+                for collected in items:
+                    collected.set_exception(exc)
+                raise self.TerminateBatcher()
 
-            # wait 10 ms
-            time.sleep(0.01)
+            if not self.batch_policy.fits(len(items), nbytes, item.size):
+                # keep it for the next batch
+                self._carried_item = item
+                break
 
-            while not self.query_batcher_queue.empty():
-                payload_and_future = self.query_batcher_queue.get()
-                payloads_and_futures.append(payload_and_future)
+            items.append(item)
+            nbytes += item.size
+            if item.deadline is not None and (
+                earliest_deadline is None or item.deadline < earliest_deadline
+            ):
+                earliest_deadline = item.deadline
 
-            payloads_and_futures = [
-                (payload, future)
-                for payload, future in payloads_and_futures
-                if future.set_running_or_notify_cancel()
-            ]
+            if self.batch_policy.is_full(len(items), nbytes):
+                break
 
-            payloads = [payload for payload, _ in payloads_and_futures]
-            futures = [futures for _, futures in payloads_and_futures]
-
-            data_key = "json" if self.use_json else "data"
+            try:
+                item = self.query_batcher_queue.get_nowait()
+            except queue.Empty:
+                now = time.monotonic()
+                linger = self.batch_policy.linger(
+                    now - started_at,
+                    earliest_deadline - now if earliest_deadline is not None else None,
+                )
+                if linger <= 0:
+                    break
+                try:
+                    item = self.query_batcher_queue.get(timeout=linger)
+                except queue.Empty:
+                    break
 
-            post_args = {
-                "headers": self.headers_builder.build(payloads),
-                "auth": self.auth,
-                "cookies": self.cookies,
-                "timeout": self.default_timeout,
-                "verify": self.verify,
-            }
+            self.batch_policy.observe_arrival(item.enqueued_at)
 
-            post_args[data_key] = payloads
-            # Pass kwargs to requests post method
-            post_args.update(self.kwargs)
+        return items
 
-            if not self.session:
-                exc = TransportClosed("Transport is not connected")
-                for future in futures:
-                    future.set_exception(exc)
-                continue
+    def _batch_query(self) -> None:
+        dispatcher = self._dispatcher
+        assert dispatcher is not None
 
-            # Using the created session to perform requests
-            response = self._request(**post_args)  # type: ignore
-            self.response_headers = response.headers
+        while True:
+            try:
+                items = self._collect_batch()
+            except self.TerminateBatcher:
+                return
 
-            def get_response_error(resp: requests.Response, reason: str) -> Exception:
-                # We raise a TransportServerError if the status code
-                # is 400 or higher.
-                # We raise a TransportProtocolError in the other cases
+            now = time.monotonic()
+            items = [item for item in items if self._admit(item, now)]
 
-                try:
-                    # Raise a HTTPError if response status is 400 or higher
-                    resp.raise_for_status()
-                except requests.HTTPError as e:
-                    exc = TransportServerError(str(e), e.response.status_code)
-                    exc.__cause__ = e
-                    return exc
-
-                result_text = resp.text
-                return TransportProtocolError(
-                    f"Server did not return a GraphQL result: "
-                    f"{reason}: "
-                    f"{result_text}"
-                )
+            if not items:
+                continue
 
-            try:
-                results = response.json()
+            received = len(items)
+            if self.deduplicate:
+                items = deduplicate(items)
+            self.stats.record(received, received - len(items))
+
+            # wait for a free sender so batches keep growing meanwhile
+            self._in_flight.acquire()
+            self._acquire_rate_limit(min(item.priority for item in items))
+            dispatcher.submit(self._dispatch_batch, items)
+
+    def _admit(self, item: BatchItem, now: float) -> bool:
+        """Whether an item goes into the batch. Fails it instead of the batcher."""
+        try:
+            return self._start(item) and not item.expire(now)
+        except Exception as exc:
+            item.set_exception(exc)
+            return False
+
+    @staticmethod
+    def _start(item: BatchItem) -> bool:
+        if item.attempts:
+            # a retry, already running since its first attempt
+            return item.waiting()
+        if item.future.done():
+            # already expired by its caller
+            return False
+        try:
+            return item.future.set_running_or_notify_cancel()
+        except RuntimeError:
+            # expired by its caller since the check above
+            return False
+
+    def _dispatch_batch(self, items: List[BatchItem]) -> None:
+        try:
+            self._send_chunk(items)
+        except Exception as exc:
+            for item in items:
+                item.set_exception(exc)
+        finally:
+            self._in_flight.release()
+
+    def _send_chunk(self, items: List[BatchItem]) -> None:
+        # waiting for a sender or the rate limiter may have taken a while
+        now = time.monotonic()
+        items = [item for item in items if not item.expire(now)]
+        if not items:
+            return
+
+        for item in items:
+            item.attempts += 1
+
+        try:
+            self._send_batch(items)
+        except requests.RequestException as exc:
+            self._fail(items, exc, True)
+        except self.PayloadTooLarge:
+            # nothing was executed, so both halves can be sent again
+            log.warning(
+                "The server rejected a batch of %d queries as too large, "
+                "consider setting BatchPolicy.max_batch_bytes",
+                len(items),
+            )
+            self.stats.splits += 1
+            for item in items:
+                item.attempts -= 1
+            half = len(items) // 2
+            halves = [items[:half], items[half:]]
+
+            # the second half takes another sender when one is free
+            assert self._dispatcher is not None
+            if self._in_flight.acquire(blocking=False):
+                second = halves.pop()
+                self._acquire_rate_limit(min(item.priority for item in second))
+                self._dispatcher.submit(self._dispatch_batch, second)
+
+            for chunk in halves:
+                self._acquire_rate_limit(min(item.priority for item in chunk))
+                self._send_chunk(chunk)
+
+    def _send_batch(self, items: List[BatchItem]) -> None:
+        groups = self._merge(items)
+        payloads = [
+            group[0].payload
+            if merged is None
+            else merged.payload([item.payload for item in group])
+            for group, merged in groups
+        ]
+
+        persisted_queries = self.persisted_queries
+        encoded: List[Dict[str, Any]] = []
+        if persisted_queries is not None:
+            # every combination of merged queries hashes differently, the
+            # registry would only fill up with hashes that never come back
+            encoded = [
+                payload if merged is not None else persisted_queries.encode(payload)
+                for payload, (_, merged) in zip(payloads, groups)
+            ]
+            body = self.codec.dumps(encoded)
+        elif len(groups) == len(items):
+            body = batch_body(items, self.codec)
+        else:
+            body = self.codec.dumps(payloads)
+
+        post_args = {
+            "headers": self.headers_builder.build_for_body(body),
+            "auth": self.auth,
+            "cookies": self.cookies,
+            "timeout": self.default_timeout,
+            "verify": self.verify,
+            "data": body,
+        }
+
+        # Pass kwargs to requests post method
+        post_args.update(self.kwargs)
+
+        if self.compression is not None:
+            post_args["data"] = self.compression.encode(body, post_args["headers"])
 
-                assert isinstance(results, list)
-                assert len(results) == len(payloads)
+        if not self.session:
+            exc = TransportClosed("Transport is not connected")
+            for item in items:
+                item.set_exception(exc)
+            return
 
-                for item in results:
-                    assert isinstance(item, dict)
+        # Using the created session to perform requests
+        response = self._request(**post_args)  # type: ignore
+        self.response_headers = response.headers
 
-                if log.isEnabledFor(logging.INFO):
-                    log.info("<<< %s", response.text)
+        if response.status_code == 413 and len(items) > 1:
+            raise self.PayloadTooLarge()
 
-            except Exception:
-                exc = get_response_error(response, "Not a JSON answer")
-                for future in futures:
-                    future.set_exception(exc)
+        def get_response_error(resp: requests.Response, reason: str) -> Exception:
+            # We raise a TransportServerError if the status code
+            # is 400 or higher.
+            # We raise a TransportProtocolError in the other cases
 
-                continue
+            try:
+                # Raise a HTTPError if response status is 400 or higher
+                resp.raise_for_status()
+            except requests.HTTPError as e:
+                exc = TransportServerError(str(e), e.response.status_code)
+                exc.__cause__ = e
+                return exc
+
+            result_text = resp.text
+            return TransportProtocolError(
+                f"Server did not return a GraphQL result: "
+                f"{reason}: "
+                f"{result_text}"
+            )
+
+        try:
+            results = self.codec.loads(response.content)
+        except Exception:
+            results = None
+
+        if not isinstance(results, list) or len(results) > len(groups):
+            # nothing can be matched to the queries
+            exc = get_response_error(response, "Not a JSON answer")
+            self._fail(items, exc, self._is_retryable(response))
+            return
 
-            for result, future in zip(results, futures):
-                if "errors" not in result and "data" not in result:
-                    exc = get_response_error(
-                        response, 'No "data" or "errors" keys in answer'
-                    )
-                    future.set_exception(exc)
-                else:
-                    future.set_result(result)
+        if log.isEnabledFor(logging.INFO):
+            log.info("<<< %s", response.text)
+
+        if self.retry_policy is not None:
+            self.retry_policy.deposit()
+
+        # answers that came back are kept even if others are missing
+        failed: List[BatchItem] = []
+        resend: List[BatchItem] = []
+        for i, (group, merged) in enumerate(groups):
+            result = results[i] if i < len(results) else None
+            if not isinstance(result, dict) or (
+                "errors" not in result and "data" not in result
+            ):
+                failed.extend(group)
+            elif persisted_queries is not None and not persisted_queries.answered(
+                encoded[i], result.get("errors")
+            ):
+                resend.extend(group)
+            elif merged is None:
+                group[0].set_result(result)
+            elif result.get("data") is None:
+                # one of them failed the merged query, each gets its own answer
+                for item in group:
+                    item.mergeable = False
+                resend.extend(group)
+            else:
+                for item, item_result in zip(group, merged.split(result)):
+                    item.set_result(item_result)
+
+        if failed:
+            if len(results) < len(groups):
+                reason = f"{len(results)} answers for {len(groups)} queries"
+            else:
+                reason = 'No "data" or "errors" keys in answer'
+            self._fail(failed, get_response_error(response, reason), True)
+
+        if resend:
+            # unknown hashes go in full, failed merged queries one by one
+            for item in resend:
+                item.attempts -= 1
+            self._acquire_rate_limit(min(item.priority for item in resend))
+            self._send_chunk(resend)
+
+    def _merge(
+        self, items: List[BatchItem]
+    ) -> List[Tuple[List[BatchItem], Optional[MergedQuery]]]:
+        """
+        Group the items of a batch by the query answering them: the
+        mergeable ones share a merged query, the others go on their own.
+        """
+        groups: List[Tuple[List[BatchItem], Optional[MergedQuery]]] = []
+        merging: List[BatchItem] = []
+        for item in items:
+            if item.mergeable:
+                merging.append(item)
+            else:
+                groups.append(([item], None))
+
+        if len(merging) == 1:
+            groups.append((merging, None))
+        elif merging:
+            merged = merged_query(tuple(item.payload["query"] for item in merging))
+            groups.append((merging, merged))
+            self.stats.merged += len(merging)
+        return groups
+
+    @staticmethod
+    def _is_retryable(response: requests.Response) -> bool:
+        # other client errors would fail the same way again
+        status = response.status_code
+        return status < 400 or status >= 500 or status in (408, 429)
+
+    def _fail(self, items: List[BatchItem], exc: Exception, retryable: bool) -> None:
+        """Fail the items, or send the idempotent ones again if allowed."""
+        policy = self.retry_policy
+        retry: List[BatchItem] = []
+
+        for item in items:
+            if (
+                retryable
+                and policy is not None
+                and item.idempotent
+                and policy.can_retry(item.attempts)
+                and item.waiting()
+            ):
+                retry.append(item)
+            else:
+                item.set_exception(exc)
+
+        if not retry:
+            return
+
+        assert policy is not None
+        if not policy.withdraw():
+            log.warning("Retry budget exhausted, failing %d queries", len(retry))
+            for item in retry:
+                item.set_exception(exc)
+            return
+
+        delay = policy.delay(max(item.attempts for item in retry))
+        retry_at = time.monotonic() + delay
+
+        requeue = []
+        for item in retry:
+            if item.deadline is not None and item.deadline <= retry_at:
+                item.set_exception(exc)
+            else:
+                requeue.append(item)
+
+        if requeue:
+            self.stats.retried += len(requeue)
+            timer = threading.Timer(delay, self._requeue, (requeue, exc))
+            timer.daemon = True
+            timer.start()
+
+    def _requeue(self, items: List[BatchItem], exc: Exception) -> None:
+        if self._closing:
+            exc = TransportClosed("Transport is not connected")
+            for item in items:
+                item.set_exception(exc)
+            return
+
+        for item in items:
+            try:
+                self.query_batcher_queue.put(item)
+            except BatchQueueFull:
+                item.set_exception(exc)
 
     def _request(self, **post_args: Any) -> requests.Response:
         # Using the created session to perform requests
@@ -174,11 +713,24 @@ class OrionxBatchTransport(RequestsHTTPTransport):
 
         return self.session.request(self.method, self.url, **post_args)  # type: ignore
 
+    def execute_unbatched(
+        self,
+        document: DocumentNode,
+        variable_values: Optional[Dict[str, Any]] = None,
+        operation_name: Optional[str] = None,
+    ) -> ExecutionResult:
+        """Send a single query right away, bypassing the batch queue."""
+        return OrionxHTTPTransport.execute(
+            self, document, variable_values, operation_name
+        )
+
     def execute(  # type: ignore
         self,
         document: DocumentNode,
         variable_values: Optional[Dict[str, Any]] = None,
         operation_name: Optional[str] = None,
+        deadline: Optional[float] = None,
+        query_str: Optional[str] = None,
     ) -> FutureExecResult:
         """Execute GraphQL query.
 
@@ -189,6 +741,11 @@ class OrionxBatchTransport(RequestsHTTPTransport):
         :param variable_values: Dictionary of input parameters (Default: None).
         :param operation_name: Name of the operation that shall be executed.
             Only required in multi-operation documents (Default: None).
+        :param deadline: time.monotonic() value after which the result is no
+            longer wanted. The batch is flushed early to meet it, and the query
+            fails with DeadlineExceeded instead of being sent late (Default: None).
+        :param query_str: The document already printed, as prepared queries
+            have it (Default: None).
         :return: The result of execution.
             `data` is the result of executing the query, `errors` is null
             if no errors occurred, and is a non-empty array if an error occurred.
@@ -197,13 +754,134 @@ class OrionxBatchTransport(RequestsHTTPTransport):
         if not self.session:
             raise TransportClosed("Transport is not connected")
 
-        payload = PayloadBuilder.build(document, variable_values, operation_name)
+        if query_str is None:
+            query_str = PayloadBuilder.print_query(document)
+        payload = PayloadBuilder.build_from_text(
+            query_str, variable_values, operation_name
+        )
+
+        cache = self.response_cache
+        ttl = cache.ttl_for(document, operation_name) if cache is not None else None
+        key = self._response_key(payload) if ttl is not None else None
+
+        if cache is None or ttl is None or key is None:
+            return FutureExecResult(
+                self._enqueue(document, payload, deadline), deadline
+            )
+
+        cached, refresh = cache.get(key)
+        if refresh:
+            try:
+                self._enqueue(document, payload).add_done_callback(
+                    functools.partial(self._store_future, key, ttl)
+                )
+            except BatchQueueFull:
+                cache.release(key)
+
+        if cached is not None:
+            future: concurrent.futures.Future = concurrent.futures.Future()
+            future.set_result(cached)
+            return FutureExecResult(future=future)
+
+        future = self._enqueue(document, payload, deadline)
+        future.add_done_callback(functools.partial(self._store_future, key, ttl))
+        return FutureExecResult(future, deadline)
+
+    def execute_many(
+        self,
+        document: DocumentNode,
+        variable_sets: Iterable[Optional[Dict[str, Any]]],
+        operation_name: Optional[str] = None,
+        deadline: Optional[float] = None,
+        query_str: Optional[str] = None,
+    ) -> List[FutureExecResult]:
+        """
+        Execute the document once per variable set, queuing them all at once.
+        Queries the full queue has no room for fail with BatchQueueFull.
+        """
+        if not self.session:
+            raise TransportClosed("Transport is not connected")
+
+        if self.response_cache is not None:
+            # each one may be answered from the cache
+            return [
+                self.execute(
+                    document, variable_values, operation_name, deadline, query_str
+                )
+                for variable_values in variable_sets
+            ]
+
+        if query_str is None:
+            query_str = PayloadBuilder.print_query(document)
+        idempotent = is_idempotent(document, operation_name)
+        merge = self.merge_queries and idempotent and mergeable(document)
+        items = [
+            self._new_item(
+                PayloadBuilder.build_from_text(
+                    query_str, variable_values, operation_name
+                ),
+                idempotent,
+                merge,
+                deadline,
+            )
+            for variable_values in variable_sets
+        ]
+
+        self.query_batcher_queue.put_many(items, timeout=self._put_timeout(deadline))
+        return [FutureExecResult(item.future, deadline) for item in items]
+
+    def _enqueue(
+        self,
+        document: DocumentNode,
+        payload: Dict[str, Any],
+        deadline: Optional[float] = None,
+    ) -> concurrent.futures.Future:
+        idempotent = is_idempotent(document, payload.get("operationName"))
+        item = self._new_item(
+            payload,
+            idempotent,
+            self.merge_queries and idempotent and mergeable(document),
+            deadline,
+        )
+
+        self.query_batcher_queue.put(item, timeout=self._put_timeout(deadline))
+        return item.future
+
+    def _new_item(
+        self,
+        payload: Dict[str, Any],
+        idempotent: bool,
+        merge: bool,
+        deadline: Optional[float] = None,
+    ) -> BatchItem:
+        body = None
+        if (
+            self.batch_policy.max_batch_bytes is not None
+            or self.query_batcher_queue.max_bytes is not None
+        ):
+            body = self.codec.dumps(payload)
 
         # Log the payload
         if log.isEnabledFor(logging.INFO):
             log.info(">>> %s", json.dumps(payload))
 
-        future = concurrent.futures.Future()
-        self.query_batcher_queue.put((payload, future))
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        return BatchItem(payload, future, body, idempotent, deadline, merge)
+
+    def _put_timeout(self, deadline: Optional[float]) -> Optional[float]:
+        # a full queue doesn't hold the caller past its deadline
+        timeout = self.query_batcher_queue.timeout
+        if deadline is not None:
+            remaining = max(0.0, deadline - time.monotonic())
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+    def _store_future(
+        self, key: Hashable, ttl: float, future: concurrent.futures.Future
+    ) -> None:
+        assert self.response_cache is not None
 
-        return FutureExecResult(future=future)
+        if future.cancelled() or future.exception() is not None:
+            self.response_cache.release(key)
+        else:
+            self._store_response(key, ttl, future.result())
@@ -1,14 +1,16 @@
 import hmac
-import json
 import time
 from hashlib import sha512
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
 
+from ...codecs import JSONCodec, default_codec
 
-def hmac_sha512(secret_key: str, timestamp: int, body: str) -> str:
+
+def hmac_sha512(secret_key: str, timestamp: int, body: Union[str, bytes]) -> str:
     key = bytearray(secret_key, "utf-8")
-    msg = str(timestamp) + str(body)
-    msg = msg.encode("utf-8")
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    msg = str(timestamp).encode("utf-8") + body
     return hmac.HMAC(key, msg, sha512).hexdigest()
 
 
@@ -17,17 +19,23 @@ def get_unix_timestamp_in_ms() -> int:
 
 
 class HeadersBuilder:
-    def __init__(self, api_key: str, secret_key: str) -> None:
+    def __init__(
+        self, api_key: str, secret_key: str, codec: Optional[JSONCodec] = None
+    ) -> None:
         self.api_key = api_key
         self.secret_key = secret_key
+        self.codec = codec or default_codec()
 
     def build(
         self,
         payload: Union[Dict[str, Any], List[Dict[str, Any]]],
     ) -> Dict[str, str]:
-        data = json.dumps(payload)
+        return self.build_for_body(self.codec.dumps(payload))
+
+    def build_for_body(self, body: bytes) -> Dict[str, str]:
+        """Headers signing `body`, which must be the exact bytes sent."""
         timestamp = get_unix_timestamp_in_ms()
-        signature = hmac_sha512(self.secret_key, timestamp, data)
+        signature = hmac_sha512(self.secret_key, timestamp, body)
 
         headers = {
             "Content-Type": "application/json",
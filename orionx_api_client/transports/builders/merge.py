@@ -0,0 +1,149 @@
+import copy
+import functools
+from typing import Any, Dict, List, Sequence, Tuple
+
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    NameNode,
+    OperationDefinitionNode,
+    OperationType,
+    SelectionSetNode,
+    VariableNode,
+    Visitor,
+    parse,
+    visit,
+)
+from graphql.language.printer import print_ast
+
+
+def mergeable(document: DocumentNode) -> bool:
+    """
+    Whether the document can be merged with others: a single query without
+    directives or fragments, selecting fields at its root.
+    """
+    if len(document.definitions) != 1:
+        return False
+    operation = document.definitions[0]
+    return (
+        isinstance(operation, OperationDefinitionNode)
+        and operation.operation == OperationType.QUERY
+        and not operation.directives
+        and all(
+            isinstance(selection, FieldNode)
+            for selection in operation.selection_set.selections
+        )
+    )
+
+
+class RenameVariables(Visitor):
+    def __init__(self, prefix: str) -> None:
+        super().__init__()
+        self.prefix = prefix
+
+    def enter_variable(self, node: VariableNode, *args: Any) -> VariableNode:
+        return VariableNode(name=NameNode(value=self.prefix + node.name.value))
+
+
+class MergedQuery:
+    """
+    A query answering several mergeable queries at once. Their root fields
+    are aliased and their variables renamed with the prefix `q<i>_`, where
+    `i` is the position of the query in the merged ones.
+
+    `fields` holds, for each merged query, its response keys along with
+    their alias in the merged query.
+    """
+
+    __slots__ = ("query", "fields", "owners")
+
+    def __init__(self, queries: Sequence[str]) -> None:
+        variable_definitions = []
+        selections = []
+        self.fields: List[List[Tuple[str, str]]] = []
+
+        for i, query in enumerate(queries):
+            prefix = f"q{i}_"
+            operation = visit(parse(query).definitions[0], RenameVariables(prefix))
+            variable_definitions.extend(operation.variable_definitions or ())
+
+            fields: Dict[str, str] = {}
+            for field in operation.selection_set.selections:
+                key = (field.alias or field.name).value
+                field = copy.copy(field)
+                field.alias = NameNode(value=prefix + key)
+                selections.append(field)
+                fields[key] = field.alias.value
+            self.fields.append(list(fields.items()))
+
+        self.owners = {
+            alias: (i, key)
+            for i, fields in enumerate(self.fields)
+            for key, alias in fields
+        }
+        self.query = print_ast(
+            DocumentNode(
+                definitions=[
+                    OperationDefinitionNode(
+                        operation=OperationType.QUERY,
+                        variable_definitions=variable_definitions,
+                        directives=[],
+                        selection_set=SelectionSetNode(selections=selections),
+                    )
+                ]
+            )
+        )
+
+    def payload(self, payloads: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """The payload of the merged query for the `payloads` merged."""
+        variables = {
+            f"q{i}_{name}": value
+            for i, payload in enumerate(payloads)
+            for name, value in (payload.get("variables") or {}).items()
+        }
+
+        merged: Dict[str, Any] = {"query": self.query}
+        if variables:
+            merged["variables"] = variables
+        return merged
+
+    def split(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        The result of each merged query. Errors are given back to the query
+        whose field they point to, and to every query when they don't.
+        """
+        results: List[Dict[str, Any]] = [{} for _ in self.fields]
+        if "data" in result:
+            data = result["data"]
+            for query_result, fields in zip(results, self.fields):
+                # null when the whole operation failed, as in the merged result
+                query_result["data"] = (
+                    None
+                    if data is None
+                    else {key: data.get(alias) for key, alias in fields}
+                )
+
+        for error in result.get("errors") or ():
+            path = error.get("path") if isinstance(error, dict) else None
+            owner = self.owners.get(path[0]) if path else None
+            if owner is None:
+                for query_result in results:
+                    query_result.setdefault("errors", []).append(error)
+                continue
+
+            i, key = owner
+            error = {**error, "path": [key, *path[1:]]}
+            # they point into the merged query
+            error.pop("locations", None)
+            results[i].setdefault("errors", []).append(error)
+
+        if "extensions" in result:
+            for query_result in results:
+                query_result["extensions"] = result["extensions"]
+        return results
+
+
+@functools.lru_cache(maxsize=128)
+def merged_query(queries: Tuple[str, ...]) -> MergedQuery:
+    """The merged query of `queries`, built once for each combination."""
+    return MergedQuery(queries)
@@ -1,17 +1,57 @@
-from typing import Any, Dict, Optional
+import json
+import threading
+import weakref
+from typing import Any, Dict, Hashable, Optional
 
-from graphql import DocumentNode
+from graphql import DocumentNode, OperationType, get_operation_ast
 from graphql.language.printer import print_ast
 
 
 class PayloadBuilder:
-    @staticmethod
+    # keyed by identity: documents hash and compare structurally, so a weak
+    # key would be dropped along with whichever equal document came first
+    _printed_queries: Dict[int, str] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def print_query(cls, document: DocumentNode) -> str:
+        try:
+            return cls._printed_queries[id(document)]
+        except KeyError:
+            pass
+
+        query_str = print_ast(document)
+
+        with cls._lock:
+            if id(document) not in cls._printed_queries:
+                cls._printed_queries[id(document)] = query_str
+                weakref.finalize(document, cls._forget, id(document))
+
+        return query_str
+
+    @classmethod
+    def _forget(cls, key: int) -> None:
+        with cls._lock:
+            cls._printed_queries.pop(key, None)
+
+    @classmethod
     def build(
+        cls,
         document: DocumentNode,
         variable_values: Optional[Dict[str, Any]] = None,
         operation_name: Optional[str] = None,
     ) -> Dict[str, Any]:
-        query_str = print_ast(document)
+        return cls.build_from_text(
+            cls.print_query(document), variable_values, operation_name
+        )
+
+    @staticmethod
+    def build_from_text(
+        query_str: str,
+        variable_values: Optional[Dict[str, Any]] = None,
+        operation_name: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Build the payload of a query that is already printed."""
         payload: Dict[str, Any] = {"query": query_str}
 
         if operation_name:
@@ -21,3 +61,24 @@ class PayloadBuilder:
             payload["variables"] = variable_values
 
         return payload
+
+
+def payload_key(payload: Dict[str, Any]) -> Optional[Hashable]:
+    """
+    Identify a request by its query, variables and operation name, or None
+    when the variables can't be serialized canonically.
+    """
+    try:
+        variables = json.dumps(
+            payload.get("variables"), sort_keys=True, separators=(",", ":")
+        )
+    except (TypeError, ValueError):
+        return None
+
+    return (payload["query"], variables, payload.get("operationName"))
+
+
+def is_idempotent(document: DocumentNode, operation_name: Optional[str]) -> bool:
+    """Whether the operation is a query, which is safe to share or resend."""
+    operation = get_operation_ast(document, operation_name)
+    return operation is not None and operation.operation == OperationType.QUERY
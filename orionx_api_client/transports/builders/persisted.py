@@ -0,0 +1,133 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+NOT_FOUND = "PersistedQueryNotFound"
+NOT_SUPPORTED = "PersistedQueryNotSupported"
+
+
+def error_code(errors: Optional[List[Dict[str, Any]]]) -> Optional[str]:
+    """NOT_FOUND or NOT_SUPPORTED when `errors` reject a persisted query."""
+    for error in errors or ():
+        if not isinstance(error, dict):
+            continue
+        code = (error.get("extensions") or {}).get("code")
+        if error.get("message") == NOT_FOUND or code == "PERSISTED_QUERY_NOT_FOUND":
+            return NOT_FOUND
+        if (
+            error.get("message") == NOT_SUPPORTED
+            or code == "PERSISTED_QUERY_NOT_SUPPORTED"
+        ):
+            return NOT_SUPPORTED
+    return None
+
+
+class PersistedQueries:
+    """
+    Registry of the queries sent as Automatic Persisted Queries: a payload
+    carries the sha256 hash of its query instead of the text once the server
+    knows the hash.
+
+    A query is sent in full along with its hash the first time, registering
+    it, and only by hash after the server answered it. With `optimistic`,
+    hashes not registered by this client are tried alone first, in case the
+    server learnt them from another one.
+
+    A server that lost a hash answers PersistedQueryNotFound: the transport
+    sends the query again in full, registering it again. A server answering
+    PersistedQueryNotSupported turns persisted queries off.
+
+    `hits` counts payloads sent by hash only, `registered` those sent in
+    full with a hash, and `misses` the hashes the server didn't know.
+
+    The hashes of at most `maxsize` queries are kept, the least recently
+    used one is forgotten first and sent in full again when it comes back.
+    """
+
+    def __init__(self, optimistic: bool = False, maxsize: int = 1024) -> None:
+        assert maxsize > 0
+        self.optimistic = optimistic
+        self.supported = True
+        self.maxsize = maxsize
+
+        self.hits = 0
+        self.registered = 0
+        self.misses = 0
+
+        self._hashes: "OrderedDict[str, str]" = OrderedDict()
+        self._known: "OrderedDict[str, bool]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hash_for(self, query: str) -> str:
+        with self._lock:
+            digest = self._hashes.get(query)
+            if digest is not None:
+                self._hashes.move_to_end(query)
+                return digest
+
+        digest = hashlib.sha256(query.encode("utf-8")).hexdigest()
+        with self._lock:
+            self._hashes[query] = digest
+            self._trim(self._hashes)
+        return digest
+
+    def _trim(self, entries: "OrderedDict[str, Any]") -> None:
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+
+    def encode(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """The payload to send in place of `payload`."""
+        if not self.supported:
+            return payload
+
+        query = payload["query"]
+        digest = self.hash_for(query)
+        encoded = {key: value for key, value in payload.items() if key != "query"}
+        encoded["extensions"] = {
+            **payload.get("extensions", {}),
+            "persistedQuery": {"version": 1, "sha256Hash": digest},
+        }
+
+        with self._lock:
+            known = self._known.get(digest, self.optimistic)
+            if digest in self._known:
+                self._known.move_to_end(digest)
+            if known:
+                self.hits += 1
+                return encoded
+            self.registered += 1
+
+        encoded["query"] = query
+        return encoded
+
+    def is_persisted(self, encoded: Dict[str, Any]) -> bool:
+        """Whether `encoded` was sent without the query text."""
+        return "query" not in encoded
+
+    def answered(
+        self, encoded: Dict[str, Any], errors: Optional[List[Dict[str, Any]]]
+    ) -> bool:
+        """
+        Record the answer to `encoded`. False when it must be sent again,
+        which then sends the query in full.
+        """
+        persisted = encoded.get("extensions", {}).get("persistedQuery")
+        if persisted is None:
+            return True
+
+        digest = persisted["sha256Hash"]
+        code = error_code(errors)
+
+        with self._lock:
+            if code == NOT_SUPPORTED:
+                self.supported = False
+                return False
+            if code == NOT_FOUND:
+                self.misses += 1
+                self._known[digest] = False
+                self._trim(self._known)
+                return not self.is_persisted(encoded)
+            self._known[digest] = True
+            self._trim(self._known)
+            return True
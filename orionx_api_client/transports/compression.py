@@ -0,0 +1,86 @@
+import gzip
+import threading
+from typing import Dict, Optional
+
+from urllib3.util.request import ACCEPT_ENCODING
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+
+class Compression:
+    """
+    Compresses request bodies of at least `min_size` bytes with `encoding`
+    (GZIP, or ZSTD with the zstandard package), at `level`, and asks for
+    compressed responses with `accept_encoding`.
+
+    Bodies are signed before they are compressed: the signature covers the
+    JSON the server reads once it has decoded the Content-Encoding. The
+    default `accept_encoding` lists the encodings urllib3 can decode, the
+    ones requests decompresses on its own.
+
+    Bodies that don't shrink are sent as they are. `requests` counts the
+    bodies sent, `compressed` those compressed, and `nbytes` and
+    `wire_nbytes` their size before and after compression.
+    """
+
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+    def __init__(
+        self,
+        encoding: str = GZIP,
+        min_size: int = 1024,
+        level: Optional[int] = None,
+        accept_encoding: str = ACCEPT_ENCODING,
+    ) -> None:
+        assert encoding in (self.GZIP, self.ZSTD)
+        assert min_size >= 0
+        if encoding == self.ZSTD and zstandard is None:
+            raise ImportError("zstd compression requires the zstandard package")
+        self.encoding = encoding
+        self.min_size = min_size
+        self.level = level
+        self.accept_encoding = accept_encoding
+
+        self.requests = 0
+        self.compressed = 0
+        self.nbytes = 0
+        self.wire_nbytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def ratio(self) -> float:
+        """Bytes sent over bytes before compression."""
+        return self.wire_nbytes / self.nbytes if self.nbytes else 1.0
+
+    def compress(self, body: bytes) -> bytes:
+        if self.encoding == self.ZSTD:
+            level = 3 if self.level is None else self.level
+            return zstandard.ZstdCompressor(level=level).compress(body)
+
+        level = 6 if self.level is None else self.level
+        return gzip.compress(body, compresslevel=level, mtime=0)
+
+    def encode(self, body: bytes, headers: Dict[str, str]) -> bytes:
+        """
+        Bytes to send for the signed `body`, adding the Accept-Encoding and
+        Content-Encoding headers to `headers`.
+        """
+        headers["Accept-Encoding"] = self.accept_encoding
+
+        content = body
+        if len(body) >= self.min_size:
+            compressed = self.compress(body)
+            if len(compressed) < len(body):
+                content = compressed
+                headers["Content-Encoding"] = self.encoding
+
+        with self._lock:
+            self.requests += 1
+            self.compressed += content is not body
+            self.nbytes += len(body)
+            self.wire_nbytes += len(content)
+        return content
@@ -1,11 +1,30 @@
-from typing import Any, Dict, Optional
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Hashable, Optional
 
+import requests
+from gql.transport.exceptions import (
+    TransportAlreadyConnected,
+    TransportClosed,
+    TransportError,
+    TransportProtocolError,
+    TransportServerError,
+)
 from gql.transport.requests import RequestsHTTPTransport
 from graphql import DocumentNode
 from graphql.execution import ExecutionResult
 
+from ..codecs import JSONCodec, default_codec
+from ..response_cache import ResponseCache
 from .builders.headers import HeadersBuilder
-from .builders.payload import PayloadBuilder
+from .builders.payload import PayloadBuilder, is_idempotent, payload_key
+from .builders.persisted import PersistedQueries
+from .compression import Compression
+from .pool import ConnectionPool
+from .rate_limit import MUTATION, QUERY, RateLimiter
+
+log = logging.getLogger(__name__)
 
 
 class OrionxHTTPTransport(RequestsHTTPTransport):
@@ -14,10 +33,56 @@ class OrionxHTTPTransport(RequestsHTTPTransport):
         api_key: str,
         secret_key: str,
         *args: Any,
+        codec: Optional[JSONCodec] = None,
+        response_cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        connection_pool: Optional[ConnectionPool] = None,
+        http2: bool = False,
+        compression: Optional[Compression] = None,
+        persisted_queries: Optional[PersistedQueries] = None,
         **kwargs: Any,
     ) -> None:
         super(OrionxHTTPTransport, self).__init__(*args, **kwargs)
-        self.headers_builder = HeadersBuilder(api_key, secret_key)
+        self.codec = codec or default_codec()
+        self.headers_builder = HeadersBuilder(api_key, secret_key, self.codec)
+        self.response_cache = response_cache
+        # a cache shared between clients keeps their accounts and servers apart
+        self._cache_scope = (
+            self.url,
+            hashlib.sha256(api_key.encode("utf-8")).hexdigest(),
+        )
+        self.rate_limiter = rate_limiter
+        self.connection_pool = connection_pool
+        self.http2 = http2
+        self.compression = compression
+        self.persisted_queries = persisted_queries
+
+    def connect(self):
+        if self.http2:
+            # httpx is only imported when HTTP/2 is used
+            from .http2 import HTTP2Session
+
+            if self.session is not None:
+                raise TransportAlreadyConnected("Transport is already connected")
+            self.session = HTTP2Session(  # type: ignore
+                self.url, self.verify, self.connection_pool
+            )
+            return
+
+        super().connect()
+
+        if self.connection_pool is not None:
+            assert self.session is not None
+            for prefix in "http://", "https://":
+                adapter = self.session.get_adapter(prefix)
+                self.session.mount(
+                    prefix,
+                    self.connection_pool.adapter(max_retries=adapter.max_retries),
+                )
+
+    def _acquire_rate_limit(self, priority: int = QUERY) -> None:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(self.headers_builder.api_key, priority)
 
     def execute(
         self,
@@ -27,20 +92,209 @@ class OrionxHTTPTransport(RequestsHTTPTransport):
         timeout: Optional[int] = None,
         extra_args: Optional[Dict[str, Any]] = None,
         upload_files: bool = False,
+        query_str: Optional[str] = None,
     ) -> ExecutionResult:
-        headers = self.headers_builder.build(
-            PayloadBuilder.build(
+        # a prepared query comes printed already
+        if query_str is None:
+            query_str = PayloadBuilder.print_query(document)
+        payload = PayloadBuilder.build_from_text(
+            query_str,
+            variable_values,
+            operation_name,
+        )
+
+        priority = QUERY
+        if self.rate_limiter is not None and not is_idempotent(
+            document, operation_name
+        ):
+            priority = MUTATION
+
+        if upload_files:
+            if self.http2:
+                raise TransportError(
+                    "File uploads are only sent over HTTP/1.1, "
+                    "create the transport with http2=False"
+                )
+            self._acquire_rate_limit(priority)
+            headers = self.headers_builder.build(payload)
+            return super().execute(
                 document,
                 variable_values,
                 operation_name,
+                timeout,
+                {**(extra_args or {}), **{"headers": headers}},
+                upload_files,
             )
-        )
 
-        return super().execute(
-            document,
-            variable_values,
-            operation_name,
+        cache = self.response_cache
+        ttl = cache.ttl_for(document, operation_name) if cache is not None else None
+        key = self._response_key(payload) if ttl is not None else None
+
+        if cache is None or ttl is None or key is None:
+            return self._execute_payload(payload, timeout, extra_args, priority)
+
+        cached, refresh = cache.get(key)
+        if refresh:
+            threading.Thread(
+                target=self._refresh_response,
+                args=(key, ttl, payload, timeout, extra_args),
+                daemon=True,
+            ).start()
+
+        if cached is not None:
+            return ExecutionResult(
+                data=cached.get("data"), extensions=cached.get("extensions")
+            )
+
+        result = self._execute_payload(payload, timeout, extra_args)
+        self._store_response(key, ttl, result)
+        return result
+
+    def _execute_payload(
+        self,
+        payload: Dict[str, Any],
+        timeout: Optional[int] = None,
+        extra_args: Optional[Dict[str, Any]] = None,
+        priority: int = QUERY,
+    ) -> ExecutionResult:
+        persisted_queries = self.persisted_queries
+        if persisted_queries is None:
+            return self._send_payload(payload, timeout, extra_args, priority)
+
+        while True:
+            encoded = persisted_queries.encode(payload)
+            result = self._send_payload(encoded, timeout, extra_args, priority)
+            # sent again in full when the server doesn't know the hash
+            if persisted_queries.answered(encoded, result.errors):
+                return result
+
+    def _send_payload(
+        self,
+        payload: Dict[str, Any],
+        timeout: Optional[int] = None,
+        extra_args: Optional[Dict[str, Any]] = None,
+        priority: int = QUERY,
+    ) -> ExecutionResult:
+        # wait before signing, the timestamp has to be fresh when sent
+        self._acquire_rate_limit(priority)
+
+        body = self.codec.dumps(payload)
+        headers = self.headers_builder.build_for_body(body)
+
+        return self._execute_body(
+            body,
             timeout,
             {**(extra_args or {}), **{"headers": headers}},
-            upload_files,
+        )
+
+    def _response_key(self, payload: Dict[str, Any]) -> Optional[Hashable]:
+        """Key of a response in the cache, or None when it can't be cached."""
+        key = payload_key(payload)
+        return None if key is None else (self._cache_scope, key)
+
+    def _refresh_response(
+        self,
+        key: Hashable,
+        ttl: float,
+        payload: Dict[str, Any],
+        timeout: Optional[int] = None,
+        extra_args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        assert self.response_cache is not None
+
+        try:
+            result = self._execute_payload(payload, timeout, extra_args)
+        except Exception as e:
+            log.warning("Could not refresh a cached response: %s", e)
+            self.response_cache.release(key)
+            return
+
+        self._store_response(key, ttl, result)
+
+    def _store_response(self, key: Hashable, ttl: float, result: Any) -> None:
+        assert self.response_cache is not None
+
+        if isinstance(result, ExecutionResult):
+            result = {
+                "data": result.data,
+                "errors": result.errors,
+                "extensions": result.extensions,
+            }
+        self.response_cache.store(key, ttl, result)
+
+    def _execute_body(
+        self,
+        body: bytes,
+        timeout: Optional[int] = None,
+        extra_args: Optional[Dict[str, Any]] = None,
+    ) -> ExecutionResult:
+        # Same as RequestsHTTPTransport.execute, but posts the exact bytes that
+        # were signed instead of serializing the payload again
+
+        if not self.session:
+            raise TransportClosed("Transport is not connected")
+
+        post_args = {
+            "headers": self.headers,
+            "auth": self.auth,
+            "cookies": self.cookies,
+            "timeout": timeout or self.default_timeout,
+            "verify": self.verify,
+            "data": body,
+        }
+
+        # Log the payload
+        if log.isEnabledFor(logging.INFO):
+            log.info(">>> %s", body.decode("utf-8"))
+
+        # Pass kwargs to requests post method
+        post_args.update(self.kwargs)
+
+        # Pass post_args to requests post method
+        if extra_args:
+            post_args.update(extra_args)
+
+        if self.compression is not None:
+            headers = post_args["headers"] = dict(post_args["headers"] or {})
+            post_args["data"] = self.compression.encode(body, headers)
+
+        # Using the created session to perform requests
+        response = self.session.request(
+            self.method, self.url, **post_args  # type: ignore
+        )
+        self.response_headers = response.headers
+
+        def raise_response_error(resp: requests.Response, reason: str):
+            # We raise a TransportServerError if the status code is 400 or higher
+            # We raise a TransportProtocolError in the other cases
+
+            try:
+                # Raise a HTTPError if response status is 400 or higher
+                resp.raise_for_status()
+            except requests.HTTPError as e:
+                raise TransportServerError(str(e), e.response.status_code) from e
+
+            result_text = resp.text
+            raise TransportProtocolError(
+                f"Server did not return a GraphQL result: "
+                f"{reason}: "
+                f"{result_text}"
+            )
+
+        try:
+            result = self.codec.loads(response.content)
+
+            if log.isEnabledFor(logging.INFO):
+                log.info("<<< %s", response.text)
+
+        except Exception:
+            raise_response_error(response, "Not a JSON answer")
+
+        if "errors" not in result and "data" not in result:
+            raise_response_error(response, 'No "data" or "errors" keys in answer')
+
+        return ExecutionResult(
+            errors=result.get("errors"),
+            data=result.get("data"),
+            extensions=result.get("extensions"),
         )
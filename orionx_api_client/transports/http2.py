@@ -0,0 +1,139 @@
+import asyncio
+import threading
+from typing import Any, Dict, Optional, Union
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .pool import ConnectionPool
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None  # type: ignore
+
+
+class HTTP2Session:
+    """
+    Takes the place of the requests.Session of the HTTP transports, sending
+    through an httpx client that speaks HTTP/2.
+
+    Concurrent requests, such as the batches of a batch transport with
+    `max_in_flight` > 1, are multiplexed as streams over a single connection
+    instead of holding a connection each. HTTPS negotiates HTTP/2 with the
+    server; plain http:// URLs speak HTTP/2 with prior knowledge (h2c).
+
+    The sync httpx client can't share an HTTP/2 connection between threads
+    safely, so requests are sent by an AsyncClient running on an event loop
+    thread of its own, and the calling threads wait for their response.
+
+    Responses and errors are converted to their requests counterparts, so the
+    transports sign, send and parse requests the same way over both protocols.
+    A `connection_pool` sets the limits of the httpx client and counts the
+    connections it creates and reuses.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        verify: Union[bool, str] = True,
+        connection_pool: Optional[ConnectionPool] = None,
+    ) -> None:
+        if httpx is None:
+            raise ImportError(
+                "HTTP/2 requires httpx with h2, install it with "
+                "pip install 'orionx-api-client[http2]'"
+            )
+
+        limits = httpx.Limits()
+        if connection_pool is not None:
+            limits = httpx.Limits(
+                max_connections=connection_pool.connections * connection_pool.maxsize,
+                max_keepalive_connections=connection_pool.maxsize,
+                keepalive_expiry=connection_pool.keepalive_expiry,
+            )
+        self.connection_pool = connection_pool
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name="orionx-http2", daemon=True
+        )
+        self.thread.start()
+        self.client = self._run(
+            self._create_client(not url.startswith("http://"), verify, limits)
+        )
+
+    @staticmethod
+    async def _create_client(
+        http1: bool, verify: Union[bool, str], limits: "httpx.Limits"
+    ) -> "httpx.AsyncClient":
+        # the client binds to the loop it is created in
+        return httpx.AsyncClient(http1=http1, http2=True, verify=verify, limits=limits)
+
+    def _run(self, coro: Any) -> Any:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        auth: Any = None,
+        cookies: Any = None,
+        timeout: Optional[float] = None,
+        verify: Any = None,
+        data: Optional[bytes] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        # verify is a setting of the client, given when it is created
+        if auth is not None:
+            kwargs["auth"] = auth
+        if self.connection_pool is not None:
+            kwargs["extensions"] = {"trace": ConnectionTrace(self.connection_pool)}
+
+        try:
+            response = self._run(
+                self.client.request(
+                    method,
+                    url,
+                    headers=headers,
+                    cookies=cookies,
+                    content=data,
+                    timeout=timeout,
+                    **kwargs,
+                )
+            )
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(str(e)) from e
+
+        converted = requests.Response()
+        converted.status_code = response.status_code
+        converted.reason = response.reason_phrase
+        converted.headers = CaseInsensitiveDict(response.headers)
+        converted.url = str(response.url)
+        converted.encoding = response.encoding
+        converted._content = response.content
+        return converted
+
+    def close(self) -> None:
+        self._run(self.client.aclose())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+class ConnectionTrace:
+    """Counts whether a request opened a connection or reused one."""
+
+    def __init__(self, connection_pool: ConnectionPool) -> None:
+        self.connection_pool = connection_pool
+        self.created = False
+
+    async def __call__(self, event: str, info: Dict[str, Any]) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.created = True
+            self.connection_pool.record(created=1)
+        elif event.endswith(".send_request_headers.started") and not self.created:
+            self.connection_pool.record(reused=1)
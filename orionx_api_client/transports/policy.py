@@ -0,0 +1,104 @@
+from typing import Optional
+
+
+class BatchPolicy:
+    """
+    Decides when the batcher stops collecting queued queries and sends them.
+
+    A batch is flushed as soon as it reaches `max_batch_size` items or its
+    request body reaches `max_batch_bytes` bytes, or when `max_linger` seconds have
+    passed since its first item was dequeued.
+
+    When `adaptive` is enabled the linger window follows the observed arrival
+    rate: the batcher only keeps waiting while the next query is expected to
+    arrive soon, so an idle client sends right away and a saturated client
+    fills its batches.
+
+    A batch is also flushed `deadline_margin` seconds before the earliest
+    deadline of its queries, leaving that long for the round-trip.
+    """
+
+    MIN_LINGER = 0.0005
+
+    def __init__(
+        self,
+        max_batch_size: int = 100,
+        max_batch_bytes: Optional[int] = None,
+        max_linger: float = 0.01,
+        adaptive: bool = True,
+        smoothing: float = 0.2,
+        deadline_margin: float = 0.005,
+    ) -> None:
+        assert max_batch_size > 0
+        assert max_batch_bytes is None or max_batch_bytes > 0
+        assert max_linger >= 0
+        assert 0 < smoothing <= 1
+        assert deadline_margin >= 0
+
+        self.max_batch_size = max_batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.max_linger = max_linger
+        self.adaptive = adaptive
+        self.smoothing = smoothing
+        self.deadline_margin = deadline_margin
+
+        self.mean_interarrival: Optional[float] = None
+        self._last_arrival: Optional[float] = None
+
+    def observe_arrival(self, timestamp: float) -> None:
+        if self._last_arrival is not None:
+            # long idle gaps are clamped so a burst after a pause is
+            # recognized within a few arrivals
+            gap = min(max(0.0, timestamp - self._last_arrival), 2 * self.max_linger)
+            if self.mean_interarrival is None:
+                self.mean_interarrival = gap
+            else:
+                self.mean_interarrival += self.smoothing * (
+                    gap - self.mean_interarrival
+                )
+        self._last_arrival = max(timestamp, self._last_arrival or timestamp)
+
+    @staticmethod
+    def body_size(count: int, nbytes: int) -> int:
+        """Size of the JSON array of `count` items serialized in `nbytes`."""
+        # brackets and the commas between items
+        return nbytes + max(count - 1, 0) + 2
+
+    def is_full(self, count: int, nbytes: int) -> bool:
+        if count >= self.max_batch_size:
+            return True
+        return (
+            self.max_batch_bytes is not None
+            and self.body_size(count, nbytes) >= self.max_batch_bytes
+        )
+
+    def fits(self, count: int, nbytes: int, item_size: int) -> bool:
+        if count == 0:
+            # a single oversized item still has to be sent on its own
+            return True
+        if count + 1 > self.max_batch_size:
+            return False
+        if self.max_batch_bytes is None:
+            return True
+        return self.body_size(count + 1, nbytes + item_size) <= self.max_batch_bytes
+
+    def linger(self, elapsed: float, time_left: Optional[float] = None) -> float:
+        """
+        Seconds to keep waiting for another item, 0 means flush now.
+        `time_left` is the time until the earliest deadline in the batch.
+        """
+        remaining = self.max_linger - elapsed
+        if time_left is not None:
+            remaining = min(remaining, time_left - self.deadline_margin)
+        if remaining <= 0:
+            return 0.0
+
+        if not self.adaptive:
+            return remaining
+
+        if self.mean_interarrival is None or self.mean_interarrival > remaining:
+            # nothing else is expected within the window
+            return 0.0
+
+        # give the next arrival some slack before assuming the burst ended
+        return min(remaining, max(2 * self.mean_interarrival, self.MIN_LINGER))
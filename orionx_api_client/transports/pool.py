@@ -0,0 +1,207 @@
+import functools
+import logging
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from requests.adapters import DEFAULT_POOLBLOCK, DEFAULT_POOLSIZE, HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+if TYPE_CHECKING:
+    import aiohttp
+
+log = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    Settings of the HTTP connections kept open to the API, and counters of
+    what happened to them.
+
+    - `connections` hosts get a pool of their own (only the API host is used
+      in practice).
+    - `maxsize` connections are kept open per host. Threads sending at the
+      same time beyond it open extra connections that are discarded
+      afterwards, unless `block` is set: then they wait for a free one.
+    - `keepalive_expiry` closes connections idle for longer than that many
+      seconds instead of reusing them, before the server or a proxy drops
+      them. None keeps them open until the server closes them.
+    - `tcp_nodelay` disables Nagle's algorithm, so small requests aren't
+      delayed waiting for the previous ACK.
+
+    `created` counts the connections opened, `reused` the requests sent on an
+    already open connection and `discarded` the connections closed by the
+    pool: overflow beyond `maxsize`, expired or dropped by the server.
+
+    The aiohttp transports keep `connections * maxsize` connections in total
+    and always set TCP_NODELAY.
+    """
+
+    def __init__(
+        self,
+        connections: int = DEFAULT_POOLSIZE,
+        maxsize: int = DEFAULT_POOLSIZE,
+        keepalive_expiry: Optional[float] = None,
+        tcp_nodelay: bool = True,
+        block: bool = DEFAULT_POOLBLOCK,
+    ) -> None:
+        assert connections > 0
+        assert maxsize > 0
+        assert keepalive_expiry is None or keepalive_expiry > 0
+        self.connections = connections
+        self.maxsize = maxsize
+        self.keepalive_expiry = keepalive_expiry
+        self.tcp_nodelay = tcp_nodelay
+        self.block = block
+
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+        self._lock = threading.Lock()
+
+    def record(self, created: int = 0, reused: int = 0, discarded: int = 0) -> None:
+        with self._lock:
+            self.created += created
+            self.reused += reused
+            self.discarded += discarded
+
+    @property
+    def reuse_rate(self) -> float:
+        requests = self.created + self.reused
+        return self.reused / requests if requests else 0.0
+
+    def adapter(self, **kwargs: Any) -> HTTPAdapter:
+        """HTTPAdapter to mount on a requests session."""
+        return PooledHTTPAdapter(self, **kwargs)
+
+    def connector(self) -> "aiohttp.TCPConnector":
+        """aiohttp connector, it has to be created inside the event loop."""
+        import aiohttp
+
+        pool = self
+
+        class PooledTCPConnector(aiohttp.TCPConnector):
+            def _release(self, key: Any, protocol: Any, **kwargs: Any) -> None:
+                if not self.closed and (
+                    self.force_close
+                    or kwargs.get("should_close")
+                    or protocol.should_close
+                ):
+                    pool.record(discarded=1)
+                super()._release(key, protocol, **kwargs)
+
+        kwargs: Any = {}
+        if self.keepalive_expiry is not None:
+            kwargs["keepalive_timeout"] = self.keepalive_expiry
+        return PooledTCPConnector(
+            limit=self.connections * self.maxsize,
+            limit_per_host=self.maxsize,
+            **kwargs,
+        )
+
+    def session_args(self) -> Dict[str, Any]:
+        """aiohttp.ClientSession arguments, inside the event loop."""
+        return {"connector": self.connector(), "trace_configs": [self.trace_config()]}
+
+    def trace_config(self) -> "aiohttp.TraceConfig":
+        import aiohttp
+
+        async def on_create(*args: Any) -> None:
+            self.record(created=1)
+
+        async def on_reuse(*args: Any) -> None:
+            self.record(reused=1)
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(on_create)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+        return trace_config
+
+
+class PoolStatsMixin:
+    """Counts the connections of a urllib3 pool in a ConnectionPool."""
+
+    stats: ConnectionPool
+
+    def __init__(self, *args: Any, stats: ConnectionPool, **kwargs: Any) -> None:
+        self.stats = stats
+        super().__init__(*args, **kwargs)  # type: ignore
+
+    def _get_conn(self, timeout: Optional[float] = None) -> HTTPConnection:
+        conn = super()._get_conn(timeout)  # type: ignore
+        released_at = getattr(conn, "released_at", None)
+
+        if conn.sock is not None:
+            expiry = self.stats.keepalive_expiry
+            if (
+                expiry is None
+                or released_at is None
+                or time.monotonic() - released_at <= expiry
+            ):
+                self.stats.record(reused=1)
+                return conn
+            conn.close()
+
+        # a new connection, or a pooled one that expired or was dropped
+        self.stats.record(created=1, discarded=int(released_at is not None))
+        return conn
+
+    def _put_conn(self, conn: Optional[HTTPConnection]) -> None:
+        if conn is not None:
+            conn.released_at = time.monotonic()  # type: ignore
+
+        try:
+            self.pool.put(conn, block=False)  # type: ignore
+            return
+        except AttributeError:
+            # the pool is closed
+            pass
+        except queue.Full:
+            self.stats.record(discarded=1)
+            log.warning(
+                "Connection pool is full, discarding connection: %s. "
+                "Increase ConnectionPool(maxsize=%s) to keep it open",
+                self.host,  # type: ignore
+                self.stats.maxsize,
+            )
+
+        if conn:
+            conn.close()
+
+
+class PooledHTTPConnectionPool(PoolStatsMixin, HTTPConnectionPool):
+    pass
+
+
+class PooledHTTPSConnectionPool(PoolStatsMixin, HTTPSConnectionPool):
+    pass
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter with the settings of a ConnectionPool, counting into it."""
+
+    def __init__(self, connection_pool: ConnectionPool, **kwargs: Any) -> None:
+        self.connection_pool = connection_pool
+        super().__init__(
+            pool_connections=connection_pool.connections,
+            pool_maxsize=connection_pool.maxsize,
+            pool_block=connection_pool.block,
+            **kwargs,
+        )
+
+    def init_poolmanager(self, *args: Any, **pool_kwargs: Any) -> None:
+        pool_kwargs.setdefault(
+            "socket_options",
+            HTTPConnection.default_socket_options
+            if self.connection_pool.tcp_nodelay
+            else [],
+        )
+        super().init_poolmanager(*args, **pool_kwargs)
+
+        stats = self.connection_pool
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": functools.partial(PooledHTTPConnectionPool, stats=stats),
+            "https": functools.partial(PooledHTTPSConnectionPool, stats=stats),
+        }
@@ -0,0 +1,132 @@
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Mapping, Optional
+
+# lower values are dispatched first
+MUTATION = 0
+QUERY = 1
+
+
+class Ticket:
+    __slots__ = ("key", "priority", "cost", "seq", "granted")
+
+    def __init__(self, key: str, priority: int, cost: float, seq: int) -> None:
+        self.key = key
+        self.priority = priority
+        self.cost = cost
+        self.seq = seq
+        self.granted = False
+
+
+class RateLimiter:
+    """
+    Token bucket shared by the transports of one or more API keys.
+
+    Tokens are refilled at `rate` per second up to `burst`, and every HTTP
+    request takes one of them (a whole batch is a single request). Waiting
+    requests are granted by priority first, so mutations go before queued
+    queries, and then by weighted fair share between API keys: a key with
+    weight 2 gets twice the requests of a key with weight 1 while both wait.
+    Keys default to a weight of 1.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        weights: Optional[Mapping[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        assert rate > 0
+        assert burst is None or burst >= 1
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.weights = dict(weights or {})
+        assert all(weight > 0 for weight in self.weights.values())
+        self.clock = clock
+
+        self.tokens = self.burst
+        self.granted = 0
+        self.throttled = 0
+        self._updated_at = clock()
+        self._virtual_time = 0.0
+        self._finish_times: Dict[str, float] = {}
+        self._waiting: List[Ticket] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def submit(self, key: str, priority: int = QUERY, cost: float = 1.0) -> Ticket:
+        """Queue a request; it may go once `dispatch` grants its ticket."""
+        with self._cond:
+            ticket = Ticket(key, priority, min(cost, self.burst), next(self._seq))
+            self._waiting.append(ticket)
+            return ticket
+
+    def dispatch(self) -> float:
+        """
+        Grant waiting tickets while there are tokens for them. Returns the
+        seconds until the next waiting ticket can be granted, 0 when none wait.
+        """
+        with self._cond:
+            return self._dispatch()
+
+    def acquire(self, key: str, priority: int = QUERY, cost: float = 1.0) -> None:
+        """Block until the request may be sent."""
+        ticket = self.submit(key, priority, cost)
+
+        with self._cond:
+            delay = self._dispatch()
+            if ticket.granted:
+                return
+
+            self.throttled += 1
+            while True:
+                self._cond.wait(delay or None)
+                delay = self._dispatch()
+                if ticket.granted:
+                    return
+
+    def _refill(self) -> None:
+        now = self.clock()
+        elapsed = max(0.0, now - self._updated_at)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    def _dispatch(self) -> float:
+        self._refill()
+
+        granted = False
+        while self._waiting:
+            ticket = self._next_ticket()
+            if self.tokens < ticket.cost:
+                if granted:
+                    self._cond.notify_all()
+                return (ticket.cost - self.tokens) / self.rate
+
+            self.tokens -= ticket.cost
+            self._waiting.remove(ticket)
+            self._grant(ticket)
+            granted = True
+
+        if granted:
+            self._cond.notify_all()
+        return 0.0
+
+    def _next_ticket(self) -> Ticket:
+        def order(ticket: Ticket):
+            return (ticket.priority, self._start_time(ticket.key), ticket.seq)
+
+        return min(self._waiting, key=order)
+
+    def _start_time(self, key: str) -> float:
+        # idle keys don't bank credit while others are served
+        return max(self._finish_times.get(key, 0.0), self._virtual_time)
+
+    def _grant(self, ticket: Ticket) -> None:
+        start = self._start_time(ticket.key)
+        weight = self.weights.get(ticket.key, 1.0)
+        self._virtual_time = start
+        self._finish_times[ticket.key] = start + ticket.cost / weight
+        self.granted += 1
+        ticket.granted = True
@@ -0,0 +1,66 @@
+import random
+import threading
+from typing import Callable, Optional
+
+
+class RetryPolicy:
+    """
+    Decides how queries that failed inside a batch are sent again.
+
+    Only queries are retried, never mutations: the server may have executed
+    a mutation whose answer got lost. A query is sent at most `max_attempts`
+    times, waiting a random time (full jitter) of up to
+    `backoff * 2 ** (attempt - 1)` seconds, capped at `max_backoff`, before
+    going back to the batcher queue.
+
+    Retries are also limited by a budget so an outage doesn't turn into a
+    retry storm: every answered batch adds `budget_ratio` to it, up to
+    `budget_capacity`, and every retried batch takes 1.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff: float = 0.05,
+        max_backoff: float = 2.0,
+        budget_ratio: float = 0.2,
+        budget_capacity: float = 10.0,
+        rng: Optional[Callable[[], float]] = None,
+    ) -> None:
+        assert max_attempts >= 1
+        assert 0 <= backoff <= max_backoff
+        assert budget_ratio >= 0
+        assert budget_capacity >= 1
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget_ratio = budget_ratio
+        self.budget_capacity = budget_capacity
+        self.rng = rng or random.random
+
+        self.budget = budget_capacity
+        self.retries = 0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def can_retry(self, attempts: int) -> bool:
+        """Whether a query already sent `attempts` times may be sent again."""
+        return attempts < self.max_attempts
+
+    def delay(self, attempts: int) -> float:
+        """Seconds to wait before sending a query for the `attempts + 1` time."""
+        ceiling = min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+        return ceiling * self.rng()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.budget = min(self.budget_capacity, self.budget + self.budget_ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.budget < 1:
+                self.exhausted += 1
+                return False
+            self.budget -= 1
+            self.retries += 1
+            return True
@@ -0,0 +1,74 @@
+import threading
+from typing import Any, Callable, Iterator, List
+
+import pytest
+import requests
+from gql import gql
+from graphql import DocumentNode
+from pytest_mock import MockerFixture
+
+from orionx_api_client.transports.batch import OrionxBatchTransport
+
+from .server import SentBatches
+
+QUERY = gql(
+    """
+    query getOrderBook($marketCode: ID!) {
+        marketOrderBook(marketCode: $marketCode, limit: 50) {
+            spread
+        }
+    }
+    """
+)
+
+
+@pytest.fixture
+def query() -> DocumentNode:
+    """An order book query taking a `marketCode`."""
+    return QUERY
+
+
+@pytest.fixture
+def sent() -> SentBatches:
+    return SentBatches()
+
+
+@pytest.fixture
+def release() -> Iterator[threading.Event]:
+    """Holds the requests of slow transports until it is set."""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+@pytest.fixture
+def make_transport(
+    mocker: MockerFixture, sent: SentBatches, release: threading.Event
+) -> Iterator[Callable[..., OrionxBatchTransport]]:
+    """
+    Build connected batch transports, closed after the test. Their batches go
+    to `sent` instead of the network, after `release` is set if `slow`.
+    """
+    transports: List[OrionxBatchTransport] = []
+
+    def make(slow: bool = False, **kwargs: Any) -> OrionxBatchTransport:
+        transport = OrionxBatchTransport(
+            "api_key", "secret_key", url="http://localhost/graphql", **kwargs
+        )
+        transport.connect()
+        transports.append(transport)
+
+        def slow_request(**post_args: Any) -> requests.Response:
+            release.wait(timeout=5)
+            return sent(**post_args)
+
+        mocker.patch.object(
+            transport, "_request", side_effect=slow_request if slow else sent
+        )
+        return transport
+
+    yield make
+
+    release.set()
+    for transport in transports:
+        transport.close()
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import socket
+import threading
+from typing import Any, Dict, List, Tuple
+
+import h2.config
+import h2.connection
+import h2.events
+from requests.structures import CaseInsensitiveDict
+
+from .server import StandInServer
+
+
+class H2StandInServer(StandInServer):
+    """
+    StandInServer speaking cleartext HTTP/2 with prior knowledge (h2c).
+
+    Requests are answered concurrently, each on its own stream, and
+    `connections` counts the connections the clients opened.
+    """
+
+    def _listen(self) -> Tuple[str, int]:
+        self.connections = 0
+        self.loop = asyncio.new_event_loop()
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(128)
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        return self.sock.getsockname()[:2]
+
+    def __exit__(self, *args: Any) -> None:
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def _serve(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self._serve_connection, sock=self.sock)
+        )
+        self.loop.run_forever()
+
+    async def _shutdown(self) -> None:
+        self.server.close()
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _serve_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.connections += 1
+        writer.get_extra_info("socket").setsockopt(
+            socket.IPPROTO_TCP, socket.TCP_NODELAY, 1
+        )
+        conn = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        )
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+
+        streams: Dict[int, Tuple[CaseInsensitiveDict, bytearray]] = {}
+        window_updated = asyncio.Event()
+        answers: List[asyncio.Task] = []
+
+        while True:
+            try:
+                data = await reader.read(65535)
+            except asyncio.CancelledError:
+                # the server is shutting down
+                break
+            if not data:
+                break
+
+            for event in conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    headers = CaseInsensitiveDict(
+                        (name, value)
+                        for name, value in event.headers
+                        if not name.startswith(":")
+                    )
+                    streams[event.stream_id] = (headers, bytearray())
+                elif isinstance(event, h2.events.DataReceived):
+                    streams[event.stream_id][1].extend(event.data)
+                    conn.acknowledge_received_data(
+                        event.flow_controlled_length, event.stream_id
+                    )
+                elif isinstance(event, h2.events.StreamEnded):
+                    headers, body = streams.pop(event.stream_id)
+                    answers.append(
+                        asyncio.create_task(
+                            self._answer(
+                                conn,
+                                writer,
+                                window_updated,
+                                event.stream_id,
+                                headers,
+                                bytes(body),
+                            )
+                        )
+                    )
+                elif isinstance(event, h2.events.WindowUpdated):
+                    window_updated.set()
+
+            writer.write(conn.data_to_send())
+
+        for answer in answers:
+            answer.cancel()
+        writer.close()
+
+    async def _answer(
+        self,
+        conn: h2.connection.H2Connection,
+        writer: asyncio.StreamWriter,
+        window_updated: asyncio.Event,
+        stream_id: int,
+        headers: CaseInsensitiveDict,
+        body: bytes,
+    ) -> None:
+        wire_size = len(body)
+        body = self.decode_body(headers, body)
+        with self.lock:
+            self.requests.append(
+                {"headers": headers, "body": body, "wire_size": wire_size}
+            )
+
+        if self.max_body is not None and wire_size > self.max_body:
+            status, response = 413, b""
+        else:
+            with self.lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                response = self.respond(json.loads(body))
+            finally:
+                with self.lock:
+                    self.in_flight -= 1
+            status = self.status
+
+        response, content_encoding = self.encode_response(headers, response)
+        response_headers = [
+            (":status", str(status)),
+            ("content-type", "application/json"),
+            ("content-length", str(len(response))),
+        ]
+        if content_encoding:
+            response_headers.append(("content-encoding", content_encoding))
+        conn.send_headers(stream_id, response_headers)
+
+        while response:
+            window = min(
+                conn.local_flow_control_window(stream_id), conn.max_outbound_frame_size
+            )
+            if window <= 0:
+                window_updated.clear()
+                await window_updated.wait()
+                continue
+            conn.send_data(stream_id, response[:window])
+            response = response[window:]
+            writer.write(conn.data_to_send())
+
+        conn.end_stream(stream_id)
+        writer.write(conn.data_to_send())
+        await writer.drain()
@@ -0,0 +1,327 @@
+import gzip
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from unittest.mock import MagicMock
+
+import requests
+from graphql import build_schema, graphql_sync
+
+Handler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+SCHEMA = build_schema(
+    """
+    type MarketBookOrder {
+        limitPrice: Float
+        amount: Float
+    }
+
+    type MarketOrderBook {
+        buy: [MarketBookOrder]
+        sell: [MarketBookOrder]
+        spread: Float
+        mid: Float
+    }
+
+    enum MarketStatsAggregation {
+        h1
+        d1
+    }
+
+    type MarketStatsPoint {
+        _id: ID
+        open: Float
+        close: Float
+        high: Float
+        low: Float
+        volume: Float
+        count: Float
+        fromDate: Float
+        toDate: Float
+    }
+
+    type Currency {
+        code: ID
+        units: Int
+        format: String
+        longFormat: String
+    }
+
+    type Trade {
+        price: Float
+    }
+
+    type Market {
+        code: ID
+        lastTrade: Trade
+        secondaryCurrency: Currency
+    }
+
+    type Order {
+        _id: ID
+        status: String
+    }
+
+    type Query {
+        marketOrderBook(marketCode: ID!, limit: Int): MarketOrderBook
+        marketStats(
+            marketCode: ID!
+            aggregation: MarketStatsAggregation!
+        ): [MarketStatsPoint]
+        market(code: ID): Market
+    }
+
+    type Mutation {
+        placeLimitOrder(
+            marketCode: ID!
+            amount: Float!
+            limitPrice: Float!
+            sell: Boolean!
+        ): Order
+        cancelOrder(orderId: ID!): Order
+    }
+    """
+)
+
+
+def order_book(market_code: str, limit: int = 50) -> Dict[str, Any]:
+    base = 1000.0 + sum(map(ord, market_code))
+    buy = [{"limitPrice": base - i, "amount": 0.5 + i} for i in range(limit)]
+    sell = [{"limitPrice": base + 1 + i, "amount": 0.25 + i} for i in range(limit)]
+    return {"buy": buy, "sell": sell, "spread": 1.0, "mid": base + 0.5}
+
+
+class Root:
+    def marketOrderBook(self, info, marketCode: str, limit: int = 50):
+        return order_book(marketCode, limit)
+
+    def marketStats(self, info, marketCode: str, aggregation: str):
+        return [{"_id": f"{marketCode}-{aggregation}", "open": 1.0, "close": 2.0}]
+
+    def market(self, info, code: Optional[str] = None):
+        return {"code": code, "lastTrade": {"price": 1.0}}
+
+    def placeLimitOrder(self, info, **args: Any):
+        return {"_id": "order", "status": "OPEN"}
+
+    def cancelOrder(self, info, orderId: str):
+        return {"_id": orderId, "status": "CANCELED"}
+
+
+def echo_handler(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {"data": {"variables": payload.get("variables")}}
+
+
+def graphql_handler(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return graphql_sync(
+        SCHEMA,
+        payload["query"],
+        root_value=Root(),
+        variable_values=payload.get("variables"),
+        operation_name=payload.get("operationName"),
+    ).formatted
+
+
+class StandInServer:
+    """
+    Local stand-in for the Orionx GraphQL endpoint.
+
+    Every POST is decoded, each operation is answered by `handler` and the
+    response is delayed by `delay` seconds to emulate the network round-trip.
+    Set `raw_response` to bypass the handler and return fixed bytes, and
+    `max_body` to reject larger request bodies with a 413.
+
+    Compressed request bodies are decoded, and `requests` records them as the
+    signature covers them along with their `wire_size`. Responses are gzipped
+    for clients accepting it when `gzip_responses` is set.
+
+    Set `persisted_queries` to a dict to accept Automatic Persisted Queries,
+    storing the queries by hash. Payloads without a query are otherwise
+    answered PersistedQueryNotSupported.
+    """
+
+    def __init__(
+        self,
+        handler: Handler = echo_handler,
+        delay: float = 0.0,
+    ) -> None:
+        self.handler = handler
+        self.delay = delay
+        self.raw_response: Optional[bytes] = None
+        self.status = 200
+        self.max_body: Optional[int] = None
+        self.gzip_responses = False
+        self.persisted_queries: Optional[Dict[str, str]] = None
+        self.requests: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        self.address = self._listen()
+
+    def _listen(self) -> Tuple[str, int]:
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        return self.httpd.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}/graphql"
+
+    def __enter__(self) -> "StandInServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                body = server.decode_body(self.headers, self.rfile.read(length))
+
+                with server.lock:
+                    server.requests.append(
+                        {
+                            "headers": dict(self.headers),
+                            "body": body,
+                            "wire_size": length,
+                        }
+                    )
+                    if server.max_body is not None and length > server.max_body:
+                        self.send_error(413)
+                        return
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+
+                try:
+                    if server.delay:
+                        time.sleep(server.delay)
+                    response = server.respond(json.loads(body))
+                finally:
+                    with server.lock:
+                        server.in_flight -= 1
+
+                response, content_encoding = server.encode_response(
+                    self.headers, response
+                )
+
+                self.send_response(server.status)
+                self.send_header("Content-Type", "application/json")
+                if content_encoding:
+                    self.send_header("Content-Encoding", content_encoding)
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+        return RequestHandler
+
+    def decode_body(self, headers: Mapping[str, str], body: bytes) -> bytes:
+        encoding = headers.get("Content-Encoding")
+        if encoding == "gzip":
+            return gzip.decompress(body)
+        if encoding == "zstd":
+            import zstandard
+
+            return zstandard.ZstdDecompressor().decompress(body)
+        return body
+
+    def encode_response(
+        self, headers: Mapping[str, str], response: bytes
+    ) -> Tuple[bytes, Optional[str]]:
+        if self.gzip_responses and "gzip" in headers.get("Accept-Encoding", ""):
+            return gzip.compress(response), "gzip"
+        return response, None
+
+    def respond(self, body: Any) -> bytes:
+        if self.raw_response is not None:
+            return self.raw_response
+
+        if isinstance(body, list):
+            result: Any = [self.answer(payload) for payload in body]
+        else:
+            result = self.answer(body)
+
+        return json.dumps(result).encode("utf-8")
+
+    def answer(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        persisted = (payload.get("extensions") or {}).get("persistedQuery")
+        if persisted is None:
+            return self.handler(payload)
+
+        if self.persisted_queries is None:
+            if "query" in payload:
+                return self.handler(payload)
+            return persisted_query_error("PersistedQueryNotSupported")
+
+        digest = persisted["sha256Hash"]
+        if "query" in payload:
+            query = payload["query"]
+            if hashlib.sha256(query.encode("utf-8")).hexdigest() != digest:
+                return {"errors": [{"message": "provided sha does not match query"}]}
+            with self.lock:
+                self.persisted_queries[digest] = query
+        else:
+            with self.lock:
+                query = self.persisted_queries.get(digest)
+            if query is None:
+                return persisted_query_error("PersistedQueryNotFound")
+
+        return self.handler({**payload, "query": query})
+
+
+def persisted_query_error(message: str) -> Dict[str, Any]:
+    code = "PERSISTED_QUERY_NOT_FOUND"
+    if message == "PersistedQueryNotSupported":
+        code = "PERSISTED_QUERY_NOT_SUPPORTED"
+    return {"errors": [{"message": message, "extensions": {"code": code}}]}
+
+
+class SentBatches:
+    """Stands in for the batch transport's requests, answering each query."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.batches: List[Tuple[float, List[Dict[str, Any]]]] = []
+
+    def __call__(self, **post_args: Any) -> requests.Response:
+        payloads = json.loads(post_args["data"])
+        with self.lock:
+            self.batches.append((time.monotonic(), payloads))
+
+        response = MagicMock(spec=requests.Response)
+        response.headers = {}
+        response.status_code = 200
+        response.content = json.dumps(
+            [
+                {"data": {"marketCode": payload["variables"]["marketCode"]}}
+                for payload in payloads
+            ]
+        ).encode("utf-8")
+        return response
+
+    def sent_at(self, market_code: str) -> float:
+        for sent_at, payloads in self.batches:
+            for payload in payloads:
+                if payload["variables"]["marketCode"] == market_code:
+                    return sent_at
+        raise KeyError(market_code)
+
+    @property
+    def sizes(self) -> List[int]:
+        return [len(payloads) for _, payloads in self.batches]
@@ -0,0 +1,221 @@
+import asyncio
+import json
+
+import pytest
+from gql import gql
+from gql.transport.exceptions import TransportClosed
+from graphql import ExecutionResult
+
+from orionx_api_client import BatchPolicy
+from orionx_api_client.transports.builders.headers import hmac_sha512
+
+from .server import StandInServer, graphql_handler
+
+pytest.importorskip("aiohttp")
+
+from orionx_api_client.async_client import AsyncOrionx  # noqa: E402
+from orionx_api_client.transports.aiohttp import OrionxAIOHTTPTransport  # noqa: E402
+from orionx_api_client.transports.async_batch import (  # noqa: E402
+    OrionxAsyncBatchTransport,
+)
+
+ORDER_BOOK_QUERY = """
+    query getOrderBook($marketCode: ID!) {
+        orderBook: marketOrderBook(marketCode: $marketCode, limit: 2) {
+            buy {
+                limitPrice
+                amount
+            }
+            spread
+        }
+    }
+"""
+
+
+def assert_signed(request: dict) -> None:
+    headers = request["headers"]
+    assert headers["X-ORIONX-APIKEY"] == "api_key"
+    assert headers["X-ORIONX-SIGNATURE"] == hmac_sha512(
+        "secret_key",
+        int(headers["X-ORIONX-TIMESTAMP"]),
+        request["body"].decode("utf-8"),
+    )
+
+
+def test_async_client_using_string_and_dsl() -> None:
+    async def main(url: str) -> None:
+        async with AsyncOrionx("api_key", "secret_key", url=url) as session:
+            result = await session.execute(
+                ORDER_BOOK_QUERY, variable_values={"marketCode": "BTCCLP"}
+            )
+            assert result["orderBook"]["spread"] == 1.0
+
+            ds = session.dsl()
+            query = ds.Query.marketOrderBook.args(marketCode="BTCCLP").select(
+                ds.MarketOrderBook.spread
+            )
+            session.validate(query)
+            assert await session.execute(query) == {"marketOrderBook": {"spread": 1.0}}
+
+    with StandInServer(graphql_handler) as server:
+        asyncio.run(main(server.url))
+
+    for request in server.requests:
+        assert_signed(request)
+
+
+def test_async_transport_posts_the_signed_bytes() -> None:
+    signed = []
+
+    async def main(url: str) -> None:
+        transport = OrionxAIOHTTPTransport("api_key", "secret_key", url=url)
+        build_for_body = transport.headers_builder.build_for_body
+
+        def spy(body: bytes) -> dict:
+            signed.append(body)
+            return build_for_body(body)
+
+        transport.headers_builder.build_for_body = spy  # type: ignore
+        await transport.connect()
+        result = await transport.execute(
+            gql(ORDER_BOOK_QUERY), {"marketCode": "BTCCLP"}
+        )
+        assert result.data["orderBook"]["spread"] == 1.0
+        await transport.close()
+
+    with StandInServer(graphql_handler) as server:
+        asyncio.run(main(server.url))
+
+    assert [request["body"] for request in server.requests] == signed
+    assert server.requests[0]["headers"]["Content-Type"] == "application/json"
+    assert_signed(server.requests[0])
+
+
+@pytest.mark.parametrize(
+    "option",
+    [
+        {"batch_policy": BatchPolicy(max_batch_size=10)},
+        {"max_in_flight": 4},
+        {"deduplicate": False},
+    ],
+)
+def test_batching_options_require_batching(option: dict) -> None:
+    with pytest.raises(ValueError):
+        AsyncOrionx("api_key", "secret_key", **option)
+
+
+def test_async_batching_coalesces_concurrent_queries() -> None:
+    markets = [f"M{i}" for i in range(200)]
+
+    async def main(url: str) -> list:
+        client = AsyncOrionx(
+            "api_key",
+            "secret_key",
+            url=url,
+            batching=True,
+            batch_policy=BatchPolicy(max_batch_size=100),
+        )
+        async with client as session:
+            return await asyncio.gather(
+                *(
+                    session.execute(
+                        ORDER_BOOK_QUERY, variable_values={"marketCode": market}
+                    )
+                    for market in markets
+                )
+            )
+
+    with StandInServer(graphql_handler) as server:
+        results = asyncio.run(main(server.url))
+
+    for market, result in zip(markets, results):
+        assert isinstance(result, ExecutionResult)
+        assert result.errors is None
+        expected = 1000.0 + sum(map(ord, market))
+        assert result.data["orderBook"]["buy"][0]["limitPrice"] == expected
+
+    # the introspection query goes first, then the coalesced queries
+    sizes = [len(json.loads(request["body"])) for request in server.requests[1:]]
+    assert sum(sizes) == 200
+    assert max(sizes) == 100
+    assert len(sizes) <= 3
+    for request in server.requests:
+        assert_signed(request)
+
+
+def test_async_batching_deduplicates_identical_queries() -> None:
+    async def main(url: str) -> tuple:
+        client = AsyncOrionx("api_key", "secret_key", url=url, batching=True)
+        async with client as session:
+            results = await asyncio.gather(
+                *(
+                    session.execute(
+                        ORDER_BOOK_QUERY, variable_values={"marketCode": "BTCCLP"}
+                    )
+                    for _ in range(50)
+                )
+            )
+            return results, client.client.transport.stats
+
+    with StandInServer(graphql_handler) as server:
+        results, stats = asyncio.run(main(server.url))
+
+    assert all(result.data == results[0].data for result in results)
+    # the introspection query went through the batcher as well
+    assert stats.items == 51
+    assert stats.deduplicated == 49
+    sizes = [len(json.loads(request["body"])) for request in server.requests[1:]]
+    assert sizes == [1]
+
+
+def test_async_close_fails_lingering_queries() -> None:
+    async def main(url: str) -> None:
+        transport = OrionxAsyncBatchTransport(
+            "api_key",
+            "secret_key",
+            url=url,
+            batch_policy=BatchPolicy(max_linger=1.0, adaptive=False),
+        )
+        await transport.connect()
+        execution = asyncio.ensure_future(
+            transport.execute(gql(ORDER_BOOK_QUERY), {"marketCode": "BTCCLP"})
+        )
+        await asyncio.sleep(0.1)
+        await transport.close()
+
+        with pytest.raises(TransportClosed):
+            await asyncio.wait_for(execution, 1)
+
+    with StandInServer(graphql_handler) as server:
+        asyncio.run(main(server.url))
+
+    assert server.requests == []
+
+
+def test_async_close_fails_queries_waiting_for_a_sender() -> None:
+    async def main(url: str) -> None:
+        transport = OrionxAsyncBatchTransport(
+            "api_key",
+            "secret_key",
+            url=url,
+            batch_policy=BatchPolicy(max_batch_size=1),
+        )
+        await transport.connect()
+        sent, waiting = [
+            asyncio.ensure_future(
+                transport.execute(gql(ORDER_BOOK_QUERY), {"marketCode": code})
+            )
+            for code in ("BTCCLP", "ETHCLP")
+        ]
+        await asyncio.sleep(0.1)
+        await transport.close()
+
+        result = await asyncio.wait_for(sent, 1)
+        assert result.data == {"variables": {"marketCode": "BTCCLP"}}
+        with pytest.raises(TransportClosed):
+            await asyncio.wait_for(waiting, 1)
+
+    with StandInServer(delay=0.3) as server:
+        asyncio.run(main(server.url))
+
+    assert len(server.requests) == 1
@@ -0,0 +1,60 @@
+import time
+from typing import Any, Dict
+
+import pytest
+from gql.transport.exceptions import TransportServerError
+
+from orionx_api_client import Orionx
+
+from .server import StandInServer, graphql_handler
+
+INTROSPECTION_DELAY = 0.3
+
+MARKET_QUERY = """
+    query getMarket($code: ID) {
+        market(code: $code) {
+            code
+        }
+    }
+"""
+
+
+def slow_introspection_handler(payload: Dict[str, Any]) -> Dict[str, Any]:
+    if "IntrospectionQuery" in payload["query"]:
+        time.sleep(INTROSPECTION_DELAY)
+    return graphql_handler(payload)
+
+
+@pytest.mark.parametrize("batching", [False, True])
+def test_string_queries_do_not_wait_for_the_schema(batching: bool) -> None:
+    with StandInServer(slow_introspection_handler) as server:
+        client = Orionx(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            batching=batching,
+            background_schema=True,
+        )
+
+        started_at = time.monotonic()
+        with client as session:
+            result = session.execute(MARKET_QUERY, variable_values={"code": "BTCCLP"})
+            if batching:
+                result = result.data
+            assert result == {"market": {"code": "BTCCLP"}}
+            assert time.monotonic() - started_at < INTROSPECTION_DELAY
+
+            ds = session.dsl()
+            assert time.monotonic() - started_at >= INTROSPECTION_DELAY
+            session.validate(ds.Query.market.args(code="BTCCLP").select(ds.Market.code))
+
+
+def test_schema_errors_are_raised_by_dsl() -> None:
+    with StandInServer(slow_introspection_handler) as server:
+        server.status = 500
+        server.raw_response = b"Internal Server Error"
+        client = Orionx("api_key", "secret_key", url=server.url, background_schema=True)
+
+        with client as session:
+            with pytest.raises(TransportServerError):
+                session.dsl()
@@ -0,0 +1,174 @@
+import concurrent.futures
+import threading
+import time
+from typing import Callable
+
+import pytest
+from graphql import DocumentNode
+
+from orionx_api_client.transports.backpressure import BatchQueue, BatchQueueFull
+from orionx_api_client.transports.batch import BatchItem, OrionxBatchTransport
+from orionx_api_client.transports.policy import BatchPolicy
+
+
+def make_item(size: int = 10, idempotent: bool = True) -> BatchItem:
+    return BatchItem(
+        {"query": "{ a }"}, concurrent.futures.Future(), b"x" * size, idempotent
+    )
+
+
+def test_reject_when_full() -> None:
+    batch_queue = BatchQueue(max_items=2, overflow=BatchQueue.REJECT)
+    batch_queue.put(make_item())
+    batch_queue.put(make_item())
+
+    with pytest.raises(BatchQueueFull):
+        batch_queue.put(make_item())
+
+    assert batch_queue.depth == 2
+    assert batch_queue.max_depth == 2
+    assert batch_queue.rejected == 1
+
+
+def test_put_many_fails_what_does_not_fit() -> None:
+    batch_queue = BatchQueue(max_items=2, overflow=BatchQueue.REJECT)
+    items = [make_item() for _ in range(4)]
+    batch_queue.put_many(items)
+
+    assert batch_queue.depth == 2
+    assert batch_queue.rejected == 2
+    assert not items[1].future.done()
+    for item in items[2:]:
+        with pytest.raises(BatchQueueFull):
+            item.future.result(0)
+
+
+def test_rejected_query_can_be_queued_again() -> None:
+    batch_queue = BatchQueue(max_items=1, overflow=BatchQueue.REJECT)
+    first, rejected = make_item(), make_item()
+    rejected.future.add_done_callback(lambda _: batch_queue.get_nowait())
+
+    putter = threading.Thread(
+        target=batch_queue.put_many, args=([first, rejected],), daemon=True
+    )
+    putter.start()
+    putter.join(timeout=1)
+
+    assert not putter.is_alive()
+    assert batch_queue.depth == 0
+
+
+def test_capacity_in_bytes() -> None:
+    batch_queue = BatchQueue(max_bytes=25, overflow=BatchQueue.REJECT)
+    batch_queue.put(make_item(size=10))
+    batch_queue.put(make_item(size=10))
+    assert batch_queue.nbytes == 20
+
+    with pytest.raises(BatchQueueFull):
+        batch_queue.put(make_item(size=10))
+
+    batch_queue.get_nowait()
+    assert batch_queue.nbytes == 10
+    batch_queue.put(make_item(size=10))
+
+    # an empty queue takes an oversized item
+    batch_queue = BatchQueue(max_bytes=25, overflow=BatchQueue.REJECT)
+    batch_queue.put(make_item(size=100))
+
+
+def test_block_until_there_is_room() -> None:
+    batch_queue = BatchQueue(max_items=1, timeout=1)
+    first = make_item()
+    batch_queue.put(first)
+
+    timer = threading.Timer(0.05, batch_queue.get)
+    timer.start()
+    started_at = time.monotonic()
+    batch_queue.put(make_item())
+
+    assert time.monotonic() - started_at >= 0.04
+    assert batch_queue.depth == 1
+    timer.join()
+
+
+def test_block_with_timeout() -> None:
+    batch_queue = BatchQueue(max_items=1, timeout=0.05)
+    batch_queue.put(make_item())
+
+    started_at = time.monotonic()
+    with pytest.raises(BatchQueueFull):
+        batch_queue.put(make_item())
+
+    assert time.monotonic() - started_at >= 0.05
+    assert batch_queue.rejected == 1
+
+
+def test_drop_oldest_query() -> None:
+    batch_queue = BatchQueue(max_items=2, overflow=BatchQueue.DROP_OLDEST)
+    mutation = make_item(idempotent=False)
+    oldest = make_item()
+    newest = make_item()
+    batch_queue.put(mutation)
+    batch_queue.put(oldest)
+    batch_queue.put(newest)
+
+    with pytest.raises(BatchQueueFull):
+        oldest.future.result(timeout=0)
+
+    assert batch_queue.dropped == 1
+    assert [batch_queue.get_nowait(), batch_queue.get_nowait()] == [mutation, newest]
+
+
+def test_dropped_query_can_be_queued_again() -> None:
+    batch_queue = BatchQueue(max_items=1, overflow=BatchQueue.DROP_OLDEST)
+    oldest = make_item()
+    batch_queue.put(oldest)
+    again = make_item()
+    oldest.future.add_done_callback(lambda _: batch_queue.put(again, block=False))
+
+    putter = threading.Thread(target=batch_queue.put, args=(make_item(),), daemon=True)
+    putter.start()
+    putter.join(timeout=1)
+
+    assert not putter.is_alive()
+    assert batch_queue.dropped == 2
+    assert batch_queue.depth == 1
+
+
+def test_drop_oldest_never_drops_mutations() -> None:
+    batch_queue = BatchQueue(max_items=1, overflow=BatchQueue.DROP_OLDEST, timeout=0.01)
+    mutation = make_item(idempotent=False)
+    batch_queue.put(mutation)
+
+    with pytest.raises(BatchQueueFull):
+        batch_queue.put(make_item())
+
+    assert not mutation.future.done()
+    assert batch_queue.dropped == 0
+
+
+def test_transport_rejects_queries_while_api_is_slow(
+    make_transport: Callable[..., OrionxBatchTransport],
+    release: threading.Event,
+    query: DocumentNode,
+) -> None:
+    transport = make_transport(
+        batch_policy=BatchPolicy(max_batch_size=1),
+        batch_queue=BatchQueue(max_items=5, overflow=BatchQueue.REJECT),
+        slow=True,
+    )
+
+    results = []
+    with pytest.raises(BatchQueueFull):
+        for i in range(100):
+            results.append(transport.execute(query, {"marketCode": f"M{i}"}))
+
+    # one batch is being sent and another waits for the sender
+    assert len(results) <= 7
+    assert transport.query_batcher_queue.depth == 5
+
+    release.set()
+    for i, result in enumerate(results):
+        assert result.data == {"marketCode": f"M{i}"}
+
+    transport.close()
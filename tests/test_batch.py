@@ -0,0 +1,407 @@
+import json
+import statistics
+import threading
+import time
+from typing import Callable, List, Tuple
+
+import pytest
+import requests
+from gql import gql
+from gql.transport.exceptions import TransportClosed, TransportServerError
+from graphql import DocumentNode
+from pytest_mock import MockerFixture
+
+from orionx_api_client import RateLimiter
+from orionx_api_client.transports.batch import OrionxBatchTransport
+from orionx_api_client.transports.builders.headers import hmac_sha512
+from orionx_api_client.transports.policy import BatchPolicy
+
+from .server import SentBatches, StandInServer
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def test_policy_flushes_idle_client_immediately() -> None:
+    policy = BatchPolicy(max_linger=0.01)
+    assert policy.linger(0.0) == 0.0
+
+    for timestamp in (0.0, 1.0, 2.0, 3.0):
+        policy.observe_arrival(timestamp)
+    assert policy.linger(0.0) == 0.0
+
+
+def test_policy_lingers_for_saturated_client() -> None:
+    policy = BatchPolicy(max_linger=0.01)
+    for i in range(20):
+        policy.observe_arrival(i * 0.0001)
+
+    assert 0 < policy.linger(0.0) <= 0.01
+    assert policy.linger(0.01) == 0.0
+
+
+def test_policy_without_adaptation_waits_whole_window() -> None:
+    policy = BatchPolicy(max_linger=0.01, adaptive=False)
+    assert policy.linger(0.004) == pytest.approx(0.006)
+
+
+def test_policy_limits() -> None:
+    policy = BatchPolicy(max_batch_size=2, max_batch_bytes=100)
+    assert policy.fits(0, 0, 500)
+    # "[" + first + "," + second + "]"
+    assert policy.fits(1, 40, 57)
+    assert not policy.fits(1, 40, 58)
+    assert not policy.fits(2, 0, 1)
+    assert policy.is_full(2, 0)
+    assert policy.is_full(1, 98)
+    assert not policy.is_full(1, 97)
+
+
+def test_idle_queue_to_send_latency(
+    make_transport: Callable[..., OrionxBatchTransport],
+    sent: SentBatches,
+    query: DocumentNode,
+) -> None:
+    transport = make_transport(batch_policy=BatchPolicy(max_linger=0.01))
+
+    latencies = []
+    for i in range(30):
+        enqueued_at = time.monotonic()
+        result = transport.execute(query, {"marketCode": f"M{i}"})
+        result.future.result(timeout=1)
+        latencies.append(sent.sent_at(f"M{i}") - enqueued_at)
+        time.sleep(0.02)
+
+    transport.close()
+
+    # the previous fixed 10 ms window added its whole length to every request
+    assert statistics.median(latencies) < 0.005
+    assert percentile(latencies, 0.9) < 0.01
+    assert max(sent.sizes) == 1
+
+
+def test_saturated_client_builds_full_batches(
+    make_transport: Callable[..., OrionxBatchTransport],
+    sent: SentBatches,
+    query: DocumentNode,
+) -> None:
+    policy = BatchPolicy(max_batch_size=10, max_linger=0.05)
+    transport = make_transport(batch_policy=policy)
+
+    enqueued = {}
+    results = []
+    for i in range(200):
+        enqueued[f"M{i}"] = time.monotonic()
+        results.append(transport.execute(query, {"marketCode": f"M{i}"}))
+
+    for result in results:
+        result.future.result(timeout=5)
+
+    transport.close()
+
+    latencies = [sent.sent_at(code) - at for code, at in enqueued.items()]
+
+    assert max(sent.sizes) == 10
+    assert sum(sent.sizes) == 200
+    assert len(sent.batches) <= 25
+    assert percentile(latencies, 0.99) < 0.1
+
+
+def test_batches_respect_max_bytes(
+    make_transport: Callable[..., OrionxBatchTransport],
+    sent: SentBatches,
+    query: DocumentNode,
+) -> None:
+    policy = BatchPolicy(max_batch_bytes=1000, max_linger=0.05, adaptive=False)
+    transport = make_transport(batch_policy=policy)
+
+    results = [transport.execute(query, {"marketCode": f"M{i}"}) for i in range(40)]
+    for result in results:
+        result.future.result(timeout=5)
+
+    transport.close()
+
+    assert sum(sent.sizes) == 40
+    assert len(sent.batches) > 1
+    for _, payloads in sent.batches:
+        assert sum(len(json.dumps(payload)) for payload in payloads) <= 1000
+
+
+def run_against_slow_server(
+    query: DocumentNode, max_in_flight: int
+) -> Tuple[float, StandInServer]:
+    with StandInServer(delay=0.05) as server:
+        transport = OrionxBatchTransport(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            batch_policy=BatchPolicy(max_batch_size=1),
+            max_in_flight=max_in_flight,
+        )
+        transport.connect()
+
+        started_at = time.monotonic()
+        results = [transport.execute(query, {"marketCode": f"M{i}"}) for i in range(8)]
+        for i, result in enumerate(results):
+            assert result.data == {"variables": {"marketCode": f"M{i}"}}
+        elapsed = time.monotonic() - started_at
+
+        transport.close()
+
+    return elapsed, server
+
+
+def test_in_flight_batches_scale_with_workers(query: DocumentNode) -> None:
+    serial, serial_server = run_against_slow_server(query, 1)
+    parallel, parallel_server = run_against_slow_server(query, 4)
+
+    assert serial_server.max_in_flight == 1
+    assert parallel_server.max_in_flight == 4
+    assert parallel < serial / 2
+
+
+def test_sender_failure_resolves_futures(
+    mocker: MockerFixture,
+    make_transport: Callable[..., OrionxBatchTransport],
+    query: DocumentNode,
+) -> None:
+    transport = make_transport(batch_policy=BatchPolicy())
+    mocker.patch.object(
+        transport, "_request", side_effect=requests.ConnectionError("refused")
+    )
+
+    result = transport.execute(query, {"marketCode": "BTCCLP"})
+
+    with pytest.raises(requests.ConnectionError):
+        result.future.result(timeout=1)
+
+    transport.close()
+
+
+def test_batch_signs_the_exact_bytes_sent(query: DocumentNode) -> None:
+    with StandInServer() as server:
+        transport = OrionxBatchTransport("api_key", "secret_key", url=server.url)
+        transport.connect()
+        results = [transport.execute(query, {"marketCode": "BTCCLP"}) for _ in range(3)]
+        for result in results:
+            assert result.data == {"variables": {"marketCode": "BTCCLP"}}
+        transport.close()
+
+    for request in server.requests:
+        headers = request["headers"]
+        assert headers["Content-Type"] == "application/json"
+        assert headers["X-ORIONX-SIGNATURE"] == hmac_sha512(
+            "secret_key", int(headers["X-ORIONX-TIMESTAMP"]), request["body"]
+        )
+
+
+def test_identical_queries_are_sent_once(
+    make_transport: Callable[..., OrionxBatchTransport],
+    sent: SentBatches,
+    query: DocumentNode,
+) -> None:
+    policy = BatchPolicy(max_linger=0.05, adaptive=False)
+    transport = make_transport(batch_policy=policy)
+
+    codes = ["BTCCLP", "ETHCLP", "BTCCLP", "BTCCLP", "ETHCLP", "LTCCLP"]
+    results = [transport.execute(query, {"marketCode": code}) for code in codes]
+
+    for code, result in zip(codes, results):
+        assert result.data == {"marketCode": code}
+
+    transport.close()
+
+    assert sent.sizes == [3]
+    assert transport.stats.items == 6
+    assert transport.stats.deduplicated == 3
+    assert transport.stats.last_batch_items == 6
+    assert transport.stats.last_batch_deduplicated == 3
+
+
+def test_variables_order_does_not_matter_for_dedup(
+    make_transport: Callable[..., OrionxBatchTransport], sent: SentBatches
+) -> None:
+    query = gql(
+        """
+        query getOrderBook($marketCode: ID!, $limit: Int) {
+            marketOrderBook(marketCode: $marketCode, limit: $limit) {
+                spread
+            }
+        }
+        """
+    )
+    policy = BatchPolicy(max_linger=0.05, adaptive=False)
+    transport = make_transport(batch_policy=policy)
+
+    results = [
+        transport.execute(query, {"marketCode": "BTCCLP", "limit": 10}),
+        transport.execute(query, {"limit": 10, "marketCode": "BTCCLP"}),
+    ]
+    for result in results:
+        assert result.data == {"marketCode": "BTCCLP"}
+
+    transport.close()
+
+    assert sent.sizes == [1]
+
+
+def test_mutations_are_never_deduplicated(
+    make_transport: Callable[..., OrionxBatchTransport], sent: SentBatches
+) -> None:
+    mutation = gql(
+        """
+        mutation cancelOrder($marketCode: ID!) {
+            cancelOrder(orderId: "1", marketCode: $marketCode) {
+                _id
+            }
+        }
+        """
+    )
+    policy = BatchPolicy(max_linger=0.05, adaptive=False)
+    transport = make_transport(batch_policy=policy)
+
+    results = [transport.execute(mutation, {"marketCode": "BTCCLP"}) for _ in range(3)]
+    for result in results:
+        assert result.data == {"marketCode": "BTCCLP"}
+
+    transport.close()
+
+    assert sent.sizes == [3]
+    assert transport.stats.deduplicated == 0
+
+
+def test_deduplication_can_be_disabled(
+    make_transport: Callable[..., OrionxBatchTransport],
+    sent: SentBatches,
+    query: DocumentNode,
+) -> None:
+    transport = make_transport(
+        batch_policy=BatchPolicy(max_linger=0.05, adaptive=False),
+        deduplicate=False,
+    )
+
+    results = [transport.execute(query, {"marketCode": "BTCCLP"}) for _ in range(3)]
+    for result in results:
+        assert result.data == {"marketCode": "BTCCLP"}
+
+    transport.close()
+
+    assert sent.sizes == [3]
+
+
+def test_duplicates_share_the_failure(
+    mocker: MockerFixture,
+    make_transport: Callable[..., OrionxBatchTransport],
+    query: DocumentNode,
+) -> None:
+    policy = BatchPolicy(max_linger=0.05, adaptive=False)
+    transport = make_transport(batch_policy=policy)
+    mocker.patch.object(
+        transport, "_request", side_effect=requests.ConnectionError("refused")
+    )
+
+    results = [transport.execute(query, {"marketCode": "BTCCLP"}) for _ in range(3)]
+
+    for result in results:
+        with pytest.raises(requests.ConnectionError):
+            result.future.result(timeout=1)
+
+    transport.close()
+
+
+def test_batch_body_stays_within_max_bytes(query: DocumentNode) -> None:
+    policy = BatchPolicy(max_batch_bytes=300, max_linger=0.05, adaptive=False)
+
+    with StandInServer() as server:
+        transport = OrionxBatchTransport(
+            "api_key", "secret_key", url=server.url, batch_policy=policy
+        )
+        transport.connect()
+        results = [transport.execute(query, {"marketCode": f"M{i}"}) for i in range(20)]
+        for i, result in enumerate(results):
+            assert result.data == {"variables": {"marketCode": f"M{i}"}}
+        transport.close()
+
+    assert len(server.requests) > 1
+    for request in server.requests:
+        assert len(request["body"]) <= 300
+
+
+def test_batches_rejected_as_too_large_are_split(query: DocumentNode) -> None:
+    limiter = RateLimiter(rate=1000, burst=1000)
+
+    with StandInServer() as server:
+        server.max_body = 500
+        transport = OrionxBatchTransport(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            batch_policy=BatchPolicy(
+                max_batch_size=20, max_linger=0.05, adaptive=False
+            ),
+            max_in_flight=2,
+            rate_limiter=limiter,
+        )
+        transport.connect()
+        results = [transport.execute(query, {"marketCode": f"M{i}"}) for i in range(20)]
+        for i, result in enumerate(results):
+            assert result.data == {"variables": {"marketCode": f"M{i}"}}
+        transport.close()
+
+    assert transport.stats.splits >= 3
+    # every half is sent by one of the two senders and takes its own token
+    assert server.max_in_flight <= 2
+    assert limiter.granted == len(server.requests)
+
+    sent = [request for request in server.requests if len(request["body"]) <= 500]
+    codes = [
+        payload["variables"]["marketCode"]
+        for request in sent
+        for payload in json.loads(request["body"])
+    ]
+    assert sorted(codes) == sorted(f"M{i}" for i in range(20))
+    for request in sent:
+        headers = request["headers"]
+        assert headers["X-ORIONX-SIGNATURE"] == hmac_sha512(
+            "secret_key", int(headers["X-ORIONX-TIMESTAMP"]), request["body"]
+        )
+
+
+def test_single_query_too_large_fails(query: DocumentNode) -> None:
+    with StandInServer() as server:
+        server.max_body = 10
+        transport = OrionxBatchTransport("api_key", "secret_key", url=server.url)
+        transport.connect()
+        result = transport.execute(query, {"marketCode": "BTCCLP"})
+
+        with pytest.raises(TransportServerError) as exc_info:
+            result.future.result(timeout=5)
+        transport.close()
+
+    assert exc_info.value.code == 413
+
+
+def test_close_stops_the_batcher_and_senders(
+    make_transport: Callable[..., OrionxBatchTransport], query: DocumentNode
+) -> None:
+    threads = threading.active_count()
+    for _ in range(5):
+        transport = make_transport(batch_policy=BatchPolicy(max_batch_size=1))
+        result = transport.execute(query, {"marketCode": "BTCCLP"})
+        assert result.data == {"marketCode": "BTCCLP"}
+        transport.close()
+
+    assert threading.active_count() == threads
+
+
+def test_close_fails_queued_queries(
+    make_transport: Callable[..., OrionxBatchTransport], query: DocumentNode
+) -> None:
+    transport = make_transport(batch_policy=BatchPolicy(max_linger=5, adaptive=False))
+    result = transport.execute(query, {"marketCode": "BTCCLP"})
+    transport.close()
+
+    with pytest.raises(TransportClosed):
+        result.future.result(timeout=1)
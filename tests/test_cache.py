@@ -0,0 +1,55 @@
+from orionx_api_client import Orionx
+from orionx_api_client.cache import DocumentCache
+
+from .server import StandInServer, graphql_handler
+
+MARKET_QUERY = """
+    query getMarket($code: ID) {
+        market(code: $code) {
+            code
+        }
+    }
+"""
+
+
+def test_document_cache_reuses_parsed_documents() -> None:
+    cache = DocumentCache(maxsize=2)
+
+    first = cache.get(MARKET_QUERY)
+    assert cache.get(MARKET_QUERY) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_document_cache_evicts_least_recently_used() -> None:
+    cache = DocumentCache(maxsize=2)
+    queries = ["{ a }", "{ b }", "{ c }"]
+
+    a = cache.get(queries[0])
+    cache.get(queries[1])
+    assert cache.get(queries[0]) is a
+    cache.get(queries[2])
+
+    assert len(cache) == 2
+    assert cache.get(queries[0]) is a
+    cache.get(queries[1])
+    assert cache.misses == 4
+
+
+def test_document_cache_disabled() -> None:
+    cache = DocumentCache(maxsize=0)
+
+    assert cache.get(MARKET_QUERY) is not cache.get(MARKET_QUERY)
+    assert len(cache) == 0
+    assert cache.misses == 2
+
+
+def test_session_parses_repeated_queries_once() -> None:
+    with StandInServer(graphql_handler) as server:
+        client = Orionx("api_key", "secret_key", url=server.url)
+        with client as session:
+            for code in ("BTCCLP", "ETHCLP", "BTCCLP"):
+                result = session.execute(MARKET_QUERY, variable_values={"code": code})
+                assert result == {"market": {"code": code}}
+
+    assert client.document_cache.misses == 1
+    assert client.document_cache.hits == 2
@@ -341,6 +341,7 @@ def test_json_has_no_keys(mocker: MockerFixture, batch_client: Orionx) -> None:
         response_mock.status_code = 200
         response_mock.json.return_value = [{}]
         response_mock.text = "[{}]"
+        response_mock.content = b"[{}]"
         mock.return_value = response_mock
 
         query = """
@@ -382,6 +383,7 @@ def test_no_list_response(mocker: MockerFixture, batch_client: Orionx) -> None:
         response_mock.status_code = 200
         response_mock.json.return_value = {}
         response_mock.text = "{}"
+        response_mock.content = b"{}"
         mock.return_value = response_mock
 
         query = """
@@ -423,6 +425,7 @@ def test_list_mismatch_length(mocker: MockerFixture, batch_client: Orionx) -> No
         response_mock.status_code = 200
         response_mock.json.return_value = []
         response_mock.text = "[]"
+        response_mock.content = b"[]"
         mock.return_value = response_mock
 
         query = """
@@ -464,6 +467,7 @@ def test_list_with_invalid_content(mocker: MockerFixture, batch_client: Orionx)
         response_mock.status_code = 200
         response_mock.json.return_value = "[[]]"
         response_mock.text = "[[]]"
+        response_mock.content = b"[[]]"
         mock.return_value = response_mock
 
         query = """
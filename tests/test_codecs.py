@@ -0,0 +1,104 @@
+import json
+
+import pytest
+from gql import gql
+
+from orionx_api_client.codecs import JSONCodec, OrjsonCodec, default_codec
+from orionx_api_client.transports.builders.headers import HeadersBuilder, hmac_sha512
+from orionx_api_client.transports.builders.payload import PayloadBuilder
+from orionx_api_client.transports.http import OrionxHTTPTransport
+
+from .server import StandInServer, order_book
+
+QUERY = gql(
+    """
+    query getOrderBook($marketCode: ID!) {
+        orderBook: marketOrderBook(marketCode: $marketCode, limit: 50) {
+            buy {
+                limitPrice
+                amount
+            }
+            spread
+        }
+    }
+    """
+)
+
+BODIES = [
+    PayloadBuilder.build(QUERY, {"marketCode": "BTCCLP"}, "getOrderBook"),
+    [PayloadBuilder.build(QUERY, {"marketCode": f"M{i}"}) for i in range(10)],
+    {"variables": {"memo": 'cañón ₿ "quoted" \\ / \n', "amount": 0.1, "n": -3}},
+    {"variables": {"amounts": [1e-05, 1e16, 0.1 + 0.2, 5e-324, -0.0, 2**63 - 1]}},
+    [{"data": {"orderBook": order_book("BTCCLP")}} for _ in range(3)],
+    {"data": None, "errors": [{"message": "Not found", "path": ["market", 0]}]},
+]
+
+
+def codecs() -> list:
+    available = [JSONCodec()]
+    try:
+        available.append(OrjsonCodec())
+    except ImportError:
+        pass
+    return available
+
+
+@pytest.mark.parametrize("codec", codecs(), ids=lambda codec: codec.name)
+@pytest.mark.parametrize("body", BODIES)
+def test_codec_round_trip(codec: JSONCodec, body) -> None:
+    encoded = codec.dumps(body)
+
+    assert isinstance(encoded, bytes)
+    assert codec.loads(encoded) == body
+    assert codec.loads(encoded.decode("utf-8")) == body
+    assert json.loads(encoded) == body
+
+
+EDGE_VARIABLES = [
+    {"amount": 1e-05},
+    {"amount": 1e16},
+    {"amount": 0.1 + 0.2},
+    {"amount": float("nan")},
+    {"amount": float("inf")},
+    {"orderId": 2**70},
+]
+
+
+@pytest.mark.parametrize("codec", codecs(), ids=lambda codec: codec.name)
+@pytest.mark.parametrize("variables", EDGE_VARIABLES, ids=repr)
+def test_signature_matches_the_body_sent(codec: JSONCodec, variables) -> None:
+    with StandInServer() as server:
+        server.raw_response = b'{"data": {}}'
+        transport = OrionxHTTPTransport(
+            "api_key", "secret_key", url=server.url, codec=codec
+        )
+        transport.connect()
+        try:
+            transport.execute(QUERY, variables)
+        except TypeError:
+            # orjson only serializes 64-bit integers
+            assert codec.name == "orjson" and "orderId" in variables
+            assert server.requests == []
+            return
+        finally:
+            transport.close()
+
+    [request] = server.requests
+    headers = request["headers"]
+    assert headers["X-ORIONX-SIGNATURE"] == hmac_sha512(
+        "secret_key", int(headers["X-ORIONX-TIMESTAMP"]), request["body"]
+    )
+
+
+def test_headers_sign_the_codec_output() -> None:
+    for codec in codecs():
+        headers = HeadersBuilder("api_key", "secret_key", codec).build(BODIES[0])
+
+        assert headers["X-ORIONX-SIGNATURE"] == hmac_sha512(
+            "secret_key", int(headers["X-ORIONX-TIMESTAMP"]), codec.dumps(BODIES[0])
+        )
+
+
+def test_default_codec_prefers_orjson() -> None:
+    expected = "orjson" if len(codecs()) == 2 else "json"
+    assert default_codec().name == expected
@@ -0,0 +1,207 @@
+import asyncio
+import gzip
+import os
+from typing import Any, Dict
+
+import pytest
+from gql import gql
+from graphql import DocumentNode
+
+from orionx_api_client import BatchPolicy, Compression
+from orionx_api_client.transports.batch import OrionxBatchTransport
+from orionx_api_client.transports.builders.headers import hmac_sha512
+from orionx_api_client.transports.http import OrionxHTTPTransport
+
+from .server import StandInServer, graphql_handler
+
+ORDER_BOOK_QUERY = gql(
+    """
+    query getOrderBook($marketCode: ID!) {
+        marketOrderBook(marketCode: $marketCode, limit: 50) {
+            buy {
+                limitPrice
+                amount
+            }
+            spread
+        }
+    }
+    """
+)
+
+
+def assert_signed(request: Dict[str, Any]) -> None:
+    headers = request["headers"]
+    assert headers["X-ORIONX-SIGNATURE"] == hmac_sha512(
+        "secret_key", int(headers["X-ORIONX-TIMESTAMP"]), request["body"]
+    )
+
+
+def test_only_large_bodies_are_compressed() -> None:
+    compression = Compression(min_size=100)
+
+    headers: Dict[str, str] = {}
+    assert compression.encode(b"{}", headers) == b"{}"
+    assert "Content-Encoding" not in headers
+    assert headers["Accept-Encoding"] == compression.accept_encoding
+
+    body = b'{"query":"{ market { code } }"}' * 20
+    headers = {}
+    content = compression.encode(body, headers)
+    assert headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(content) == body
+
+    # random bytes don't shrink
+    headers = {}
+    noise = os.urandom(1000)
+    assert compression.encode(noise, headers) == noise
+    assert "Content-Encoding" not in headers
+
+    assert (compression.requests, compression.compressed) == (3, 1)
+    assert compression.nbytes == 2 + len(body) + len(noise)
+    assert compression.ratio < 1
+
+
+def test_compressed_request_is_signed_uncompressed() -> None:
+    compression = Compression(min_size=0)
+
+    with StandInServer(graphql_handler) as server:
+        server.gzip_responses = True
+        transport = OrionxHTTPTransport(
+            "api_key", "secret_key", url=server.url, compression=compression
+        )
+        transport.connect()
+        result = transport.execute(ORDER_BOOK_QUERY, {"marketCode": "BTCCLP"})
+        transport.close()
+
+    assert result.data is not None
+    assert len(result.data["marketOrderBook"]["buy"]) == 50
+    assert transport.response_headers["Content-Encoding"] == "gzip"
+
+    (request,) = server.requests
+    assert request["headers"]["Content-Encoding"] == "gzip"
+    assert request["headers"]["Accept-Encoding"] == compression.accept_encoding
+    assert request["wire_size"] < len(request["body"])
+    assert_signed(request)
+
+
+def test_batches_are_compressed(query: DocumentNode) -> None:
+    compression = Compression(min_size=1024)
+
+    with StandInServer() as server:
+        transport = OrionxBatchTransport(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            batch_policy=BatchPolicy(max_batch_size=20, adaptive=False),
+            compression=compression,
+        )
+        transport.connect()
+        results = [transport.execute(query, {"marketCode": f"M{i}"}) for i in range(20)]
+        for i, result in enumerate(results):
+            assert result.data == {"variables": {"marketCode": f"M{i}"}}
+        transport.close()
+
+    (request,) = server.requests
+    assert request["headers"]["Content-Encoding"] == "gzip"
+    # the query text repeated in every payload compresses well
+    assert request["wire_size"] * 5 < len(request["body"])
+    assert_signed(request)
+
+
+def test_zstd() -> None:
+    pytest.importorskip("zstandard")
+    compression = Compression(Compression.ZSTD, min_size=0)
+
+    with StandInServer(graphql_handler) as server:
+        transport = OrionxHTTPTransport(
+            "api_key", "secret_key", url=server.url, compression=compression
+        )
+        transport.connect()
+        result = transport.execute(ORDER_BOOK_QUERY, {"marketCode": "BTCCLP"})
+        transport.close()
+
+    assert result.data is not None
+    (request,) = server.requests
+    assert request["headers"]["Content-Encoding"] == "zstd"
+    assert_signed(request)
+
+
+def test_http2_compression() -> None:
+    pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+    from .h2_server import H2StandInServer
+
+    with H2StandInServer(graphql_handler) as server:
+        server.gzip_responses = True
+        transport = OrionxHTTPTransport(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            http2=True,
+            compression=Compression(min_size=0),
+        )
+        transport.connect()
+        result = transport.execute(ORDER_BOOK_QUERY, {"marketCode": "BTCCLP"})
+        transport.close()
+
+    assert result.data is not None
+    assert transport.response_headers["Content-Encoding"] == "gzip"
+    (request,) = server.requests
+    assert request["headers"]["Content-Encoding"] == "gzip"
+    assert_signed(request)
+
+
+def test_async_batches_are_compressed(query: DocumentNode) -> None:
+    pytest.importorskip("aiohttp")
+    from orionx_api_client.transports.async_batch import OrionxAsyncBatchTransport
+
+    async def main(url: str) -> None:
+        transport = OrionxAsyncBatchTransport(
+            "api_key",
+            "secret_key",
+            url=url,
+            batch_policy=BatchPolicy(max_batch_size=10, adaptive=False),
+            compression=Compression(min_size=0),
+        )
+        await transport.connect()
+        results = await asyncio.gather(
+            *(transport.execute(query, {"marketCode": f"M{i}"}) for i in range(10))
+        )
+        for i, result in enumerate(results):
+            assert result.data == {"variables": {"marketCode": f"M{i}"}}
+        await transport.close()
+
+    with StandInServer() as server:
+        server.gzip_responses = True
+        asyncio.run(main(server.url))
+
+    (request,) = server.requests
+    assert request["headers"]["Content-Encoding"] == "gzip"
+    assert_signed(request)
+
+
+def test_async_requests_are_compressed() -> None:
+    pytest.importorskip("aiohttp")
+    from orionx_api_client.transports.aiohttp import OrionxAIOHTTPTransport
+
+    compression = Compression(min_size=0)
+
+    async def main(url: str) -> None:
+        transport = OrionxAIOHTTPTransport(
+            "api_key", "secret_key", url=url, compression=compression
+        )
+        await transport.connect()
+        result = await transport.execute(ORDER_BOOK_QUERY, {"marketCode": "BTCCLP"})
+        assert result.data is not None
+        assert len(result.data["marketOrderBook"]["buy"]) == 50
+        await transport.close()
+
+    with StandInServer(graphql_handler) as server:
+        server.gzip_responses = True
+        asyncio.run(main(server.url))
+
+    (request,) = server.requests
+    assert request["headers"]["Content-Encoding"] == "gzip"
+    assert request["wire_size"] < len(request["body"])
+    assert compression.compressed == 1
+    assert_signed(request)
@@ -0,0 +1,232 @@
+import threading
+import time
+from typing import Callable
+
+import pytest
+from graphql import DocumentNode
+from pytest_mock import MockerFixture
+
+from orionx_api_client import Orionx
+from orionx_api_client.client import as_completed
+from orionx_api_client.transports.batch import (
+    BatchItem,
+    DeadlineExceeded,
+    OrionxBatchTransport,
+)
+from orionx_api_client.transports.policy import BatchPolicy
+
+from .server import SentBatches, StandInServer, graphql_handler
+
+
+def test_policy_flushes_before_deadline() -> None:
+    policy = BatchPolicy(max_linger=0.05, adaptive=False, deadline_margin=0.005)
+
+    assert policy.linger(0.0) == pytest.approx(0.05)
+    assert policy.linger(0.0, time_left=0.02) == pytest.approx(0.015)
+    assert policy.linger(0.0, time_left=0.004) == 0.0
+
+
+def test_batch_is_flushed_early_for_deadline(
+    make_transport: Callable[..., OrionxBatchTransport],
+    sent: SentBatches,
+    query: DocumentNode,
+) -> None:
+    policy = BatchPolicy(max_linger=0.5, adaptive=False)
+    transport = make_transport(batch_policy=policy)
+
+    enqueued_at = time.monotonic()
+    result = transport.execute(
+        query, {"marketCode": "BTCCLP"}, deadline=enqueued_at + 0.05
+    )
+    assert result.data == {"marketCode": "BTCCLP"}
+
+    transport.close()
+
+    assert sent.sent_at("BTCCLP") - enqueued_at < 0.05
+
+
+def test_expired_queries_are_not_sent(
+    make_transport: Callable[..., OrionxBatchTransport],
+    sent: SentBatches,
+    release: threading.Event,
+    query: DocumentNode,
+) -> None:
+    transport = make_transport(batch_policy=BatchPolicy(max_batch_size=1), slow=True)
+
+    first = transport.execute(query, {"marketCode": "FIRST"})
+    late = transport.execute(
+        query, {"marketCode": "LATE"}, deadline=time.monotonic() + 0.02
+    )
+
+    time.sleep(0.05)
+    release.set()
+
+    assert first.data == {"marketCode": "FIRST"}
+    with pytest.raises(DeadlineExceeded):
+        late.future.result(timeout=1)
+
+    transport.close()
+
+    assert [payloads[0]["variables"]["marketCode"] for _, payloads in sent.batches] == [
+        "FIRST"
+    ]
+
+
+def test_reading_a_result_waits_until_its_deadline(
+    make_transport: Callable[..., OrionxBatchTransport],
+    release: threading.Event,
+    query: DocumentNode,
+) -> None:
+    transport = make_transport(batch_policy=BatchPolicy(), slow=True)
+
+    started_at = time.monotonic()
+    result = transport.execute(
+        query, {"marketCode": "BTCCLP"}, deadline=started_at + 0.05
+    )
+
+    with pytest.raises(DeadlineExceeded):
+        result.data
+    assert time.monotonic() - started_at < 0.5
+
+    # the late answer is ignored
+    release.set()
+    transport.close()
+    with pytest.raises(DeadlineExceeded):
+        result.future.result()
+
+
+def test_queries_expired_before_their_batch_are_skipped(
+    make_transport: Callable[..., OrionxBatchTransport],
+    sent: SentBatches,
+    release: threading.Event,
+    query: DocumentNode,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    transport = make_transport(batch_policy=BatchPolicy(max_batch_size=1), slow=True)
+
+    # the batcher holds the second one until the first is answered
+    results = [transport.execute(query, {"marketCode": f"M{i}"}) for i in range(3)]
+    time.sleep(0.05)
+    results[2].expire()
+    release.set()
+
+    assert results[1].data == {"marketCode": "M1"}
+    transport.close()
+
+    with pytest.raises(DeadlineExceeded):
+        results[2].future.result()
+    assert sum(sent.sizes) == 2
+    assert "unexpected state" not in caplog.text
+
+
+def test_duplicate_outlives_expired_leader(
+    make_transport: Callable[..., OrionxBatchTransport],
+    release: threading.Event,
+    query: DocumentNode,
+) -> None:
+    policy = BatchPolicy(max_batch_size=2, max_linger=0.01, adaptive=False)
+    transport = make_transport(batch_policy=policy, slow=True)
+
+    blocker = transport.execute(query, {"marketCode": "BLOCKER"})
+    time.sleep(0.02)
+    leader = transport.execute(
+        query, {"marketCode": "BTCCLP"}, deadline=time.monotonic() + 0.02
+    )
+    duplicate = transport.execute(query, {"marketCode": "BTCCLP"})
+
+    time.sleep(0.05)
+    release.set()
+
+    assert blocker.data == {"marketCode": "BLOCKER"}
+    assert duplicate.data == {"marketCode": "BTCCLP"}
+    with pytest.raises(DeadlineExceeded):
+        leader.future.result(timeout=1)
+
+    transport.close()
+
+    assert transport.stats.deduplicated == 1
+
+
+def test_failing_item_does_not_stop_the_batcher(
+    mocker: MockerFixture,
+    make_transport: Callable[..., OrionxBatchTransport],
+    query: DocumentNode,
+) -> None:
+    expire = BatchItem.expire
+
+    def broken_expire(item: BatchItem, now: float) -> bool:
+        if item.payload["variables"]["marketCode"] == "BAD":
+            raise ValueError("broken item")
+        return expire(item, now)
+
+    mocker.patch.object(BatchItem, "expire", autospec=True, side_effect=broken_expire)
+    transport = make_transport(
+        batch_policy=BatchPolicy(max_linger=0.05, adaptive=False)
+    )
+
+    bad = transport.execute(query, {"marketCode": "BAD"})
+    good = transport.execute(query, {"marketCode": "BTCCLP"})
+
+    with pytest.raises(ValueError):
+        bad.future.result(timeout=1)
+    assert good.data == {"marketCode": "BTCCLP"}
+    assert transport.execute(query, {"marketCode": "ETHCLP"}).data == {
+        "marketCode": "ETHCLP"
+    }
+
+    transport.close()
+
+
+def test_as_completed_honors_deadlines(
+    make_transport: Callable[..., OrionxBatchTransport],
+    release: threading.Event,
+    query: DocumentNode,
+) -> None:
+    transport = make_transport(batch_policy=BatchPolicy(), slow=True)
+
+    now = time.monotonic()
+    results = [
+        transport.execute(query, {"marketCode": "SLOW"}, deadline=now + 5),
+        transport.execute(query, {"marketCode": "FAST"}, deadline=now + 0.05),
+    ]
+
+    completed = as_completed(results)
+    first = next(completed)
+    assert first is results[1]
+    assert time.monotonic() - now < 1
+    with pytest.raises(DeadlineExceeded):
+        first.data
+
+    release.set()
+    second = next(completed)
+    assert second.data == {"marketCode": "SLOW"}
+
+    transport.close()
+
+
+def test_session_rejects_expired_deadline() -> None:
+    with StandInServer(graphql_handler) as server:
+        client = Orionx("api_key", "secret_key", url=server.url)
+        with client as session:
+            with pytest.raises(DeadlineExceeded):
+                session.execute(
+                    '{ market(code: "BTCCLP") { code } }',
+                    deadline=time.monotonic() - 1,
+                )
+
+            result = session.execute(
+                '{ market(code: "BTCCLP") { code } }',
+                deadline=time.monotonic() + 5,
+            )
+            assert result == {"market": {"code": "BTCCLP"}}
+
+
+def test_batched_session_accepts_deadline() -> None:
+    with StandInServer(graphql_handler) as server:
+        client = Orionx("api_key", "secret_key", url=server.url, batching=True)
+        with client as session:
+            result = session.execute(
+                '{ market(code: "BTCCLP") { code } }',
+                deadline=time.monotonic() + 5,
+            )
+            assert result.data == {"market": {"code": "BTCCLP"}}
@@ -0,0 +1,80 @@
+import gc
+import json
+from unittest.mock import MagicMock
+
+from gql import gql
+from graphql.language.printer import print_ast
+from pytest_mock import MockerFixture
+
+from orionx_api_client.transports.builders.headers import hmac_sha512
+from orionx_api_client.transports.builders.payload import PayloadBuilder
+from orionx_api_client.transports.http import OrionxHTTPTransport
+
+from .server import StandInServer, graphql_handler
+
+
+def test_payload_builder_prints_each_document_once(mocker: MockerFixture) -> None:
+    spy: MagicMock = mocker.patch(
+        "orionx_api_client.transports.builders.payload.print_ast",
+        side_effect=print_ast,
+    )
+    document = gql('query printedOnce { market(code: "BTCCLP") { code } }')
+    equal_document = gql('query printedOnce { market(code: "BTCCLP") { code } }')
+
+    for _ in range(3):
+        PayloadBuilder.build(document)
+    assert spy.call_count == 1
+
+    for _ in range(3):
+        payload = PayloadBuilder.build(equal_document, {"code": "BTCCLP"})
+    assert spy.call_count == 2
+    assert payload == {"query": print_ast(document), "variables": {"code": "BTCCLP"}}
+
+
+def test_printed_query_outlives_equal_documents(mocker: MockerFixture) -> None:
+    spy: MagicMock = mocker.patch(
+        "orionx_api_client.transports.builders.payload.print_ast",
+        side_effect=print_ast,
+    )
+    document = gql('query outlives { market(code: "BTCCLP") { code } }')
+    equal_document = gql('query outlives { market(code: "BTCCLP") { code } }')
+    PayloadBuilder.build(equal_document)
+    PayloadBuilder.build(document)
+    # the mock holds on to the documents it was called with
+    spy.reset_mock()
+
+    key = id(equal_document)
+    del equal_document
+    gc.collect()
+    assert key not in PayloadBuilder._printed_queries
+
+    PayloadBuilder.build(document)
+    assert spy.call_count == 0
+
+
+def test_sync_transport_builds_payload_once(mocker: MockerFixture) -> None:
+    build: MagicMock = mocker.spy(PayloadBuilder, "build_from_text")
+    gql_print: MagicMock = mocker.patch(
+        "gql.transport.requests.print_ast", side_effect=print_ast
+    )
+    document = gql("query builtOnce($code: ID) { market(code: $code) { code } }")
+
+    with StandInServer(graphql_handler) as server:
+        transport = OrionxHTTPTransport("api_key", "secret_key", url=server.url)
+        transport.connect()
+        result = transport.execute(document, {"code": "BTCCLP"})
+        transport.close()
+
+    assert result.data == {"market": {"code": "BTCCLP"}}
+    assert build.call_count == 1
+    assert gql_print.call_count == 0
+
+    request = server.requests[0]
+    assert json.loads(request["body"]) == PayloadBuilder.build(
+        document, {"code": "BTCCLP"}
+    )
+    assert request["headers"]["X-ORIONX-SIGNATURE"] == hmac_sha512(
+        "secret_key",
+        int(request["headers"]["X-ORIONX-TIMESTAMP"]),
+        request["body"].decode("utf-8"),
+    )
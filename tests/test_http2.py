@@ -0,0 +1,128 @@
+import json
+import threading
+
+import pytest
+from gql import gql
+from gql.transport.exceptions import TransportError, TransportServerError
+from graphql import DocumentNode
+
+from orionx_api_client import ConnectionPool, Orionx
+from orionx_api_client.transports.batch import OrionxBatchTransport
+from orionx_api_client.transports.builders.headers import hmac_sha512
+from orionx_api_client.transports.http import OrionxHTTPTransport
+from orionx_api_client.transports.policy import BatchPolicy
+
+from .server import graphql_handler
+
+pytest.importorskip("httpx")
+pytest.importorskip("h2")
+
+from .h2_server import H2StandInServer  # noqa: E402
+
+MARKET_QUERY = gql('{ market(code: "BTCCLP") { code } }')
+
+
+def test_requests_are_signed_over_http2() -> None:
+    pool = ConnectionPool()
+
+    with H2StandInServer(graphql_handler) as server:
+        transport = OrionxHTTPTransport(
+            "api_key", "secret_key", url=server.url, http2=True, connection_pool=pool
+        )
+        transport.connect()
+        for _ in range(3):
+            result = transport.execute(MARKET_QUERY)
+            assert result.data == {"market": {"code": "BTCCLP"}}
+        transport.close()
+
+    assert server.connections == 1
+    assert (pool.created, pool.reused) == (1, 2)
+
+    for request in server.requests:
+        assert request["headers"]["X-ORIONX-SIGNATURE"] == hmac_sha512(
+            "secret_key",
+            int(request["headers"]["X-ORIONX-TIMESTAMP"]),
+            request["body"].decode("utf-8"),
+        )
+
+
+def test_concurrent_requests_share_a_connection() -> None:
+    with H2StandInServer(graphql_handler, delay=0.05) as server:
+        transport = OrionxHTTPTransport(
+            "api_key", "secret_key", url=server.url, http2=True
+        )
+        transport.connect()
+        threads = [
+            threading.Thread(target=transport.execute, args=(MARKET_QUERY,))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        transport.close()
+
+    assert server.connections == 1
+    assert server.max_in_flight > 1
+
+
+def test_batches_are_multiplexed(query: DocumentNode) -> None:
+    with H2StandInServer(delay=0.05) as server:
+        transport = OrionxBatchTransport(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            http2=True,
+            batch_policy=BatchPolicy(max_batch_size=2, adaptive=False),
+            max_in_flight=4,
+        )
+        transport.connect()
+        results = [transport.execute(query, {"marketCode": f"M{i}"}) for i in range(8)]
+        for i, result in enumerate(results):
+            assert result.data == {"variables": {"marketCode": f"M{i}"}}
+        transport.close()
+
+    assert server.connections == 1
+    assert server.max_in_flight == 4
+    for request in server.requests:
+        assert len(json.loads(request["body"])) == 2
+
+
+def test_errors_are_the_same_as_over_http1() -> None:
+    with H2StandInServer(graphql_handler) as server:
+        server.status = 503
+        server.raw_response = b"Service Unavailable"
+        transport = OrionxHTTPTransport(
+            "api_key", "secret_key", url=server.url, http2=True
+        )
+        transport.connect()
+
+        with pytest.raises(TransportServerError) as exc_info:
+            transport.execute(MARKET_QUERY)
+        transport.close()
+
+    assert exc_info.value.code == 503
+
+
+def test_client_over_http2() -> None:
+    with H2StandInServer(graphql_handler) as server:
+        client = Orionx("api_key", "secret_key", url=server.url, http2=True)
+        with client as session:
+            result = session.execute('{ market(code: "BTCCLP") { code } }')
+
+    assert result == {"market": {"code": "BTCCLP"}}
+    assert server.connections == 1
+
+
+def test_file_uploads_are_rejected() -> None:
+    with H2StandInServer(graphql_handler) as server:
+        transport = OrionxHTTPTransport(
+            "api_key", "secret_key", url=server.url, http2=True
+        )
+        transport.connect()
+
+        with pytest.raises(TransportError, match="HTTP/1.1"):
+            transport.execute(MARKET_QUERY, upload_files=True)
+        transport.close()
+
+    assert server.requests == []
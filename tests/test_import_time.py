@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+import orionx_api_client
+
+# microseconds, the eager import of gql, graphql and requests took ~150 ms
+IMPORT_TIME_BUDGET = 20_000
+
+
+def import_times(statement: str) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        if cumulative.strip().isdigit():
+            times[module.strip()] = int(cumulative)
+    return times
+
+
+def test_package_import_is_lazy() -> None:
+    times = import_times("import orionx_api_client")
+
+    assert times["orionx_api_client"] < IMPORT_TIME_BUDGET
+    for heavy in ("gql", "graphql", "requests", "aiohttp"):
+        assert heavy not in times
+
+
+def test_client_is_imported_on_first_use() -> None:
+    times = import_times("from orionx_api_client import Orionx, as_completed")
+
+    assert "gql" in times
+    assert "aiohttp" not in times
+    assert "httpx" not in times
+    assert "numpy" not in times
+
+
+def test_every_lazy_attribute_is_exported() -> None:
+    assert sorted(orionx_api_client.__all__) == sorted(
+        orionx_api_client._lazy_attributes
+    )
@@ -0,0 +1,91 @@
+import time
+from typing import Any, Dict
+
+import pytest
+from pytest_mock import MockerFixture
+
+from orionx_api_client import BatchPolicy, Orionx
+
+from .server import StandInServer, graphql_handler
+
+MARKET_QUERY = """
+    query getMarket($code: ID) {
+        market(code: $code) {
+            code
+        }
+    }
+"""
+
+
+def slow_handler(payload: Dict[str, Any]) -> Dict[str, Any]:
+    variables = payload.get("variables") or {}
+    if variables.get("code") == "BAD":
+        return {"data": {"market": None}, "errors": [{"message": "Unknown market"}]}
+    # the first markets take longer
+    if variables.get("code") in ("M0", "M1"):
+        time.sleep(0.05)
+    return graphql_handler(payload)
+
+
+def test_map_queues_all_variable_sets_at_once(mocker: MockerFixture) -> None:
+    with StandInServer(graphql_handler) as server:
+        client = Orionx(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            batching=True,
+            batch_policy=BatchPolicy(max_batch_size=100, adaptive=False),
+        )
+        with client as session:
+            put_many = mocker.spy(
+                client.client.transport.query_batcher_queue, "put_many"
+            )
+            results = session.map(
+                MARKET_QUERY, [{"code": f"M{i}"} for i in range(100)], ordered=True
+            )
+            codes = [result.data["market"]["code"] for result in results]
+
+    assert codes == [f"M{i}" for i in range(100)]
+    assert put_many.call_count == 1
+    # the introspection, then the batch
+    assert len(server.requests) == 2
+
+
+@pytest.mark.parametrize("batching", [False, True])
+def test_map_yields_results_as_they_complete(batching: bool) -> None:
+    with StandInServer(slow_handler) as server:
+        client = Orionx(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            batching=batching,
+            batch_policy=BatchPolicy(max_batch_size=1, adaptive=False),
+            max_in_flight=8,
+        )
+        with client as session:
+            variable_sets = [{"code": f"M{i}"} for i in range(8)] + [{"code": "BAD"}]
+            results = list(session.map(MARKET_QUERY, variable_sets))
+
+    assert {
+        result.data["market"]["code"] for result in results if result.data["market"]
+    } == {f"M{i}" for i in range(8)}
+    # the slow ones come last
+    assert {results[-1].data["market"]["code"], results[-2].data["market"]["code"]} == {
+        "M0",
+        "M1",
+    }
+    (failed,) = [result for result in results if result.errors]
+    assert failed.errors == [{"message": "Unknown market"}]
+    assert server.max_in_flight > 1
+
+
+def test_map_ordered_without_batching() -> None:
+    with StandInServer(slow_handler) as server:
+        with Orionx("api_key", "secret_key", url=server.url) as session:
+            prepared = session.prepare(MARKET_QUERY)
+            results = session.map(
+                prepared, [{"code": f"M{i}"} for i in range(20)], ordered=True
+            )
+            codes = [result.data["market"]["code"] for result in results]
+
+    assert codes == [f"M{i}" for i in range(20)]
@@ -0,0 +1,180 @@
+import json
+from typing import Any, Dict
+
+from gql import gql
+from graphql import graphql_sync
+
+from orionx_api_client import BatchPolicy
+from orionx_api_client.transports.batch import OrionxBatchTransport
+from orionx_api_client.transports.builders.merge import mergeable, merged_query
+
+from .server import SCHEMA, Root, StandInServer, graphql_handler
+
+ORDER_BOOK_QUERY = """
+    query getOrderBook($marketCode: ID!) {
+        marketOrderBook(marketCode: $marketCode, limit: 2) {
+            spread
+        }
+        market(code: $marketCode) {
+            code
+        }
+    }
+"""
+
+CANCEL_MUTATION = """
+    mutation cancel($orderId: ID!) {
+        cancelOrder(orderId: $orderId) {
+            _id
+        }
+    }
+"""
+
+
+class FailingRoot(Root):
+    def marketOrderBook(self, info, marketCode: str, limit: int = 50):
+        if marketCode == "BAD":
+            raise ValueError("Unknown market")
+        return super().marketOrderBook(info, marketCode, limit)
+
+
+def failing_handler(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return graphql_sync(
+        SCHEMA,
+        payload["query"],
+        root_value=FailingRoot(),
+        variable_values=payload.get("variables"),
+    ).formatted
+
+
+def merging_transport(server: StandInServer, size: int) -> OrionxBatchTransport:
+    transport = OrionxBatchTransport(
+        "api_key",
+        "secret_key",
+        url=server.url,
+        batch_policy=BatchPolicy(max_batch_size=size, adaptive=False),
+        merge_queries=True,
+    )
+    transport.connect()
+    return transport
+
+
+def test_mergeable() -> None:
+    assert mergeable(gql(ORDER_BOOK_QUERY))
+    assert not mergeable(gql(CANCEL_MUTATION))
+    assert not mergeable(gql("query { ...root } fragment root on Query { __typename }"))
+    assert not mergeable(gql("query a { __typename } query b { __typename }"))
+
+
+def test_split() -> None:
+    merged = merged_query(("{ a: market { code } }", "{ market { code } }"))
+    assert merged.fields == [[("a", "q0_a")], [("market", "q1_market")]]
+
+    results = merged.split(
+        {
+            "data": {"q0_a": {"code": "A"}, "q1_market": None},
+            "errors": [
+                {"message": "boom", "path": ["q1_market"], "locations": []},
+                {"message": "everyone"},
+            ],
+        }
+    )
+    assert results == [
+        {"data": {"a": {"code": "A"}}, "errors": [{"message": "everyone"}]},
+        {
+            "data": {"market": None},
+            "errors": [
+                {"message": "boom", "path": ["market"]},
+                {"message": "everyone"},
+            ],
+        },
+    ]
+
+
+def test_split_keeps_null_data() -> None:
+    merged = merged_query(("{ a: market { code } }", "{ market { code } }"))
+
+    results = merged.split({"data": None, "errors": [{"message": "down"}]})
+    assert results == [
+        {"data": None, "errors": [{"message": "down"}]},
+        {"data": None, "errors": [{"message": "down"}]},
+    ]
+    assert merged.split({"errors": [{"message": "down"}]}) == [
+        {"errors": [{"message": "down"}]},
+        {"errors": [{"message": "down"}]},
+    ]
+
+
+def test_queries_are_merged() -> None:
+    with StandInServer(graphql_handler) as server:
+        transport = merging_transport(server, 10)
+        results = [
+            transport.execute(gql(ORDER_BOOK_QUERY), {"marketCode": f"M{i}"})
+            for i in range(10)
+        ]
+        for i, result in enumerate(results):
+            assert result.errors is None
+            assert result.data == {
+                "marketOrderBook": {"spread": 1.0},
+                "market": {"code": f"M{i}"},
+            }
+        transport.close()
+
+    (request,) = server.requests
+    (payload,) = json.loads(request["body"])
+    assert payload["variables"] == {f"q{i}_marketCode": f"M{i}" for i in range(10)}
+    assert transport.stats.merged == 10
+
+
+def test_mutations_are_not_merged() -> None:
+    with StandInServer(graphql_handler) as server:
+        transport = merging_transport(server, 4)
+        results = [
+            transport.execute(gql(ORDER_BOOK_QUERY), {"marketCode": "M0"}),
+            transport.execute(gql(CANCEL_MUTATION), {"orderId": "o1"}),
+            transport.execute(gql(ORDER_BOOK_QUERY), {"marketCode": "M1"}),
+            transport.execute(gql(CANCEL_MUTATION), {"orderId": "o2"}),
+        ]
+        assert results[0].data["market"] == {"code": "M0"}
+        assert results[1].data == {"cancelOrder": {"_id": "o1"}}
+        assert results[2].data["market"] == {"code": "M1"}
+        assert results[3].data == {"cancelOrder": {"_id": "o2"}}
+        transport.close()
+
+    payloads = [payload for r in server.requests for payload in json.loads(r["body"])]
+    assert len(payloads) == 3
+
+
+def test_errors_go_to_their_query() -> None:
+    with StandInServer(failing_handler) as server:
+        transport = merging_transport(server, 3)
+        good, bad, other = [
+            transport.execute(gql(ORDER_BOOK_QUERY), {"marketCode": code})
+            for code in ("M0", "BAD", "M2")
+        ]
+        assert good.errors is None
+        assert other.data["market"] == {"code": "M2"}
+        assert bad.data == {"marketOrderBook": None, "market": {"code": "BAD"}}
+        (error,) = bad.errors
+        assert error["message"] == "Unknown market"
+        assert error["path"] == ["marketOrderBook"]
+        transport.close()
+
+    assert len(server.requests) == 1
+
+
+def test_failed_merged_query_is_sent_unmerged() -> None:
+    with StandInServer(graphql_handler) as server:
+        transport = merging_transport(server, 3)
+        results = [
+            transport.execute(gql(ORDER_BOOK_QUERY), {"marketCode": "M0"}),
+            transport.execute(gql("query { missing }")),
+            transport.execute(gql(ORDER_BOOK_QUERY), {"marketCode": "M2"}),
+        ]
+        assert results[0].data["market"] == {"code": "M0"}
+        assert results[1].data is None
+        assert "missing" in results[1].errors[0]["message"]
+        assert results[2].data["market"] == {"code": "M2"}
+        transport.close()
+
+    merged, unmerged = [json.loads(request["body"]) for request in server.requests]
+    assert (len(merged), len(unmerged)) == (1, 3)
@@ -0,0 +1,125 @@
+import math
+import random
+
+import pytest
+
+from orionx_api_client import OrderBook, Orionx
+from orionx_api_client.order_book import decode_order_books
+
+from .server import StandInServer, graphql_handler
+
+BACKENDS = [
+    pytest.param(True, id="numpy"),
+    pytest.param(False, id="array"),
+]
+
+ORDER_BOOK = {
+    # out of order on purpose
+    "buy": [
+        {"limitPrice": 99.0, "amount": 2.0},
+        {"limitPrice": 100.0, "amount": 1.0},
+        {"limitPrice": 98.0, "amount": 3.0},
+    ],
+    "sell": [
+        {"limitPrice": 101.0, "amount": 1.0},
+        {"limitPrice": 102.0, "amount": 0.5},
+    ],
+    "spread": 1.0,
+}
+
+
+def decode(use_numpy: bool) -> OrderBook:
+    if use_numpy:
+        pytest.importorskip("numpy")
+    return OrderBook.decode(ORDER_BOOK, use_numpy)
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_levels_are_sorted(use_numpy: bool) -> None:
+    order_book = decode(use_numpy)
+
+    assert list(order_book.bid_prices) == [100.0, 99.0, 98.0]
+    assert list(order_book.bid_amounts) == [1.0, 2.0, 3.0]
+    assert list(order_book.ask_prices) == [101.0, 102.0]
+    assert (order_book.best_bid, order_book.best_ask) == (100.0, 101.0)
+    assert order_book.spread == 1.0
+    assert order_book.mid is None
+    assert not hasattr(order_book, "__dict__")
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_depth_vwap_and_imbalance(use_numpy: bool) -> None:
+    order_book = decode(use_numpy)
+
+    assert list(order_book.depth(OrderBook.BUY)) == [1.0, 3.0, 6.0]
+    assert list(order_book.depth(OrderBook.SELL)) == [1.0, 1.5]
+
+    assert order_book.vwap(1.0) == 101.0
+    assert order_book.vwap(1.5) == pytest.approx((101.0 + 0.5 * 102.0) / 1.5)
+    assert order_book.vwap(2.0) is None
+    assert order_book.vwap(2.0, OrderBook.SELL) == pytest.approx(99.5)
+    assert order_book.vwap(6.0, OrderBook.SELL) == pytest.approx(592.0 / 6)
+
+    assert order_book.imbalance() == pytest.approx((6.0 - 1.5) / 7.5)
+    assert order_book.imbalance(levels=1) == 0.0
+
+
+def test_backends_agree_at_full_depth() -> None:
+    pytest.importorskip("numpy")
+    rng = random.Random(0)
+
+    for _ in range(200):
+        levels = [
+            {"limitPrice": rng.uniform(90, 110), "amount": rng.uniform(0.001, 5)}
+            for _ in range(rng.randint(1, 50))
+        ]
+        book = {"buy": [], "sell": levels, "spread": None}
+        with_numpy = OrderBook.decode(book, True)
+        with_array = OrderBook.decode(book, False)
+
+        amounts = [level["amount"] for level in levels]
+        for size in (sum(amounts), math.fsum(amounts), with_array.depth("sell")[-1]):
+            expected = with_array.vwap(size)
+            actual = with_numpy.vwap(size)
+            if expected is None:
+                assert actual is None
+            else:
+                assert actual == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_empty_book(use_numpy: bool) -> None:
+    if use_numpy:
+        pytest.importorskip("numpy")
+    order_book = OrderBook.decode({"buy": [], "sell": []}, use_numpy)
+
+    assert order_book.best_bid is None
+    assert order_book.best_ask is None
+    assert order_book.vwap(1.0) is None
+    assert order_book.imbalance() is None
+
+
+def test_decode_query_results() -> None:
+    query = """
+        query getOrderBooks {
+            btc: marketOrderBook(marketCode: "BTCCLP", limit: 10) {
+                buy { limitPrice amount }
+                sell { limitPrice amount }
+                mid
+            }
+            eth: marketOrderBook(marketCode: "ETHCLP", limit: 10) {
+                buy { limitPrice amount }
+                sell { limitPrice amount }
+                mid
+            }
+        }
+    """
+    with StandInServer(graphql_handler) as server:
+        with Orionx("api_key", "secret_key", url=server.url) as session:
+            order_books = decode_order_books(session.execute(query))
+
+    assert set(order_books) == {"btc", "eth"}
+    btc = order_books["btc"]
+    assert len(btc.bid_prices) == len(btc.ask_prices) == 10
+    assert btc.best_bid is not None and btc.best_ask is not None
+    assert btc.best_bid < btc.mid < btc.best_ask
@@ -0,0 +1,242 @@
+import hashlib
+import json
+from typing import Any, Dict
+
+from gql import gql
+from graphql import DocumentNode
+
+from orionx_api_client import BatchPolicy, Orionx, PersistedQueries
+from orionx_api_client.transports.batch import OrionxBatchTransport
+from orionx_api_client.transports.builders.headers import hmac_sha512
+from orionx_api_client.transports.http import OrionxHTTPTransport
+
+from .server import StandInServer, graphql_handler
+
+ORDER_BOOK_QUERY = """
+    query getOrderBook($marketCode: ID!) {
+        marketOrderBook(marketCode: $marketCode, limit: 5) {
+            spread
+        }
+    }
+"""
+
+
+def sent(request: Dict[str, Any]) -> Any:
+    headers = request["headers"]
+    assert headers["X-ORIONX-SIGNATURE"] == hmac_sha512(
+        "secret_key", int(headers["X-ORIONX-TIMESTAMP"]), request["body"]
+    )
+    return json.loads(request["body"])
+
+
+def test_encode() -> None:
+    persisted_queries = PersistedQueries()
+    payload = {"query": "{ market { code } }", "variables": {}}
+    digest = hashlib.sha256(payload["query"].encode("utf-8")).hexdigest()
+
+    encoded = persisted_queries.encode(payload)
+    assert encoded["query"] == payload["query"]
+    assert encoded["extensions"] == {
+        "persistedQuery": {"version": 1, "sha256Hash": digest}
+    }
+    assert persisted_queries.answered(encoded, None)
+
+    encoded = persisted_queries.encode(payload)
+    assert encoded == {
+        "variables": {},
+        "extensions": {"persistedQuery": {"version": 1, "sha256Hash": digest}},
+    }
+    assert "extensions" not in payload
+    assert (persisted_queries.registered, persisted_queries.hits) == (1, 1)
+
+
+def test_registry_is_bounded() -> None:
+    persisted_queries = PersistedQueries(maxsize=2)
+    payloads = [{"query": f"{{ m{i} {{ code }} }}"} for i in range(3)]
+    for payload in payloads:
+        assert persisted_queries.answered(persisted_queries.encode(payload), None)
+
+    assert len(persisted_queries._hashes) == len(persisted_queries._known) == 2
+    # the least recently used one is sent in full again
+    assert "query" in persisted_queries.encode(payloads[0])
+    assert "query" not in persisted_queries.encode(payloads[2])
+
+
+def test_queries_are_sent_by_hash_once_registered() -> None:
+    persisted_queries = PersistedQueries()
+
+    with StandInServer(graphql_handler) as server:
+        server.persisted_queries = {}
+        transport = OrionxHTTPTransport(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            persisted_queries=persisted_queries,
+        )
+        transport.connect()
+        for market_code in ("BTCCLP", "ETHCLP", "BTCCLP"):
+            result = transport.execute(
+                gql(ORDER_BOOK_QUERY), {"marketCode": market_code}
+            )
+            assert result.data == {"marketOrderBook": {"spread": 1.0}}
+        transport.close()
+
+    first, *others = [sent(request) for request in server.requests]
+    assert "query" in first
+    for payload in others:
+        assert "query" not in payload
+        assert payload["extensions"] == first["extensions"]
+    assert (persisted_queries.registered, persisted_queries.hits) == (1, 2)
+    assert all(request["wire_size"] < 200 for request in server.requests[1:])
+
+
+def test_forgotten_hash_is_registered_again() -> None:
+    persisted_queries = PersistedQueries()
+
+    with StandInServer(graphql_handler) as server:
+        server.persisted_queries = {}
+        client = Orionx(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            persisted_queries=persisted_queries,
+        )
+        with client as session:
+            session.execute(ORDER_BOOK_QUERY, {"marketCode": "BTCCLP"})
+            server.persisted_queries.clear()
+            result = session.execute(ORDER_BOOK_QUERY, {"marketCode": "BTCCLP"})
+
+    assert result == {"marketOrderBook": {"spread": 1.0}}
+    payloads = [sent(request) for request in server.requests]
+    # leave out the schema introspection
+    payloads = [payload for payload in payloads if payload.get("variables")]
+    assert ["query" in payload for payload in payloads] == [True, False, True]
+    assert persisted_queries.misses == 1
+
+
+def test_optimistic() -> None:
+    persisted_queries = PersistedQueries(optimistic=True)
+
+    with StandInServer(graphql_handler) as server:
+        server.persisted_queries = {}
+        transport = OrionxHTTPTransport(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            persisted_queries=persisted_queries,
+        )
+        transport.connect()
+        for _ in range(2):
+            result = transport.execute(gql(ORDER_BOOK_QUERY), {"marketCode": "M"})
+            assert result.data == {"marketOrderBook": {"spread": 1.0}}
+        transport.close()
+
+    payloads = [sent(request) for request in server.requests]
+    assert ["query" in payload for payload in payloads] == [False, True, False]
+    assert persisted_queries.misses == 1
+
+
+def test_unsupported_server_turns_them_off() -> None:
+    persisted_queries = PersistedQueries(optimistic=True)
+
+    with StandInServer(graphql_handler) as server:
+        transport = OrionxHTTPTransport(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            persisted_queries=persisted_queries,
+        )
+        transport.connect()
+        for _ in range(2):
+            result = transport.execute(gql(ORDER_BOOK_QUERY), {"marketCode": "M"})
+            assert result.data == {"marketOrderBook": {"spread": 1.0}}
+        transport.close()
+
+    assert not persisted_queries.supported
+    payloads = [sent(request) for request in server.requests]
+    assert "query" not in payloads[0]
+    for payload in payloads[1:]:
+        assert "query" in payload
+        assert "extensions" not in payload
+
+
+def test_batches_send_hashes(query: DocumentNode) -> None:
+    persisted_queries = PersistedQueries()
+
+    with StandInServer() as server:
+        server.persisted_queries = {}
+        transport = OrionxBatchTransport(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            batch_policy=BatchPolicy(max_batch_size=10, adaptive=False),
+            persisted_queries=persisted_queries,
+        )
+        transport.connect()
+        for _ in range(2):
+            results = [
+                transport.execute(query, {"marketCode": f"M{i}"}) for i in range(10)
+            ]
+            for i, result in enumerate(results):
+                assert result.data == {"variables": {"marketCode": f"M{i}"}}
+        transport.close()
+
+    registering, persisted = [sent(request) for request in server.requests]
+    assert all("query" in payload for payload in registering)
+    assert not any("query" in payload for payload in persisted)
+    assert server.requests[1]["wire_size"] < server.requests[0]["wire_size"]
+
+
+def test_batched_payloads_unknown_to_the_server_are_sent_again(
+    query: DocumentNode,
+) -> None:
+    persisted_queries = PersistedQueries(optimistic=True)
+
+    with StandInServer() as server:
+        server.persisted_queries = {}
+        transport = OrionxBatchTransport(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            batch_policy=BatchPolicy(max_batch_size=5, adaptive=False),
+            persisted_queries=persisted_queries,
+        )
+        transport.connect()
+        results = [transport.execute(query, {"marketCode": f"M{i}"}) for i in range(5)]
+        for i, result in enumerate(results):
+            assert result.data == {"variables": {"marketCode": f"M{i}"}}
+        transport.close()
+
+    first, second = [sent(request) for request in server.requests]
+    assert not any("query" in payload for payload in first)
+    assert all("query" in payload for payload in second)
+    assert persisted_queries.misses == 5
+
+
+def test_merged_queries_are_sent_in_full() -> None:
+    persisted_queries = PersistedQueries()
+
+    with StandInServer(graphql_handler) as server:
+        server.persisted_queries = {}
+        transport = OrionxBatchTransport(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            batch_policy=BatchPolicy(max_batch_size=3, adaptive=False),
+            persisted_queries=persisted_queries,
+            merge_queries=True,
+        )
+        transport.connect()
+        for _ in range(2):
+            results = [
+                transport.execute(gql(ORDER_BOOK_QUERY), {"marketCode": f"M{i}"})
+                for i in range(3)
+            ]
+            for result in results:
+                assert result.data == {"marketOrderBook": {"spread": 1.0}}
+        transport.close()
+
+    for request in server.requests:
+        (payload,) = sent(request)
+        assert "query" in payload and "extensions" not in payload
+    assert persisted_queries.registered == 0
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import socket
+import threading
+import time
+
+import pytest
+from gql import gql
+
+from orionx_api_client import ConnectionPool
+from orionx_api_client.transports.batch import OrionxBatchTransport
+from orionx_api_client.transports.http import OrionxHTTPTransport
+
+from .server import StandInServer, graphql_handler
+
+QUERY = gql('{ market(code: "BTCCLP") { code } }')
+
+
+def pooled_transport(
+    server: StandInServer, pool: ConnectionPool
+) -> OrionxHTTPTransport:
+    transport = OrionxHTTPTransport(
+        "api_key", "secret_key", url=server.url, connection_pool=pool
+    )
+    transport.connect()
+    return transport
+
+
+def test_connections_are_reused() -> None:
+    pool = ConnectionPool()
+
+    with StandInServer(graphql_handler) as server:
+        transport = pooled_transport(server, pool)
+        for _ in range(5):
+            assert transport.execute(QUERY).data == {"market": {"code": "BTCCLP"}}
+        transport.close()
+
+    assert (pool.created, pool.reused, pool.discarded) == (1, 4, 0)
+    assert pool.reuse_rate == 0.8
+
+
+def test_idle_connections_expire() -> None:
+    pool = ConnectionPool(keepalive_expiry=0.01)
+
+    with StandInServer(graphql_handler) as server:
+        transport = pooled_transport(server, pool)
+        transport.execute(QUERY)
+        transport.execute(QUERY)
+        time.sleep(0.05)
+        transport.execute(QUERY)
+        transport.close()
+
+    assert (pool.created, pool.reused, pool.discarded) == (2, 1, 1)
+
+
+def test_overflow_connections_are_discarded(caplog: pytest.LogCaptureFixture) -> None:
+    pool = ConnectionPool(maxsize=1)
+
+    with StandInServer(graphql_handler, delay=0.05) as server:
+        transport = pooled_transport(server, pool)
+        threads = [
+            threading.Thread(target=transport.execute, args=(QUERY,)) for _ in range(3)
+        ]
+        with caplog.at_level(logging.WARNING):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        transport.close()
+
+    assert pool.created == 3
+    assert pool.discarded == 2
+    assert "Connection pool is full" in caplog.text
+
+
+def test_blocking_pool_waits_for_a_connection() -> None:
+    pool = ConnectionPool(maxsize=1, block=True)
+
+    with StandInServer(graphql_handler, delay=0.02) as server:
+        transport = pooled_transport(server, pool)
+        threads = [
+            threading.Thread(target=transport.execute, args=(QUERY,)) for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        transport.close()
+
+    assert (pool.created, pool.reused, pool.discarded) == (1, 2, 0)
+    assert server.max_in_flight == 1
+
+
+@pytest.mark.parametrize("tcp_nodelay", [True, False])
+def test_tcp_nodelay(tcp_nodelay: bool) -> None:
+    with StandInServer(graphql_handler) as server:
+        transport = pooled_transport(server, ConnectionPool(tcp_nodelay=tcp_nodelay))
+        transport.execute(QUERY)
+
+        assert transport.session is not None
+        pools = transport.session.get_adapter(server.url).poolmanager.pools
+        (conn_pool,) = [pools[key] for key in pools.keys()]
+        conn = conn_pool.pool.queue[-1]
+        option = conn.sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+        assert bool(option) == tcp_nodelay
+
+        transport.close()
+
+
+def test_batch_transport_pool_fits_its_senders() -> None:
+    transport = OrionxBatchTransport(
+        "api_key", "secret_key", url="http://localhost/graphql", max_in_flight=32
+    )
+    transport.connect()
+
+    assert transport.connection_pool is not None
+    assert transport.connection_pool.maxsize == 32
+    assert transport.session is not None
+    assert transport.session.get_adapter("https://").max_retries.total == 0
+
+    transport.close()
+
+
+def test_async_transport_counts_connections() -> None:
+    pytest.importorskip("aiohttp")
+    from orionx_api_client.transports.aiohttp import OrionxAIOHTTPTransport
+
+    pool = ConnectionPool(maxsize=2)
+
+    async def main(url: str) -> None:
+        transport = OrionxAIOHTTPTransport(
+            "api_key", "secret_key", url=url, connection_pool=pool
+        )
+        await transport.connect()
+        for _ in range(3):
+            result = await transport.execute(QUERY)
+            assert result.data == {"market": {"code": "BTCCLP"}}
+        await transport.close()
+
+    with StandInServer(graphql_handler) as server:
+        asyncio.run(main(server.url))
+
+    assert (pool.created, pool.reused) == (1, 2)
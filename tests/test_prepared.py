@@ -0,0 +1,74 @@
+import pytest
+from gql.transport.exceptions import TransportQueryError
+from graphql import GraphQLError
+from pytest_mock import MockerFixture
+
+from orionx_api_client import Orionx, PreparedQuery
+from orionx_api_client.transports.builders import payload
+
+from .server import StandInServer, graphql_handler
+
+MARKET_QUERY = """
+    query getMarket($code: ID) {
+        market(code: $code) {
+            code
+        }
+    }
+"""
+
+
+@pytest.mark.parametrize("batching", [False, True])
+def test_prepared_query_is_validated_and_printed_once(
+    mocker: MockerFixture, batching: bool
+) -> None:
+    with StandInServer(graphql_handler) as server:
+        client = Orionx("api_key", "secret_key", url=server.url, batching=batching)
+        with client as session:
+            prepared = session.prepare(MARKET_QUERY)
+            assert isinstance(prepared, PreparedQuery)
+
+            validate = mocker.spy(client.client, "validate")
+            print_ast = mocker.spy(payload, "print_ast")
+            print_query = mocker.spy(payload.PayloadBuilder, "print_query")
+            for code in ("BTCCLP", "ETHCLP", "BTCCLP"):
+                result = prepared({"code": code})
+                if batching:
+                    result = result.data
+                assert result == {"market": {"code": code}}
+
+    assert validate.call_count == 0
+    assert print_ast.call_count == 0
+    # sent as printed by prepare(), whatever the printed queries cache holds
+    assert print_query.call_count == 0
+    assert len(server.requests) == 4
+
+
+def test_prepare_rejects_invalid_queries() -> None:
+    with StandInServer(graphql_handler) as server:
+        with Orionx("api_key", "secret_key", url=server.url) as session:
+            with pytest.raises(GraphQLError):
+                session.prepare("{ missing }")
+
+
+def test_prepared_dsl_query() -> None:
+    with StandInServer(graphql_handler) as server:
+        with Orionx("api_key", "secret_key", url=server.url) as session:
+            ds = session.dsl()
+            assert session.dsl() is ds
+
+            prepared = session.prepare(
+                ds.Query.marketOrderBook.args(marketCode="BTCCLP", limit=1).select(
+                    ds.MarketOrderBook.spread
+                )
+            )
+            result = prepared(get_execution_result=True)
+            assert result.data == {"marketOrderBook": {"spread": 1.0}}
+
+
+def test_prepared_query_errors_are_raised() -> None:
+    with StandInServer(graphql_handler) as server:
+        with Orionx("api_key", "secret_key", url=server.url) as session:
+            prepared = session.prepare(MARKET_QUERY)
+            server.raw_response = b'{"errors": [{"message": "Unknown market"}]}'
+            with pytest.raises(TransportQueryError, match="Unknown market"):
+                prepared({"code": "BTCCLP"})
@@ -0,0 +1,159 @@
+import json
+import time
+from typing import Callable, List
+
+from gql import gql
+from graphql import DocumentNode
+
+from orionx_api_client import Orionx, RateLimiter
+from orionx_api_client.transports.batch import OrionxBatchTransport
+from orionx_api_client.transports.policy import BatchPolicy
+from orionx_api_client.transports.rate_limit import MUTATION, QUERY, Ticket
+
+from .server import SentBatches, StandInServer, graphql_handler
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def granted(tickets: List[Ticket]) -> List[Ticket]:
+    return [ticket for ticket in tickets if ticket.granted]
+
+
+def test_token_bucket_refills_at_rate() -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(rate=2, burst=2, clock=clock)
+
+    tickets = [limiter.submit("key") for _ in range(4)]
+    assert limiter.dispatch() == 0.5
+    assert granted(tickets) == tickets[:2]
+
+    clock.now = 0.25
+    assert limiter.dispatch() == 0.25
+    assert granted(tickets) == tickets[:2]
+
+    clock.now = 0.5
+    assert limiter.dispatch() == 0.5
+    assert granted(tickets) == tickets[:3]
+
+    # an idle bucket only fills up to its burst
+    clock.now = 10
+    assert limiter.dispatch() == 0.0
+    assert granted(tickets) == tickets
+    assert limiter.tokens == 1
+
+
+def test_mutations_go_before_queued_queries() -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1, burst=1, clock=clock)
+    limiter.dispatch()
+    limiter.tokens = 0
+
+    queries = [limiter.submit("key", QUERY) for _ in range(3)]
+    mutation = limiter.submit("key", MUTATION)
+
+    clock.now = 1
+    limiter.dispatch()
+    assert mutation.granted
+    assert granted(queries) == []
+
+    clock.now = 2
+    limiter.dispatch()
+    assert granted(queries) == queries[:1]
+
+
+def test_weighted_fair_share_between_keys() -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1, burst=1, weights={"trading": 2}, clock=clock)
+    limiter.tokens = 0
+
+    tickets = [limiter.submit("market-data") for _ in range(30)]
+    tickets += [limiter.submit("trading") for _ in range(30)]
+
+    order = []
+    for second in range(1, 31):
+        clock.now = second
+        limiter.dispatch()
+        for ticket in granted(tickets):
+            if ticket not in order:
+                order.append(ticket)
+
+    keys = [ticket.key for ticket in order]
+    assert len(keys) == 30
+    assert keys.count("trading") == 20
+    assert keys.count("market-data") == 10
+
+
+def test_idle_key_does_not_bank_credit() -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1, burst=1, clock=clock)
+    limiter.tokens = 0
+
+    busy = [limiter.submit("busy") for _ in range(10)]
+    for second in range(1, 6):
+        clock.now = second
+        limiter.dispatch()
+    assert len(granted(busy)) == 5
+
+    late = [limiter.submit("late") for _ in range(4)]
+    for second in range(6, 10):
+        clock.now = second
+        limiter.dispatch()
+
+    # the keys alternate instead of the late one catching up on 5 requests
+    assert len(granted(late)) == 2
+    assert len(granted(busy)) == 7
+
+
+def test_sync_client_is_throttled() -> None:
+    limiter = RateLimiter(rate=10, burst=1)
+
+    with StandInServer(graphql_handler) as server:
+        client = Orionx("api_key", "secret_key", url=server.url, rate_limiter=limiter)
+        with client as session:
+            started_at = time.monotonic()
+            for _ in range(5):
+                session.execute('{ market(code: "BTCCLP") { code } }')
+            elapsed = time.monotonic() - started_at
+
+    # the introspection query took the only token of the burst, which may
+    # have been refilled by the time the first query is sent
+    assert elapsed >= 4 / 10 * 0.9
+    assert limiter.granted == 6
+    assert limiter.throttled >= 4
+
+
+def test_batcher_sends_mutations_before_queued_queries(
+    make_transport: Callable[..., OrionxBatchTransport],
+    sent: SentBatches,
+    query: DocumentNode,
+) -> None:
+    limiter = RateLimiter(rate=50, burst=1)
+    transport = make_transport(batch_policy=BatchPolicy(max_batch_size=1))
+    transport.rate_limiter = limiter
+
+    mutation = gql(
+        """
+        mutation cancelOrder($marketCode: ID!) {
+            cancelOrder(orderId: "1", marketCode: $marketCode) {
+                _id
+            }
+        }
+        """
+    )
+
+    results = [transport.execute(query, {"marketCode": f"M{i}"}) for i in range(10)]
+    results.append(transport.execute(mutation, {"marketCode": "CANCEL"}))
+    for result in results:
+        result.future.result(timeout=5)
+
+    transport.close()
+
+    order = [payloads[0]["variables"]["marketCode"] for _, payloads in sent.batches]
+    assert order.index("CANCEL") <= 2
+    assert json.dumps(order).count("M") == 10
@@ -0,0 +1,227 @@
+import time
+from typing import List
+
+import pytest
+from gql import gql
+
+from orionx_api_client import Orionx, ResponseCache
+from orionx_api_client.transports.http import OrionxHTTPTransport
+
+from .server import StandInServer, graphql_handler
+
+MARKET_QUERY = """
+    query getMarket($code: ID) {
+        market(code: $code) {
+            code
+        }
+    }
+"""
+
+STATS_QUERY = """
+    query getStats($code: ID!) {
+        marketStats(marketCode: $code, aggregation: h1) {
+            _id
+        }
+        market(code: $code) {
+            code
+        }
+    }
+"""
+
+CANCEL_MUTATION = """
+    mutation cancel($orderId: ID!) {
+        cancelOrder(orderId: $orderId) {
+            _id
+        }
+    }
+"""
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_rules() -> None:
+    cache = ResponseCache(ttls={"market": 60, "marketStats": 10, "getOther": 5})
+
+    assert cache.ttl_for(gql(MARKET_QUERY)) == 60
+    assert cache.ttl_for(gql(STATS_QUERY)) == 10
+    assert cache.ttl_for(gql("query getOther { __typename }")) == 5
+    assert cache.ttl_for(gql("{ __typename }")) is None
+    assert cache.ttl_for(gql(CANCEL_MUTATION)) is None
+    assert cache.bypassed == 2
+
+    cache = ResponseCache(default_ttl=1)
+    assert cache.ttl_for(gql(STATS_QUERY)) == 1
+    assert cache.ttl_for(gql(CANCEL_MUTATION)) is None
+
+
+def test_entries_expire_then_go_stale() -> None:
+    clock = FakeClock()
+    cache = ResponseCache(stale_ttl=5, clock=clock)
+    result = {"data": {"market": {"code": "BTCCLP"}}}
+
+    assert cache.get("key") == (None, False)
+    cache.store("key", 10, result)
+
+    clock.now = 9
+    assert cache.get("key") == (result, False)
+
+    # only the first reader of a stale entry refreshes it
+    clock.now = 11
+    assert cache.get("key") == (result, True)
+    assert cache.get("key") == (result, False)
+
+    cache.release("key")
+    assert cache.get("key") == (result, True)
+
+    clock.now = 15
+    assert cache.get("key") == (None, False)
+    assert len(cache) == 0
+
+    assert (cache.hits, cache.stale_hits, cache.misses) == (4, 3, 2)
+    assert cache.hit_rate == pytest.approx(4 / 6)
+
+
+def test_results_with_errors_are_not_stored() -> None:
+    cache = ResponseCache()
+    cache.store("key", 10, {"data": None, "errors": [{"message": "boom"}]})
+    assert len(cache) == 0
+
+
+def test_lru_bounds() -> None:
+    cache = ResponseCache(max_entries=2)
+    for key in "abc":
+        cache.store(key, 10, {"data": key})
+        cache.get("a")
+
+    assert cache.get("a")[0] == {"data": "a"}
+    assert cache.get("b")[0] is None
+    assert cache.evictions == 1
+
+    cache = ResponseCache(max_bytes=50)
+    for key in "abc":
+        cache.store(key, 10, {"data": key * 10})
+
+    assert cache.nbytes <= 50
+    assert len(cache) == 2
+    assert cache.get("a")[0] is None
+
+    cache.store("big", 10, {"data": "x" * 100})
+    assert cache.get("big")[0] is None
+
+
+def count_queries(server: StandInServer) -> List[str]:
+    return [request["body"] for request in server.requests[1:]]
+
+
+@pytest.mark.parametrize("batching", [False, True])
+def test_client_serves_repeated_queries_from_cache(batching: bool) -> None:
+    cache = ResponseCache(ttls={"market": 60})
+
+    with StandInServer(graphql_handler) as server:
+        client = Orionx(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            batching=batching,
+            response_cache=cache,
+        )
+        with client as session:
+            for code in ("BTCCLP", "ETHCLP", "BTCCLP", "BTCCLP"):
+                result = session.execute(MARKET_QUERY, variable_values={"code": code})
+                if batching:
+                    result = result.data
+                assert result == {"market": {"code": code}}
+
+            for _ in range(2):
+                result = session.execute(
+                    CANCEL_MUTATION, variable_values={"orderId": "1"}
+                )
+                if batching:
+                    result = result.data
+                assert result == {"cancelOrder": {"_id": "1"}}
+
+    assert len(count_queries(server)) == 4
+    # the introspection query is bypassed as well
+    assert (cache.hits, cache.misses, cache.bypassed) == (2, 2, 3)
+
+
+@pytest.mark.parametrize("batching", [False, True])
+def test_stale_entries_are_refreshed_in_background(batching: bool) -> None:
+    clock = FakeClock()
+    cache = ResponseCache(ttls={"market": 10}, stale_ttl=10, clock=clock)
+
+    with StandInServer(graphql_handler) as server:
+        client = Orionx(
+            "api_key",
+            "secret_key",
+            url=server.url,
+            batching=batching,
+            response_cache=cache,
+        )
+        with client as session:
+            result = session.execute(MARKET_QUERY, variable_values={"code": "BTCCLP"})
+            if batching:
+                result = result.data
+            assert len(count_queries(server)) == 1
+
+            clock.now = 15
+            result = session.execute(MARKET_QUERY, variable_values={"code": "BTCCLP"})
+            if batching:
+                result = result.data
+            assert result == {"market": {"code": "BTCCLP"}}
+
+            deadline = time.monotonic() + 2
+            while len(count_queries(server)) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert len(count_queries(server)) == 2
+
+            # give the refresh time to be stored, then outlive the old entry
+            time.sleep(0.1)
+            clock.now = 22
+            result = session.execute(MARKET_QUERY, variable_values={"code": "BTCCLP"})
+            if batching:
+                result = result.data
+            assert result == {"market": {"code": "BTCCLP"}}
+
+    assert len(count_queries(server)) == 2
+
+
+def test_http_transport_without_cache_is_untouched() -> None:
+    with StandInServer(graphql_handler) as server:
+        transport = OrionxHTTPTransport("api_key", "secret_key", url=server.url)
+        transport.connect()
+        for _ in range(2):
+            result = transport.execute(gql(MARKET_QUERY), {"code": "BTCCLP"})
+            assert result.data == {"market": {"code": "BTCCLP"}}
+        transport.close()
+
+    assert len(server.requests) == 2
+
+
+def test_shared_cache_keeps_accounts_apart() -> None:
+    cache = ResponseCache(ttls={"market": 60})
+
+    with StandInServer(graphql_handler) as server:
+        transports = [
+            OrionxHTTPTransport(
+                api_key, "secret_key", url=server.url, response_cache=cache
+            )
+            for api_key in ("api_key", "api_key", "other_api_key")
+        ]
+        for transport in transports:
+            transport.connect()
+            result = transport.execute(gql(MARKET_QUERY), {"code": "BTCCLP"})
+            assert result.data == {"market": {"code": "BTCCLP"}}
+            transport.close()
+
+    assert [request["headers"]["X-ORIONX-APIKEY"] for request in server.requests] == [
+        "api_key",
+        "other_api_key",
+    ]
+    assert (cache.hits, cache.misses) == (1, 2)
@@ -0,0 +1,210 @@
+import json
+from typing import Any, Callable, List, Optional, Tuple
+
+import pytest
+from gql import gql
+from gql.transport.exceptions import TransportProtocolError, TransportServerError
+from graphql import DocumentNode
+
+from orionx_api_client.transports.batch import OrionxBatchTransport
+from orionx_api_client.transports.policy import BatchPolicy
+from orionx_api_client.transports.retry import RetryPolicy
+
+from .server import StandInServer, echo_handler
+
+MUTATION = gql(
+    """
+    mutation cancelOrder($marketCode: ID!) {
+        cancelOrder(orderId: "1", marketCode: $marketCode) {
+            _id
+        }
+    }
+    """
+)
+
+# turns the list of answers of a batch into the response status and body
+Breakage = Callable[[List[Any]], Tuple[int, bytes]]
+
+
+class FlakyServer(StandInServer):
+    """Breaks the answers of the first `failures` requests with `breakage`."""
+
+    def __init__(self, breakage: Breakage, failures: int = 1) -> None:
+        super().__init__()
+        self.breakage = breakage
+        self.failures = failures
+
+    def respond(self, body: Any) -> bytes:
+        answers = [echo_handler(payload) for payload in body]
+        if self.failures > 0:
+            self.failures -= 1
+            self.status, response = self.breakage(answers)
+            return response
+        self.status = 200
+        return json.dumps(answers).encode("utf-8")
+
+
+def truncated(answers: List[Any]) -> Tuple[int, bytes]:
+    return 200, json.dumps(answers[: len(answers) // 2]).encode("utf-8")
+
+
+def malformed_item(answers: List[Any]) -> Tuple[int, bytes]:
+    answers[1] = "oops"
+    return 200, json.dumps(answers).encode("utf-8")
+
+
+def cut_off(answers: List[Any]) -> Tuple[int, bytes]:
+    return 200, json.dumps(answers).encode("utf-8")[:20]
+
+
+def unavailable(answers: List[Any]) -> Tuple[int, bytes]:
+    return 503, b"Service Unavailable"
+
+
+def bad_request(answers: List[Any]) -> Tuple[int, bytes]:
+    return 400, b"Bad Request"
+
+
+def retrying_transport(
+    server: StandInServer, retry_policy: Optional[RetryPolicy]
+) -> OrionxBatchTransport:
+    transport = OrionxBatchTransport(
+        "api_key",
+        "secret_key",
+        url=server.url,
+        batch_policy=BatchPolicy(max_linger=0.05, adaptive=False),
+        retry_policy=retry_policy,
+    )
+    transport.connect()
+    return transport
+
+
+def sent_codes(server: StandInServer) -> List[List[str]]:
+    return [
+        [payload["variables"]["marketCode"] for payload in json.loads(request["body"])]
+        for request in server.requests
+    ]
+
+
+def test_backoff_grows_exponentially_with_jitter() -> None:
+    policy = RetryPolicy(backoff=0.1, max_backoff=0.3, rng=lambda: 1.0)
+    assert [policy.delay(attempts) for attempts in (1, 2, 3)] == [0.1, 0.2, 0.3]
+
+    policy = RetryPolicy(backoff=0.1, rng=lambda: 0.5)
+    assert policy.delay(2) == pytest.approx(0.1)
+
+
+def test_retry_budget() -> None:
+    policy = RetryPolicy(budget_ratio=0.5, budget_capacity=2)
+
+    assert policy.withdraw()
+    assert policy.withdraw()
+    assert not policy.withdraw()
+
+    policy.deposit()
+    assert not policy.withdraw()
+    policy.deposit()
+    assert policy.withdraw()
+
+    assert (policy.retries, policy.exhausted) == (3, 2)
+    assert policy.can_retry(2)
+    assert not policy.can_retry(3)
+
+
+@pytest.mark.parametrize("breakage", [truncated, malformed_item])
+def test_only_failed_items_are_retried(
+    breakage: Breakage,
+    query: DocumentNode,
+) -> None:
+    with FlakyServer(breakage) as server:
+        transport = retrying_transport(server, RetryPolicy(backoff=0.01))
+        codes = [f"M{i}" for i in range(4)]
+        results = [transport.execute(query, {"marketCode": code}) for code in codes]
+        for code, result in zip(codes, results):
+            assert result.data == {"variables": {"marketCode": code}}
+        transport.close()
+
+    first, retried = sent_codes(server)
+    assert first == codes
+    if breakage is truncated:
+        assert retried == ["M2", "M3"]
+    else:
+        assert retried == ["M1"]
+    assert transport.stats.retried == len(retried)
+
+
+def test_valid_items_resolve_without_retry_policy(query: DocumentNode) -> None:
+    with FlakyServer(truncated) as server:
+        transport = retrying_transport(server, None)
+        results = [transport.execute(query, {"marketCode": f"M{i}"}) for i in range(4)]
+
+        assert results[0].data == {"variables": {"marketCode": "M0"}}
+        assert results[1].data == {"variables": {"marketCode": "M1"}}
+        for result in results[2:]:
+            with pytest.raises(TransportProtocolError):
+                result.future.result(timeout=1)
+        transport.close()
+
+    assert len(server.requests) == 1
+
+
+@pytest.mark.parametrize("breakage", [cut_off, unavailable])
+def test_failed_batch_retries_queries_but_not_mutations(
+    breakage: Breakage,
+    query: DocumentNode,
+) -> None:
+    with FlakyServer(breakage) as server:
+        transport = retrying_transport(server, RetryPolicy(backoff=0.01))
+        query_result = transport.execute(query, {"marketCode": "BTCCLP"})
+        mutation_result = transport.execute(MUTATION, {"marketCode": "CANCEL"})
+
+        assert query_result.data == {"variables": {"marketCode": "BTCCLP"}}
+        with pytest.raises((TransportProtocolError, TransportServerError)):
+            mutation_result.future.result(timeout=1)
+        transport.close()
+
+    assert sorted(sent_codes(server)[0]) == ["BTCCLP", "CANCEL"]
+    assert sent_codes(server)[1:] == [["BTCCLP"]]
+
+
+def test_client_errors_are_not_retried(query: DocumentNode) -> None:
+    with FlakyServer(bad_request) as server:
+        transport = retrying_transport(server, RetryPolicy(backoff=0.01))
+        result = transport.execute(query, {"marketCode": "BTCCLP"})
+
+        with pytest.raises(TransportServerError) as exc_info:
+            result.future.result(timeout=1)
+        transport.close()
+
+    assert exc_info.value.code == 400
+    assert len(server.requests) == 1
+
+
+def test_retries_stop_after_max_attempts(query: DocumentNode) -> None:
+    with FlakyServer(unavailable, failures=10) as server:
+        transport = retrying_transport(
+            server, RetryPolicy(max_attempts=3, backoff=0.01)
+        )
+        result = transport.execute(query, {"marketCode": "BTCCLP"})
+
+        with pytest.raises(TransportServerError):
+            result.future.result(timeout=2)
+        transport.close()
+
+    assert len(server.requests) == 3
+
+
+def test_retry_budget_prevents_retry_storms(query: DocumentNode) -> None:
+    policy = RetryPolicy(max_attempts=10, backoff=0.01, budget_capacity=2)
+
+    with FlakyServer(unavailable, failures=100) as server:
+        transport = retrying_transport(server, policy)
+        results = [transport.execute(query, {"marketCode": f"M{i}"}) for i in range(3)]
+        for result in results:
+            with pytest.raises(TransportServerError):
+                result.future.result(timeout=2)
+        transport.close()
+
+    # the first batch plus the two retries the budget allowed
+    assert len(server.requests) == 3
+    assert policy.exhausted == 1
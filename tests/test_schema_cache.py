@@ -0,0 +1,101 @@
+import json
+import time
+from pathlib import Path
+
+from graphql import get_introspection_query, graphql_sync
+
+from orionx_api_client import Orionx, SchemaCache
+
+from .server import SCHEMA, StandInServer, graphql_handler
+
+URL = "http://localhost/graphql"
+INTROSPECTION = graphql_sync(SCHEMA, get_introspection_query()).data
+
+MARKET_QUERY = """
+    query getMarket($code: ID) {
+        market(code: $code) {
+            code
+        }
+    }
+"""
+
+
+def introspection_requests(server: StandInServer) -> int:
+    return sum(b"IntrospectionQuery" in request["body"] for request in server.requests)
+
+
+def test_store_and_load(tmp_path: Path) -> None:
+    cache = SchemaCache(tmp_path / "schema.json", ttl=60)
+    stored = cache.store(URL, INTROSPECTION)
+
+    loaded = cache.load(URL)
+    assert loaded is not None
+    assert loaded.introspection == INTROSPECTION
+    assert loaded.content_hash == stored.content_hash
+    assert cache.is_fresh(loaded)
+
+    assert cache.load("http://other/graphql") is None
+
+
+def test_load_ignores_missing_and_corrupted_entries(tmp_path: Path) -> None:
+    path = tmp_path / "schema.json"
+    cache = SchemaCache(path)
+    assert cache.load(URL) is None
+
+    cache.store(URL, INTROSPECTION)
+    entry = json.loads(path.read_text())
+    entry["introspection"]["__schema"]["types"].pop()
+    path.write_text(json.dumps(entry))
+    assert cache.load(URL) is None
+
+    path.write_text("{not json")
+    assert cache.load(URL) is None
+
+
+def test_expired_entries_are_not_fresh(tmp_path: Path) -> None:
+    cache = SchemaCache(tmp_path / "schema.json", ttl=0)
+    assert not cache.is_fresh(cache.store(URL, INTROSPECTION))
+
+
+def test_client_skips_introspection_with_cached_schema(tmp_path: Path) -> None:
+    cache = SchemaCache(tmp_path / "schema.json", ttl=60)
+
+    with StandInServer(graphql_handler) as server:
+        with Orionx("api_key", "secret_key", url=server.url, schema_cache=cache):
+            pass
+        assert introspection_requests(server) == 1
+
+        client = Orionx("api_key", "secret_key", url=server.url, schema_cache=cache)
+        with client as session:
+            session.validate(
+                session.dsl().Query.market.select(session.dsl().Market.code)
+            )
+            result = session.execute(MARKET_QUERY, variable_values={"code": "BTCCLP"})
+            assert result == {"market": {"code": "BTCCLP"}}
+        assert introspection_requests(server) == 1
+
+
+def test_client_refreshes_expired_schema_in_background(tmp_path: Path) -> None:
+    path = tmp_path / "schema.json"
+    cache = SchemaCache(path, ttl=60)
+
+    with StandInServer(graphql_handler) as server:
+        cache.store(server.url, INTROSPECTION)
+        stored_at = time.time() - 120
+        entry = json.loads(path.read_text())
+        entry["stored_at"] = stored_at
+        path.write_text(json.dumps(entry))
+
+        with Orionx("api_key", "secret_key", url=server.url, schema_cache=cache):
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                cached = cache.load(server.url)
+                if cached is not None and cached.stored_at > stored_at:
+                    break
+                time.sleep(0.01)
+
+        assert introspection_requests(server) == 1
+
+    cached = cache.load(server.url)
+    assert cached is not None
+    assert cache.is_fresh(cached)